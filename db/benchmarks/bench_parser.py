@@ -0,0 +1,118 @@
+"""Benchmark parse_company_facts against the original nested-loop parser.
+
+Usage:
+    python db/benchmarks/bench_parser.py [--scale 200] [--repeat 5]
+
+The test fixture is small, so each us-gaap entry list is replicated ``scale``
+times with shifted period dates to approximate a large filer.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import timeit
+from pathlib import Path
+from typing import Any
+
+from edgar_db.models import FactRow
+from edgar_db.parser import VALID_FORMS, parse_company_facts, parse_company_facts_batch
+from edgar_db.xbrl_tags import STATEMENT_TAGS
+
+FIXTURE = Path(__file__).parents[1] / "tests" / "fixtures" / "company_facts_sample.json"
+
+
+def legacy_parse_company_facts(cik: int, data: dict[str, Any]) -> list[FactRow]:
+    """The parser as it was before the single-pass engine."""
+    us_gaap = data.get("facts", {}).get("us-gaap", {})
+    rows: list[FactRow] = []
+    seen: set[tuple[str, str, str, str]] = set()
+    for statement_name, metrics in STATEMENT_TAGS.items():
+        for canonical_name, tag_candidates in metrics.items():
+            for tag in tag_candidates:
+                tag_data = us_gaap.get(tag)
+                if not tag_data:
+                    continue
+                units = tag_data.get("units", {})
+                unit_data = None
+                unit_label = ""
+                for unit_key in ["USD", "USD/shares", "shares", "pure"]:
+                    if unit_key in units:
+                        unit_data = units[unit_key]
+                        unit_label = unit_key
+                        break
+                if not unit_data:
+                    continue
+                tag_had_valid_data = False
+                for entry in unit_data:
+                    form = entry.get("form", "")
+                    if form not in VALID_FORMS:
+                        continue
+                    period_end = entry.get("end")
+                    if not period_end:
+                        continue
+                    fp = entry.get("fp", "")
+                    fy = entry.get("fy")
+                    if fy is None:
+                        continue
+                    dedup_key = (canonical_name, period_end, fp, form)
+                    if dedup_key in seen:
+                        continue
+                    val = entry.get("val")
+                    if val is None:
+                        continue
+                    seen.add(dedup_key)
+                    tag_had_valid_data = True
+                    rows.append(FactRow(
+                        cik=cik, tag=tag, canonical_name=canonical_name,
+                        statement=statement_name, value=float(val), unit=unit_label,
+                        period_end=period_end, fiscal_year=int(fy), fiscal_period=fp,
+                        form=form, filed=entry.get("filed", ""),
+                        accession=entry.get("accn", ""),
+                    ))
+                if tag_had_valid_data:
+                    break
+    return rows
+
+
+def scaled_document(scale: int) -> dict[str, Any]:
+    data = json.loads(FIXTURE.read_text())
+    for tag_data in data["facts"]["us-gaap"].values():
+        for unit, entries in tag_data["units"].items():
+            grown = []
+            for i in range(scale):
+                for entry in entries:
+                    e = copy.copy(entry)
+                    year = int(e["end"][:4]) - i
+                    e["end"] = f"{year:04d}{e['end'][4:]}"
+                    grown.append(e)
+            tag_data["units"][unit] = grown
+    return data
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scale", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    data = scaled_document(args.scale)
+    assert parse_company_facts(320193, data) == legacy_parse_company_facts(320193, data)
+    n_rows = len(legacy_parse_company_facts(320193, data))
+
+    cases = [
+        ("legacy (FactRow list)", lambda: legacy_parse_company_facts(320193, data)),
+        ("single-pass (FactRow list)", lambda: parse_company_facts(320193, data)),
+        ("single-pass (FactBatch)", lambda: parse_company_facts_batch(320193, data)),
+    ]
+    print(f"{n_rows} rows per parse, best of {args.repeat}")
+    baseline = None
+    for name, fn in cases:
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print(f"  {name:<28} {best * 1e3:8.2f} ms  {baseline / best:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
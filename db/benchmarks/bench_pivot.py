@@ -0,0 +1,112 @@
+"""Benchmark statement reads: pandas pivot_table, the NumPy grid, wide tables.
+
+Usage:
+    python db/benchmarks/bench_pivot.py [--companies 200] [--years 15] [--repeat 200]
+
+Builds a synthetic database (see bench_schema.py) and times
+``EdgarQuery._pivot_statement`` against the original implementation, a
+13-column ``SELECT`` followed by ``pivot_table(aggfunc="first")``, two sorts
+and a reindex, and against the same call once the statements are
+materialized (``materialize_statements``). Every frame is checked to be
+identical before timing.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+from bench_schema import build_v1
+
+from edgar_db.db import connect_db, materialize_statements, query_facts_df, resolve_cik
+from edgar_db.query import EdgarQuery
+from edgar_db.xbrl_tags import STATEMENT_COLUMNS
+
+_CASES = [(statement, period) for statement in STATEMENT_COLUMNS for period in ("annual", "quarterly")]
+
+
+def pivot_table_statement(
+    conn: sqlite3.Connection, ticker: str, statement: str, period: str
+) -> pd.DataFrame:
+    """The pivot_table implementation ``_pivot_statement`` replaced."""
+    df = query_facts_df(conn, resolve_cik(conn, ticker), statement=statement, period=period)
+    if df.empty:
+        return pd.DataFrame()
+    pivot = df.pivot_table(
+        index=["fiscal_year", "fiscal_period", "period_end"],
+        columns="canonical_name",
+        values="value",
+        aggfunc="first",
+    )
+    pivot = pivot.reset_index().sort_values("period_end", ascending=False)
+    index_cols = ["fiscal_year", "fiscal_period", "period_end"]
+    ordered = index_cols + [c for c in STATEMENT_COLUMNS[statement] if c in pivot.columns]
+    extra = [c for c in pivot.columns if c not in ordered]
+    return pivot[ordered + extra].reset_index(drop=True)
+
+
+def _median_ms(fn: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=200)
+    parser.add_argument("--years", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        build_v1(path, args.companies, args.years)
+        conn = connect_db(path)
+        query = EdgarQuery(conn)
+        tickers = [f"T{i:04d}" for i in range(args.companies)]
+
+        def check() -> None:
+            for ticker in tickers[:20]:
+                for statement, period in _CASES:
+                    pd.testing.assert_frame_equal(
+                        query._pivot_statement(ticker, statement, period),
+                        pivot_table_statement(conn, ticker, statement, period),
+                    )
+
+        def time_cases(fn: Callable[[str, str, str], object]) -> list[float]:
+            rng = random.Random(0)
+            return [
+                _median_ms(lambda: fn(rng.choice(tickers), statement, period), args.repeat)
+                for statement, period in _CASES
+            ]
+
+        check()
+        before = time_cases(lambda t, s, p: pivot_table_statement(conn, t, s, p))
+        grid = time_cases(query._pivot_statement)
+        start = time.perf_counter()
+        materialize_statements(conn)
+        build = time.perf_counter() - start
+        check()
+        wide = time_cases(query._pivot_statement)
+
+        print(f"{args.companies} companies x {args.years} years; outputs identical")
+        print(f"materialize_statements: {build:.2f}s")
+        print(f"{'':22} {'pivot_table':>12} {'numpy':>10} {'wide':>10} {'speedup':>8}")
+        for (statement, period), b, g, w in zip(_CASES, before, grid, wide):
+            label = f"{statement} {period}"
+            print(f"{label:22} {b:10.2f}ms {g:8.2f}ms {w:8.2f}ms {b / w:7.1f}x")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
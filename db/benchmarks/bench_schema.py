@@ -0,0 +1,166 @@
+"""Benchmark the v1 (TEXT facts) and v2 (integer-keyed fact_data) schemas.
+
+Usage:
+    python db/benchmarks/bench_schema.py [--companies 500] [--years 15] [--repeat 200]
+
+Builds a synthetic v1 database with the original facts table and indexes,
+measures file size and read latency, migrates it in place through
+``connect_db`` and measures again. The read queries are the ones the query
+API and the UI issue, so they run unchanged against both schemas.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from edgar_db.db import connect_db
+from edgar_db.query import EdgarQuery
+from edgar_db.xbrl_tags import STATEMENT_TAGS
+
+V1_SCHEMA = """
+CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE companies (
+    cik INTEGER PRIMARY KEY, name TEXT NOT NULL, ticker TEXT NOT NULL,
+    sic TEXT DEFAULT '', exchanges TEXT DEFAULT '', last_downloaded TEXT DEFAULT ''
+);
+CREATE TABLE ticker_map (ticker TEXT PRIMARY KEY, cik INTEGER NOT NULL);
+CREATE TABLE facts (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    cik             INTEGER NOT NULL,
+    tag             TEXT NOT NULL,
+    canonical_name  TEXT NOT NULL,
+    statement       TEXT NOT NULL,
+    value           REAL NOT NULL,
+    unit            TEXT NOT NULL,
+    period_end      TEXT NOT NULL,
+    fiscal_year     INTEGER NOT NULL,
+    fiscal_period   TEXT NOT NULL,
+    form            TEXT NOT NULL,
+    filed           TEXT NOT NULL,
+    accession       TEXT NOT NULL,
+    FOREIGN KEY (cik) REFERENCES companies(cik)
+);
+CREATE UNIQUE INDEX idx_facts_dedup
+    ON facts (cik, canonical_name, period_end, fiscal_period, form);
+CREATE INDEX idx_facts_cik ON facts (cik);
+CREATE INDEX idx_facts_statement ON facts (cik, statement);
+INSERT INTO metadata VALUES ('schema_version', '1');
+"""
+
+# The SQL behind a statement (query_facts_df), without the pandas pivot
+_STATEMENT_SQL = """SELECT * FROM facts WHERE cik = ? AND statement = 'income' AND form = '10-K'
+                    ORDER BY period_end DESC, canonical_name"""
+
+# One metric across every company: a scan on both schemas
+_SCREEN_SQL = """SELECT cik, value FROM facts
+                 WHERE canonical_name = 'revenue' AND fiscal_year = 2020 AND form = '10-K'"""
+
+_QUARTERS = (("Q1", "03-31"), ("Q2", "06-30"), ("Q3", "09-30"), ("FY", "12-31"))
+
+
+def build_v1(path: Path, companies: int, years: int) -> None:
+    conn = sqlite3.connect(str(path))
+    conn.executescript(V1_SCHEMA)
+    metrics = [
+        (statement, name, tags[0])
+        for statement, by_name in STATEMENT_TAGS.items()
+        for name, tags in by_name.items()
+    ]
+    rng = random.Random(0)
+    for i in range(companies):
+        cik = 1_000_000 + i
+        ticker = f"T{i:04d}"
+        conn.execute("INSERT INTO companies (cik, name, ticker) VALUES (?, ?, ?)",
+                     (cik, f"Company {i}", ticker))
+        conn.execute("INSERT INTO ticker_map VALUES (?, ?)", (ticker, cik))
+        rows = []
+        for year in range(2024 - years, 2024):
+            accession = f"{cik:010d}-{year % 100:02d}-{rng.randrange(10**6):06d}"
+            for fp, month_day in _QUARTERS:
+                form = "10-K" if fp == "FY" else "10-Q"
+                for statement, name, tag in metrics:
+                    rows.append((
+                        cik, tag, name, statement, rng.uniform(-1e9, 1e10),
+                        "USD/shares" if name.startswith("eps") else "USD",
+                        f"{year}-{month_day}", year, fp, form, f"{year + 1}-02-01",
+                        accession,
+                    ))
+        conn.executemany(
+            """INSERT INTO facts (cik, tag, canonical_name, statement, value, unit,
+                   period_end, fiscal_year, fiscal_period, form, filed, accession)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            rows,
+        )
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def _median_ms(fn: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def measure(path: Path, companies: int, repeat: int) -> dict[str, float]:
+    conn = sqlite3.connect(str(path))
+    query = EdgarQuery(conn)
+    rng = random.Random(1)
+
+    def ticker() -> str:
+        return f"T{rng.randrange(companies):04d}"
+
+    results = {
+        "size_mb": path.stat().st_size / 1e6,
+        "statement_sql_ms": _median_ms(
+            lambda: conn.execute(_STATEMENT_SQL, (1_000_000 + rng.randrange(companies),))
+            .fetchall(),
+            repeat,
+        ),
+        "income_statement_ms": _median_ms(lambda: query.get_income_statement(ticker()), repeat),
+        "quarterly_balance_ms": _median_ms(
+            lambda: query.get_balance_sheet(ticker(), period="quarterly"), repeat
+        ),
+        "metric_series_ms": _median_ms(lambda: query.get_metric(ticker(), "revenue"), repeat),
+        "revenue_screen_ms": _median_ms(lambda: conn.execute(_SCREEN_SQL).fetchall(), 5),
+    }
+    conn.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=500)
+    parser.add_argument("--years", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        build_v1(path, args.companies, args.years)
+        before = measure(path, args.companies, args.repeat)
+
+        start = time.perf_counter()
+        connect_db(path).close()
+        migrate_s = time.perf_counter() - start
+        after = measure(path, args.companies, args.repeat)
+
+    print(f"{args.companies} companies x {args.years} years; migration {migrate_s:.1f}s")
+    print(f"{'':24} {'v1':>10} {'v2':>10} {'change':>8}")
+    for key in before:
+        change = after[key] / before[key] - 1 if before[key] else 0.0
+        print(f"{key:24} {before[key]:10.2f} {after[key]:10.2f} {change:+8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Compressed, content-addressed archive of raw companyfacts payloads.
+
+Every full companyfacts body the client reads is kept on disk, so a change
+to ``xbrl_tags.py`` can be applied with ``edgar-db reparse`` instead of
+downloading everything again. Layout under the archive root::
+
+    objects/ab/abcdef....json.gz   gzip of the body, named by its SHA-256
+    refs/CIK0000320193             hex digest of the CIK's latest body
+
+Writes go to a temporary file and are renamed into place, so a crash never
+leaves a truncated object or ref. An identical re-download costs one hash and
+no write. Each CIK keeps only its latest payload; the superseded object is
+removed when the ref moves.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+_REF_RE = re.compile(r"^CIK(\d{10})$")
+
+# gzip level: close to the best ratio on JSON at a fraction of level 9's cost
+_COMPRESS_LEVEL = 6
+
+
+@dataclass
+class ArchiveStats:
+    stored: int = 0  # new objects written
+    deduplicated: int = 0  # bodies already archived
+    bytes_in: int = 0
+    bytes_out: int = 0  # compressed bytes written
+
+    def summary(self) -> str:
+        ratio = self.bytes_out / self.bytes_in if self.bytes_in else 0.0
+        return (
+            f"archive {self.stored} stored, {self.deduplicated} unchanged, "
+            f"{self.bytes_in / 1e6:,.1f} MB -> {self.bytes_out / 1e6:,.1f} MB ({ratio:.0%})"
+        )
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class PayloadArchive:
+    """On-disk store of the latest companyfacts body per CIK."""
+
+    def __init__(self, root: Path) -> None:
+        self._root = root
+        self.stats = ArchiveStats()
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def _object_path(self, digest: str) -> Path:
+        return self._root / "objects" / digest[:2] / f"{digest}.json.gz"
+
+    def _ref_path(self, cik: int) -> Path:
+        return self._root / "refs" / f"CIK{str(cik).zfill(10)}"
+
+    def digest(self, cik: int) -> str | None:
+        try:
+            return self._ref_path(cik).read_text().strip() or None
+        except OSError:
+            return None
+
+    def store(self, cik: int, payload: bytes) -> str:
+        """Archive a raw body as the CIK's latest payload. Returns its digest."""
+        digest = hashlib.sha256(payload).hexdigest()
+        self.stats.bytes_in += len(payload)
+        path = self._object_path(digest)
+        if path.exists():
+            self.stats.deduplicated += 1
+        else:
+            compressed = gzip.compress(payload, compresslevel=_COMPRESS_LEVEL, mtime=0)
+            _write_atomic(path, compressed)
+            self.stats.stored += 1
+            self.stats.bytes_out += len(compressed)
+
+        previous = self.digest(cik)
+        if previous != digest:
+            _write_atomic(self._ref_path(cik), digest.encode())
+            if previous:
+                self._object_path(previous).unlink(missing_ok=True)
+        return digest
+
+    def load(self, cik: int) -> bytes | None:
+        """The CIK's latest archived body, or None if it was never archived."""
+        digest = self.digest(cik)
+        if digest is None:
+            return None
+        try:
+            return gzip.decompress(self._object_path(digest).read_bytes())
+        except OSError:
+            return None
+
+    def ciks(self) -> list[int]:
+        """Every archived CIK, ascending."""
+        refs = self._root / "refs"
+        if not refs.is_dir():
+            return []
+        found = (_REF_RE.match(p.name) for p in refs.iterdir())
+        return sorted(int(m.group(1)) for m in found if m)
@@ -0,0 +1,155 @@
+"""Offline ingestion of the SEC bulk companyfacts.zip archive.
+
+The archive holds one ``CIK##########.json`` member per filer, in the same
+format as the companyfacts API. Members are read straight out of the zip (never
+extracted to disk), parsed on a process pool and written through the regular
+``facts`` upsert path. No network access is needed.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator
+
+from .db import write_company_facts
+from .models import Company, FactBatch, SyncState
+from .parser import parse_company_facts_payload
+
+_MEMBER_RE = re.compile(r"(?:^|/)CIK(\d{10})\.json$")
+
+# Companies written per transaction
+_COMMIT_EVERY = 100
+
+
+@dataclass
+class BulkIngestResult:
+    companies: int = 0
+    facts: int = 0
+    empty: int = 0  # members with no usable us-gaap facts
+    errors: int = 0
+
+
+def _parse_member(cik: int, payload: bytes) -> tuple[int, str, FactBatch]:
+    """Decode one archive member and parse it. Runs inside pool workers."""
+    return (cik, *parse_company_facts_payload(cik, payload))
+
+
+def _iter_members(zf: zipfile.ZipFile) -> Iterator[tuple[int, zipfile.ZipInfo]]:
+    """Yield (cik, member) for every CIK##########.json entry in the archive."""
+    for info in zf.infolist():
+        m = _MEMBER_RE.search(info.filename)
+        if m and not info.is_dir():
+            yield int(m.group(1)), info
+
+
+def _ticker_for_cik(conn: sqlite3.Connection, cik: int) -> str:
+    cur = conn.execute("SELECT MIN(ticker) FROM ticker_map WHERE cik = ?", (cik,))
+    row = cur.fetchone()
+    return row[0] if row and row[0] else ""
+
+
+def ingest_companyfacts_zip(
+    conn: sqlite3.Connection,
+    path: str | Path,
+    workers: int | None = None,
+    progress_callback: Callable[[str, int, int], None] | None = None,
+) -> BulkIngestResult:
+    """Load every company in a companyfacts.zip archive into the database.
+
+    Args:
+        conn: Open database connection (written from this thread only).
+        path: Path to the SEC ``companyfacts.zip`` bulk archive.
+        workers: Parser processes. Defaults to the CPU count; ``1`` parses inline.
+        progress_callback: Called as ``(message, current, total)``.
+    """
+    workers = workers or os.cpu_count() or 1
+    result = BulkIngestResult()
+    now = datetime.now(timezone.utc).isoformat()
+
+    def store(cik: int, entity: str, facts: FactBatch) -> None:
+        if not facts:
+            result.empty += 1
+            return
+        company = Company(
+            cik=cik,
+            name=entity or str(cik),
+            ticker=_ticker_for_cik(conn, cik),
+            last_downloaded=now,
+        )
+        state = SyncState.from_batch(cik, facts)
+        result.facts += write_company_facts(
+            conn, company, facts, commit=False, state=state
+        ).written
+        result.companies += 1
+        if result.companies % _COMMIT_EVERY == 0:
+            conn.commit()
+
+    try:
+        _ingest(conn, path, workers, store, progress_callback, result)
+    finally:
+        conn.commit()
+    return result
+
+
+def _ingest(
+    conn: sqlite3.Connection,
+    path: str | Path,
+    workers: int,
+    store: Callable[[int, str, FactBatch], None],
+    progress_callback: Callable[[str, int, int], None] | None,
+    result: BulkIngestResult,
+) -> None:
+    with zipfile.ZipFile(path) as zf:
+        members = list(_iter_members(zf))
+        total = len(members)
+
+        if workers <= 1:
+            for i, (cik, info) in enumerate(members, 1):
+                try:
+                    store(*_parse_member(cik, zf.read(info)))
+                except Exception as exc:
+                    result.errors += 1
+                    if progress_callback:
+                        progress_callback(f"ERROR: {info.filename}: {exc}", i, total)
+                    continue
+                if progress_callback:
+                    progress_callback(info.filename, i, total)
+            return
+
+        # Bound the members held in memory: only a few payloads per worker
+        # are queued while the main thread writes finished ones.
+        max_pending = workers * 4
+        pending: deque[tuple[str, Future]] = deque()
+        done = 0
+
+        def drain_one() -> None:
+            nonlocal done
+            name, fut = pending.popleft()
+            done += 1
+            try:
+                store(*fut.result())
+            except Exception as exc:
+                result.errors += 1
+                if progress_callback:
+                    progress_callback(f"ERROR: {name}: {exc}", done, total)
+                return
+            if progress_callback:
+                progress_callback(name, done, total)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for cik, info in members:
+                if len(pending) >= max_pending:
+                    drain_one()
+                pending.append(
+                    (info.filename, pool.submit(_parse_member, cik, zf.read(info)))
+                )
+            while pending:
+                drain_one()
@@ -0,0 +1,72 @@
+"""Persistent validator cache for conditional GETs of companyfacts.
+
+Only the HTTP validators (ETag / Last-Modified) and the body size are kept, one
+small JSON file per CIK. A ``304 Not Modified`` means the stored facts are
+already current, so the body itself never needs to be cached.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+
+@dataclass
+class CacheEntry:
+    etag: str = ""
+    last_modified: str = ""
+    size: int = 0  # body bytes of the last full response
+
+    def request_headers(self) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    bytes_saved: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"cache {self.hits} hits, {self.misses} misses, "
+            f"{self.bytes_saved / 1e6:,.1f} MB saved"
+        )
+
+
+class ResponseCache:
+    """On-disk store of companyfacts validators keyed by CIK."""
+
+    def __init__(self, root: Path) -> None:
+        self._root = root
+        self.stats = CacheStats()
+
+    def _path(self, cik: int) -> Path:
+        return self._root / f"CIK{str(cik).zfill(10)}.json"
+
+    def lookup(self, cik: int) -> CacheEntry | None:
+        try:
+            raw = json.loads(self._path(cik).read_text())
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(**raw)
+
+    def store(self, cik: int, entry: CacheEntry) -> None:
+        """Persist validators. Call only after the response has been stored."""
+        if not (entry.etag or entry.last_modified):
+            return
+        self._root.mkdir(parents=True, exist_ok=True)
+        path = self._path(cik)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(asdict(entry)))
+        os.replace(tmp, path)
+
+    def invalidate(self, cik: int) -> None:
+        self._path(cik).unlink(missing_ok=True)
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import sys
+from pathlib import Path
 
 import click
 from rich.console import Console
@@ -34,56 +35,346 @@ def cli() -> None:
 @click.option("--ticker", "-t", multiple=True, help="Ticker(s) to download")
 @click.option("--sp500", is_flag=True, help="Download all S&P 500 companies")
 @click.option("--force", is_flag=True, help="Re-download even if recent")
-def download(ticker: tuple[str, ...], sp500: bool, force: bool) -> None:
+@click.option(
+    "--concurrency", "-c",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Requests in flight for batch downloads (shares the SEC rate limit)",
+)
+@click.option(
+    "--no-cache", is_flag=True,
+    help="Skip conditional GETs and always fetch full companyfacts responses",
+)
+@click.option(
+    "--no-archive", is_flag=True,
+    help="Do not keep compressed raw payloads for edgar-db reparse",
+)
+@click.option(
+    "--stream", is_flag=True,
+    help="Decode responses incrementally, keeping only mapped XBRL tags (needs ijson)",
+)
+@click.option(
+    "--workers", "-w",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Parse in this many processes, pipelined with fetching and writing",
+)
+@click.option(
+    "--max-in-flight",
+    type=click.IntRange(min=1),
+    default=16,
+    show_default=True,
+    help="Companies held in the --workers pipeline at once (bounds memory)",
+)
+@click.option(
+    "--resume", "resume_job", type=int, metavar="JOB_ID",
+    help="Continue an interrupted batch job, retrying only unfinished tickers",
+)
+@click.option(
+    "--by-market-cap", is_flag=True,
+    help="Download the largest companies first (market caps from secmaster-db)",
+)
+@click.option(
+    "--full", is_flag=True,
+    help="Write every parsed fact, not only those filed since the last sync",
+)
+@click.option(
+    "--sync", is_flag=True,
+    help="Check each company's submissions feed and download only those with a new 10-K/10-Q",
+)
+def download(
+    ticker: tuple[str, ...],
+    sp500: bool,
+    force: bool,
+    concurrency: int,
+    no_cache: bool,
+    no_archive: bool,
+    stream: bool,
+    workers: int,
+    max_in_flight: int,
+    resume_job: int | None,
+    by_market_cap: bool,
+    full: bool,
+    sync: bool,
+) -> None:
     """Download company financial data from SEC EDGAR."""
+    from .archive import PayloadArchive
+    from .cache import ResponseCache
     from .client import EdgarClient
-    from .downloader import download_batch, download_company
+    from .downloader import DeltaStats, download_batch, download_company
+    from .jobs import (
+        JobOptions,
+        create_job,
+        job_exists,
+        job_options,
+        job_summary,
+        unfinished_tickers,
+    )
     from .sp500 import get_sp500_tickers
 
-    if not ticker and not sp500:
-        console.print("[red]Error:[/red] Provide --ticker or --sp500")
+    if resume_job is not None and (ticker or sp500):
+        console.print("[red]Error:[/red] --resume cannot be combined with --ticker or --sp500")
+        sys.exit(1)
+    if not ticker and not sp500 and resume_job is None:
+        console.print("[red]Error:[/red] Provide --ticker, --sp500 or --resume")
+        sys.exit(1)
+    if concurrency > 1 and workers > 1:
+        console.print("[red]Error:[/red] Use either --concurrency or --workers")
+        sys.exit(1)
+    if sync and force:
+        console.print("[red]Error:[/red] Use either --sync or --force")
         sys.exit(1)
 
-    config = _get_config()
+    config = _get_config(stream_parse=stream or None)
     config.ensure_db_dir()
     conn = connect_db(config.db_path)
 
     tickers: list[str] = list(ticker)
-    if sp500:
+    job_id = resume_job
+    if job_id is not None:
+        if not job_exists(conn, job_id):
+            console.print(f"[red]Error:[/red] No download job {job_id}")
+            sys.exit(1)
+        stored = job_options(conn, job_id)
+        if stored is not None:
+            requested = {"force": force, "full": full, "sync": sync}
+            extra = [
+                f"--{flag}" for flag, on in requested.items() if on and not getattr(stored, flag)
+            ]
+            if extra:
+                console.print(
+                    f"[red]Error:[/red] Job {job_id} was started without {', '.join(extra)}"
+                )
+                sys.exit(1)
+            force, full, sync = stored.force, stored.full, stored.sync
+        tickers = unfinished_tickers(conn, job_id)
+        if not tickers:
+            console.print(f"Job {job_id} is already complete")
+            conn.close()
+            return
+        console.print(f"Resuming job {job_id}: {len(tickers)} unfinished tickers")
+    elif sp500:
         console.print("Fetching S&P 500 ticker list...")
         tickers = get_sp500_tickers()
         console.print(f"Found {len(tickers)} tickers")
 
+    priority = None
+    if by_market_cap:
+        from secmaster_db.config import Config as SecMasterConfig
+        from secmaster_db.db import connect_db as connect_secmaster
+        from secmaster_db.query import SecMasterQuery
+
+        secmaster_path = SecMasterConfig().db_path
+        if not secmaster_path.exists():
+            console.print("[red]Error:[/red] --by-market-cap needs a secmaster-db database")
+            sys.exit(1)
+        with SecMasterQuery(connect_secmaster(secmaster_path)) as sm:
+            priority = sm.market_caps()
+
     def progress(msg: str, current: int, total: int) -> None:
         if msg.startswith("ERROR"):
             console.print(f"  [red]{msg}[/red]")
+        elif msg.startswith("STATS"):
+            console.print(f"  [dim]{msg}[/dim]")
         else:
             console.print(f"  [{current}/{total}] {msg}")
 
-    with EdgarClient(config) as client:
-        if len(tickers) == 1 and not sp500:
+    cache = None if no_cache else ResponseCache(config.cache_dir)
+    archive = None if no_archive else PayloadArchive(config.archive_dir)
+    with EdgarClient(config, cache=cache, archive=archive) as client:
+        if len(tickers) == 1 and not sp500 and job_id is None and not sync:
             t = tickers[0]
             console.print(f"Downloading {t}...")
             try:
-                count = download_company(conn, client, t, force=force)
-                if count == 0:
+                stats = DeltaStats()
+                count = download_company(conn, client, t, force=force, full=full, stats=stats)
+                if count == 0 and not stats.parsed:
                     console.print(f"  {t}: already up to date (use --force to re-download)")
                 else:
                     console.print(f"  {t}: stored {count} facts")
+                    if stats.skipped:
+                        console.print(f"  [dim]STATS: {stats.summary()}[/dim]")
             except Exception as exc:
                 console.print(f"  [red]Error: {exc}[/red]")
                 sys.exit(1)
         else:
+            if job_id is None:
+                job_id = create_job(conn, tickers, JobOptions(force=force, full=full, sync=sync))
+                console.print(f"Job {job_id} (resume with: edgar-db download --resume {job_id})")
             results = download_batch(
-                conn, client, tickers, force=force, progress_callback=progress
+                conn, client, tickers, force=force, progress_callback=progress,
+                concurrency=concurrency, full=full, workers=workers,
+                max_in_flight=max_in_flight, priority=priority, job_id=job_id,
+                sync=sync,
             )
             success = sum(1 for v in results.values() if v >= 0)
             errors = sum(1 for v in results.values() if v < 0)
             console.print(f"\nDone: {success} succeeded, {errors} failed")
+            summary = job_summary(conn, job_id)
+            if summary.get("failed"):
+                console.print(
+                    f"{summary['failed']} tickers failed; retry them with "
+                    f"edgar-db download --resume {job_id}"
+                )
 
     conn.close()
 
 
+@cli.command("download-frames")
+@click.option(
+    "--tag", "-t", "tags", multiple=True, required=True,
+    help="us-gaap tag(s) mapped in xbrl_tags, e.g. Revenues",
+)
+@click.option(
+    "--period", "-p", "periods", multiple=True, required=True,
+    help="Frame period(s): CY2023, CY2023Q2, or CY2023Q4I for instants",
+)
+@click.option("--unit", "-u", default="USD", show_default=True, help="Unit of measure")
+def download_frames(tags: tuple[str, ...], periods: tuple[str, ...], unit: str) -> None:
+    """Load a metric for every filer with one request per tag and period."""
+    from .client import EdgarClient
+    from .frames import download_frame
+
+    config = _get_config()
+    config.ensure_db_dir()
+    conn = connect_db(config.db_path)
+
+    failed = 0
+    with EdgarClient(config) as client:
+        for tag in tags:
+            for period in periods:
+                try:
+                    result = download_frame(conn, client, tag, unit, period)
+                except Exception as exc:
+                    console.print(f"  [red]{tag} {period}: {exc}[/red]")
+                    failed += 1
+                    continue
+                console.print(f"  {result.summary()}")
+
+    conn.close()
+    if failed:
+        sys.exit(1)
+
+
+@cli.command()
+@click.option(
+    "--ticker", "--tickers", "-t", "tickers", multiple=True,
+    help="Ticker(s) to reparse (default: every archived company)",
+)
+@click.option(
+    "--workers", "-w",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Parser processes (default: CPU count)",
+)
+@click.option(
+    "--raw", is_flag=True,
+    help="Load every us-gaap fact into raw_facts and derive facts in SQL",
+)
+def reparse(tickers: tuple[str, ...], workers: int | None, raw: bool) -> None:
+    """Re-parse archived payloads after an xbrl_tags change (no network access)."""
+    from .archive import PayloadArchive
+    from .db import resolve_cik
+    from .reparse import reparse_archive
+
+    config = _get_config()
+    conn = connect_db(config.db_path)
+
+    ciks = None
+    if tickers:
+        ciks = []
+        for t in tickers:
+            cik = resolve_cik(conn, t)
+            if cik is None:
+                console.print(f"[red]Error:[/red] Unknown ticker: {t.upper()}")
+                sys.exit(1)
+            ciks.append(cik)
+
+    def progress(msg: str, current: int, total: int) -> None:
+        if msg.startswith("ERROR"):
+            console.print(f"  [red]{msg}[/red]")
+        elif current % 500 == 0 or current == total:
+            console.print(f"  [{current}/{total}] {msg}")
+
+    result = reparse_archive(
+        conn, PayloadArchive(config.archive_dir), ciks=ciks, workers=workers,
+        progress_callback=progress, raw=raw,
+    )
+    console.print(f"\nDone: {result.summary()}")
+    conn.close()
+
+
+@cli.command()
+def remap() -> None:
+    """Re-derive facts from raw_facts after an xbrl_tags change (pure SQL)."""
+    from .db import remap_raw_facts
+
+    config = _get_config()
+    conn = connect_db(config.db_path)
+    counts, deleted = remap_raw_facts(conn)
+    console.print(
+        f"Done: {counts.inserted:,} inserted, {counts.updated:,} updated, "
+        f"{counts.unchanged:,} unchanged, {deleted:,} removed"
+    )
+    conn.close()
+
+
+@cli.command()
+@click.option("--drop", is_flag=True, help="Drop the tables and pivot from facts again")
+def materialize(drop: bool) -> None:
+    """Keep statements as wide tables, maintained on every write."""
+    from .db import drop_statement_tables, materialize_statements
+
+    config = _get_config()
+    conn = connect_db(config.db_path)
+    if drop:
+        drop_statement_tables(conn)
+        console.print("Dropped the materialized statement tables")
+    else:
+        rows = materialize_statements(conn)
+        console.print(
+            "Done: " + ", ".join(f"{statement} {count:,} rows" for statement, count in rows.items())
+        )
+    conn.close()
+
+
+@cli.command("ingest-bulk")
+@click.argument(
+    "archive", type=click.Path(exists=True, dir_okay=False, path_type=Path)
+)
+@click.option(
+    "--workers", "-w",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Parser processes (default: CPU count)",
+)
+def ingest_bulk(archive: Path, workers: int | None) -> None:
+    """Load a local SEC companyfacts.zip archive (no network access)."""
+    from .bulk import ingest_companyfacts_zip
+
+    config = _get_config()
+    config.ensure_db_dir()
+    conn = connect_db(config.db_path)
+
+    def progress(msg: str, current: int, total: int) -> None:
+        if msg.startswith("ERROR"):
+            console.print(f"  [red]{msg}[/red]")
+        elif current % 500 == 0 or current == total:
+            console.print(f"  [{current}/{total}] {msg}")
+
+    console.print(f"Ingesting {archive}...")
+    result = ingest_companyfacts_zip(
+        conn, archive, workers=workers, progress_callback=progress
+    )
+    console.print(
+        f"\nDone: {result.companies} companies, {result.facts} facts stored "
+        f"({result.empty} without usable facts, {result.errors} failed)"
+    )
+    conn.close()
+
+
 @cli.command()
 @click.argument("ticker")
 @click.option(
@@ -137,6 +428,46 @@ def show(ticker: str, statement: str, period: str, fmt: str) -> None:
     conn.close()
 
 
+@cli.command()
+@click.argument("metric")
+@click.option(
+    "--period", "-p", required=True,
+    help="Frame period loaded with download-frames, e.g. CY2023",
+)
+@click.option("--min", "min_value", type=float, help="Smallest value to include")
+@click.option("--max", "max_value", type=float, help="Largest value to include")
+@click.option("--limit", "-n", type=click.IntRange(min=1), default=20, show_default=True)
+@click.option(
+    "--format", "fmt",
+    type=click.Choice(["table", "csv"]),
+    default="table",
+    help="Output format",
+)
+def screen(
+    metric: str,
+    period: str,
+    min_value: float | None,
+    max_value: float | None,
+    limit: int,
+    fmt: str,
+) -> None:
+    """Rank every filer by a canonical metric for one frames period."""
+    config = _get_config()
+    conn = connect_db(config.db_path)
+    df = EdgarQuery(conn).screen(metric, period, min_value, max_value, limit)
+    conn.close()
+
+    if df.empty:
+        console.print(
+            f"[yellow]No {metric} values for {period.upper()} "
+            "(load them with download-frames)[/yellow]"
+        )
+    elif fmt == "csv":
+        click.echo(df.to_csv(index=False))
+    else:
+        _print_rich_table(df, f"{metric} — {period.upper()}")
+
+
 def _print_rich_table(df: "import('pandas').DataFrame", title: str) -> None:
     table = Table(title=title, show_lines=True)
 
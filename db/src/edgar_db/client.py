@@ -2,23 +2,82 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 import time
-from typing import Any
+from functools import partial
+from typing import Any, Awaitable, Callable, TypeVar
 
 import httpx
 
+from .archive import PayloadArchive
+from .cache import CacheEntry, ResponseCache
 from .config import Config
+from .ratelimit import THROTTLE_STATUSES, RateLimiter, parse_retry_after, shared_limiter
+from .streaming import CompanyFactsDecoder
 
 BASE_URL = "https://data.sec.gov"
 COMPANY_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
 COMPANY_FACTS_URL = f"{BASE_URL}/api/xbrl/companyfacts/CIK{{cik}}.json"
+SUBMISSIONS_URL = f"{BASE_URL}/submissions/CIK{{cik}}.json"
+FRAMES_URL = f"{BASE_URL}/api/xbrl/frames/{{taxonomy}}/{{tag}}/{{unit}}/{{period}}.json"
+
+
+T = TypeVar("T")
+
+
+def _read_response(resp: httpx.Response) -> httpx.Response:
+    resp.read()
+    return resp
+
+
+def _cache_entry(resp: httpx.Response, size: int) -> CacheEntry:
+    return CacheEntry(
+        etag=resp.headers.get("ETag", ""),
+        last_modified=resp.headers.get("Last-Modified", ""),
+        size=size,
+    )
+
+
+def _validators(
+    cache: ResponseCache | None, archive: PayloadArchive | None, cik: int, conditional: bool
+) -> CacheEntry | None:
+    """Cached validators to revalidate ``cik`` with, or None for a full fetch.
+
+    A 304 carries no body, so with an archive a CIK that has never been
+    archived is always fetched in full; otherwise reparse has nothing to read.
+    """
+    if cache is None or not conditional:
+        return None
+    if archive is not None and archive.digest(cik) is None:
+        return None
+    return cache.lookup(cik)
+
+
+def _throttle_error(resp: httpx.Response) -> httpx.HTTPStatusError:
+    return httpx.HTTPStatusError(
+        f"Throttled with status {resp.status_code} for url '{resp.request.url}'",
+        request=resp.request,
+        response=resp,
+    )
 
 
 class EdgarClient:
-    def __init__(self, config: Config) -> None:
+    def __init__(
+        self,
+        config: Config,
+        cache: ResponseCache | None = None,
+        limiter: RateLimiter | None = None,
+        archive: PayloadArchive | None = None,
+    ) -> None:
         self._config = config
-        self._min_interval = 1.0 / config.rate_limit
-        self._last_request_time = 0.0
+        self._cache = cache
+        self._archive = archive
+        # Budget shared with every process using the same User-Agent
+        self._owns_limiter = limiter is None
+        self._limiter = limiter or shared_limiter(
+            config.rate_limit, config.rate_limit_path, config.user_agent
+        )
         self._client = httpx.Client(
             headers={
                 "User-Agent": config.user_agent,
@@ -27,8 +86,26 @@ class EdgarClient:
             timeout=config.timeout,
         )
 
+    @property
+    def config(self) -> Config:
+        return self._config
+
+    @property
+    def cache(self) -> ResponseCache | None:
+        return self._cache
+
+    @property
+    def limiter(self) -> RateLimiter:
+        return self._limiter
+
+    @property
+    def archive(self) -> PayloadArchive | None:
+        return self._archive
+
     def close(self) -> None:
         self._client.close()
+        if self._owns_limiter:
+            self._limiter.close()
 
     def __enter__(self) -> EdgarClient:
         return self
@@ -37,46 +114,295 @@ class EdgarClient:
         self.close()
 
     def _throttle(self) -> None:
-        now = time.monotonic()
-        elapsed = now - self._last_request_time
-        if elapsed < self._min_interval:
-            time.sleep(self._min_interval - elapsed)
-        self._last_request_time = time.monotonic()
+        self._limiter.wait()
+
+    def _stream(
+        self,
+        url: str,
+        consume: Callable[[httpx.Response], T],
+        headers: dict[str, str] | None = None,
+    ) -> T:
+        """GET with throttling and retries; ``consume`` reads the open response.
 
-    def _get(self, url: str) -> httpx.Response:
+        ``consume`` sees 2xx and 304 responses only. 429/503 responses slow the
+        shared limiter down (honoring ``Retry-After``) before retrying. A
+        transport error while ``consume`` reads the body retries the whole request.
+        """
         last_exc: Exception | None = None
         for attempt in range(self._config.max_retries):
             self._throttle()
             try:
-                resp = self._client.get(url)
-                if resp.status_code == 429:
-                    wait = 2 ** attempt
-                    time.sleep(wait)
-                    continue
-                resp.raise_for_status()
-                return resp
+                with self._client.stream("GET", url, headers=headers) as resp:
+                    if resp.status_code in THROTTLE_STATUSES:
+                        self._limiter.on_throttle(
+                            parse_retry_after(resp.headers.get("Retry-After"))
+                        )
+                        last_exc = _throttle_error(resp)
+                        continue
+                    if resp.status_code != 304:
+                        resp.raise_for_status()
+                    result = consume(resp)
+                    self._limiter.on_success()
+                    return result
             except httpx.HTTPStatusError as exc:
                 if exc.response.status_code >= 500:
                     last_exc = exc
-                    time.sleep(2 ** attempt)
+                    time.sleep(self._limiter.retry_delay(attempt))
                     continue
                 raise
             except httpx.TransportError as exc:
                 last_exc = exc
-                time.sleep(2 ** attempt)
+                time.sleep(self._limiter.retry_delay(attempt))
                 continue
         raise last_exc or RuntimeError("Request failed after retries")
 
+    def _get(self, url: str, headers: dict[str, str] | None = None) -> httpx.Response:
+        return self._stream(url, _read_response, headers)
+
+    def _decode_facts(
+        self, cik: int, resp: httpx.Response
+    ) -> tuple[dict[str, Any] | None, CacheEntry | None]:
+        if resp.status_code == 304:
+            return None, None
+        if self._config.stream_parse:
+            # Tee the chunks into the archive's buffer while decoding
+            decoder = CompanyFactsDecoder()
+            chunks: list[bytes] = []
+            for chunk in resp.iter_bytes():
+                decoder.feed(chunk)
+                if self._archive is not None:
+                    chunks.append(chunk)
+            if self._archive is not None:
+                self._archive.store(cik, b"".join(chunks))
+            return decoder.result(), _cache_entry(resp, decoder.bytes_read)
+        body = resp.read()
+        if self._archive is not None:
+            self._archive.store(cik, body)
+        return json.loads(body), _cache_entry(resp, len(body))
+
     def get_company_tickers(self) -> dict[str, Any]:
         resp = self._get(COMPANY_TICKERS_URL)
         return resp.json()
 
+    def get_company_tickers_if_modified(
+        self, cached: CacheEntry | None = None
+    ) -> tuple[dict[str, Any] | None, CacheEntry | None]:
+        """Conditional company_tickers.json fetch.
+
+        Returns ``(None, None)`` on 304 Not Modified, otherwise
+        ``(data, validators)``.
+        """
+        def consume(resp: httpx.Response) -> tuple[dict[str, Any] | None, CacheEntry | None]:
+            if resp.status_code == 304:
+                return None, None
+            resp.read()
+            return resp.json(), _cache_entry(resp, len(resp.content))
+
+        headers = cached.request_headers() if cached else None
+        return self._stream(COMPANY_TICKERS_URL, consume, headers or None)
+
     def get_company_facts(self, cik: int) -> dict[str, Any]:
-        padded = str(cik).zfill(10)
-        url = COMPANY_FACTS_URL.format(cik=padded)
-        resp = self._get(url)
-        return resp.json()
+        """Fetch companyfacts for a CIK.
+
+        With ``config.stream_parse`` the body is decoded incrementally and
+        only us-gaap tags present in ``TAG_LOOKUP`` are kept. With an
+        ``archive`` every full body is also archived, streamed or not.
+        """
+        url = COMPANY_FACTS_URL.format(cik=self.pad_cik(cik))
+        data, _ = self._stream(url, partial(self._decode_facts, cik))
+        return data
+
+    def get_submissions(self, cik: int) -> dict[str, Any]:
+        """Fetch a filer's submissions feed (filing history, newest first)."""
+        return self._get(SUBMISSIONS_URL.format(cik=self.pad_cik(cik))).json()
+
+    def get_frame(
+        self, tag: str, unit: str, period: str, taxonomy: str = "us-gaap"
+    ) -> dict[str, Any]:
+        """Fetch one XBRL frame: a tag's value for every filer in a period.
+
+        ``period`` is a frames period such as ``CY2023``, ``CY2023Q2`` or
+        ``CY2023Q4I`` (instant). Units with a slash (``USD/shares``) are
+        sent in the API's ``USD-per-shares`` form.
+        """
+        url = FRAMES_URL.format(
+            taxonomy=taxonomy, tag=tag, unit=unit.replace("/", "-per-"), period=period
+        )
+        return self._get(url).json()
+
+    def get_company_facts_if_modified(
+        self, cik: int, conditional: bool = True
+    ) -> tuple[dict[str, Any] | None, CacheEntry | None]:
+        """Conditional companyfacts fetch using the response cache.
+
+        Returns ``(None, cached_entry)`` on 304 Not Modified, otherwise
+        ``(data, new_entry)``. The caller stores ``new_entry`` in the cache once
+        the data has been written, so a failed write is retried next time.
+        With ``conditional=False`` the full body is always fetched.
+        """
+        if self._cache is None:
+            return self.get_company_facts(cik), None
+        return self._conditional_facts(cik, conditional, self._decode_facts)
+
+    def get_company_facts_raw(
+        self, cik: int, conditional: bool = True
+    ) -> tuple[bytes | None, CacheEntry | None]:
+        """Like ``get_company_facts_if_modified`` but returns the undecoded body.
+
+        Lets callers decode and parse in another process.
+        """
+        return self._conditional_facts(cik, conditional, self._read_facts)
+
+    def _read_facts(
+        self, cik: int, resp: httpx.Response
+    ) -> tuple[bytes | None, CacheEntry | None]:
+        if resp.status_code == 304:
+            return None, None
+        body = resp.read()
+        if self._archive is not None:
+            self._archive.store(cik, body)
+        return body, _cache_entry(resp, len(body))
+
+    def _conditional_facts(
+        self,
+        cik: int,
+        conditional: bool,
+        consume: Callable[[int, httpx.Response], tuple[T | None, CacheEntry | None]],
+    ) -> tuple[T | None, CacheEntry | None]:
+        cached = _validators(self._cache, self._archive, cik, conditional)
+        url = COMPANY_FACTS_URL.format(cik=self.pad_cik(cik))
+        body, entry = self._stream(
+            url, partial(consume, cik), cached.request_headers() if cached else None
+        )
+        if self._cache is None:
+            return body, None
+        if body is None and cached is not None:
+            self._cache.stats.hits += 1
+            self._cache.stats.bytes_saved += cached.size
+            return None, cached
+        self._cache.stats.misses += 1
+        return body, entry
 
     @staticmethod
     def pad_cik(cik: int) -> str:
         return str(cik).zfill(10)
+
+
+class AsyncEdgarClient:
+    """Asyncio counterpart of EdgarClient for concurrent company downloads.
+
+    All requests draw from one ``RateLimiter`` (pass the sync client's
+    ``limiter`` to share it), so raising concurrency overlaps latency without
+    exceeding ``rate_limit``.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        cache: ResponseCache | None = None,
+        limiter: RateLimiter | None = None,
+        archive: PayloadArchive | None = None,
+    ) -> None:
+        self._config = config
+        self._cache = cache
+        self._archive = archive
+        self._owns_limiter = limiter is None
+        self._limiter = limiter or shared_limiter(
+            config.rate_limit, config.rate_limit_path, config.user_agent
+        )
+        self._client = httpx.AsyncClient(
+            headers={
+                "User-Agent": config.user_agent,
+                "Accept": "application/json",
+            },
+            timeout=config.timeout,
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+        if self._owns_limiter:
+            self._limiter.close()
+
+    async def __aenter__(self) -> AsyncEdgarClient:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.aclose()
+
+    async def _stream(
+        self,
+        url: str,
+        consume: Callable[[httpx.Response], Awaitable[T]],
+        headers: dict[str, str] | None = None,
+    ) -> T:
+        last_exc: Exception | None = None
+        for attempt in range(self._config.max_retries):
+            delay = self._limiter.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                async with self._client.stream("GET", url, headers=headers) as resp:
+                    if resp.status_code in THROTTLE_STATUSES:
+                        self._limiter.on_throttle(
+                            parse_retry_after(resp.headers.get("Retry-After"))
+                        )
+                        last_exc = _throttle_error(resp)
+                        continue
+                    if resp.status_code != 304:
+                        resp.raise_for_status()
+                    result = await consume(resp)
+                    self._limiter.on_success()
+                    return result
+            except httpx.HTTPStatusError as exc:
+                if exc.response.status_code >= 500:
+                    last_exc = exc
+                    await asyncio.sleep(self._limiter.retry_delay(attempt))
+                    continue
+                raise
+            except httpx.TransportError as exc:
+                last_exc = exc
+                await asyncio.sleep(self._limiter.retry_delay(attempt))
+                continue
+        raise last_exc or RuntimeError("Request failed after retries")
+
+    async def _decode_facts(
+        self, cik: int, resp: httpx.Response
+    ) -> tuple[dict[str, Any] | None, CacheEntry | None]:
+        if resp.status_code == 304:
+            return None, None
+        if self._config.stream_parse:
+            decoder = CompanyFactsDecoder()
+            chunks: list[bytes] = []
+            async for chunk in resp.aiter_bytes():
+                decoder.feed(chunk)
+                if self._archive is not None:
+                    chunks.append(chunk)
+            if self._archive is not None:
+                self._archive.store(cik, b"".join(chunks))
+            return decoder.result(), _cache_entry(resp, decoder.bytes_read)
+        body = await resp.aread()
+        if self._archive is not None:
+            self._archive.store(cik, body)
+        return json.loads(body), _cache_entry(resp, len(body))
+
+    async def get_company_facts(self, cik: int) -> dict[str, Any]:
+        url = COMPANY_FACTS_URL.format(cik=EdgarClient.pad_cik(cik))
+        data, _ = await self._stream(url, partial(self._decode_facts, cik))
+        return data
+
+    async def get_company_facts_if_modified(
+        self, cik: int, conditional: bool = True
+    ) -> tuple[dict[str, Any] | None, CacheEntry | None]:
+        """Async counterpart of EdgarClient.get_company_facts_if_modified."""
+        if self._cache is None:
+            return await self.get_company_facts(cik), None
+        cached = _validators(self._cache, self._archive, cik, conditional)
+        url = COMPANY_FACTS_URL.format(cik=EdgarClient.pad_cik(cik))
+        headers = cached.request_headers() if cached else None
+        data, entry = await self._stream(url, partial(self._decode_facts, cik), headers)
+        if data is None and cached is not None:
+            self._cache.stats.hits += 1
+            self._cache.stats.bytes_saved += cached.size
+            return None, cached
+        self._cache.stats.misses += 1
+        return data, entry
@@ -9,6 +9,26 @@ def _default_db_path() -> Path:
     return Path(os.environ.get("EDGAR_DB_PATH", Path.home() / ".edgar-db" / "edgar.db"))
 
 
+def _default_cache_dir() -> Path:
+    return Path(os.environ.get("EDGAR_CACHE_DIR", Path.home() / ".edgar-db" / "http-cache"))
+
+
+def _default_archive_dir() -> Path:
+    return Path(os.environ.get("EDGAR_ARCHIVE_DIR", Path.home() / ".edgar-db" / "archive"))
+
+
+def _default_ticker_map_ttl() -> float:
+    return float(os.environ.get("EDGAR_TICKER_MAP_TTL", 86400))
+
+
+def _default_rate_limit_path() -> Path | None:
+    # Set EDGAR_RATE_LIMIT_PATH="" to give each process its own budget
+    path = os.environ.get(
+        "EDGAR_RATE_LIMIT_PATH", str(Path.home() / ".edgar-db" / "ratelimit.db")
+    )
+    return Path(path) if path else None
+
+
 def _default_user_agent() -> str:
     ua = os.environ.get("EDGAR_USER_AGENT", "")
     if not ua:
@@ -23,9 +43,17 @@ def _default_user_agent() -> str:
 class Config:
     user_agent: str = field(default_factory=_default_user_agent)
     db_path: Path = field(default_factory=_default_db_path)
+    cache_dir: Path = field(default_factory=_default_cache_dir)
+    # compressed raw companyfacts payloads, for edgar-db reparse
+    archive_dir: Path = field(default_factory=_default_archive_dir)
     rate_limit: float = 10.0  # requests per second
+    # SQLite file holding the request schedule shared by all processes on this host
+    rate_limit_path: Path | None = field(default_factory=_default_rate_limit_path)
     timeout: float = 30.0
     max_retries: int = 3
+    stream_parse: bool = False  # decode companyfacts incrementally, mapped tags only
+    # seconds before company_tickers.json is revalidated
+    ticker_map_ttl: float = field(default_factory=_default_ticker_map_ttl)
 
     def ensure_db_dir(self) -> None:
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,48 @@
+"""Day-number date encoding shared by the EDGAR and Yahoo Finance stores.
+
+Dates are stored as days since 1970-01-01; text that is not a valid
+``YYYY-MM-DD`` date is kept as is.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import date
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def encode_day(value: str | None) -> int | str | None:
+    """``YYYY-MM-DD`` as days since 1970-01-01; other text as is, empty as None."""
+    if not value:
+        return None
+    if not _DATE_RE.match(value):
+        return value
+    try:
+        return date.fromisoformat(value).toordinal() - _EPOCH_ORDINAL
+    except ValueError:
+        return value
+
+
+def decode_day(value: int | str) -> str:
+    """Inverse of ``encode_day`` for a stored, non-empty value."""
+    if isinstance(value, int):
+        return date.fromordinal(value + _EPOCH_ORDINAL).isoformat()
+    return value
+
+
+def day_range(start: str | None, end: str | None) -> tuple[int, int]:
+    """Inclusive ``(first, last)`` day numbers for optional ``YYYY-MM-DD`` bounds.
+
+    A missing bound is open. Raises ``ValueError`` for a bound that is not a date.
+    """
+    first, last = date.min.toordinal(), date.max.toordinal()
+    try:
+        if start:
+            first = date.fromisoformat(start[:10]).toordinal()
+        if end:
+            last = date.fromisoformat(end[:10]).toordinal()
+    except ValueError:
+        raise ValueError(f"Invalid date range {start!r}..{end!r}; expected YYYY-MM-DD") from None
+    return first - _EPOCH_ORDINAL, last - _EPOCH_ORDINAL
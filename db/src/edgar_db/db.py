@@ -1,14 +1,58 @@
 from __future__ import annotations
 
+import json
 import sqlite3
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable
 
 import pandas as pd
 
-from .models import Company, FactRow
+from .dates import encode_day
+from .models import FACT_COLUMNS, Company, FactBatch, FactRow, SyncState
+from .parser import UNIT_PRIORITY, VALID_FORMS, RawFact, encode_accession
+from .xbrl_tags import STATEMENT_TAGS
+
+SCHEMA_VERSION = "2"
+
+# Dates are stored as days since 1970-01-01 and accessions as their 18 digits;
+# values that do not fit either encoding are kept as text. These SQL forms
+# mirror dates.encode_day / parser.encode_accession.
+_DAY_GLOB = "[0-9]" * 4 + "-" + "[0-9]" * 2 + "-" + "[0-9]" * 2
+_ACCESSION_GLOB = "[0-9]" * 10 + "-" + "[0-9]" * 2 + "-" + "[0-9]" * 6
+
+
+def _encode_day_sql(column: str, keep_empty: bool = False) -> str:
+    fallback = column if keep_empty else f"NULLIF({column}, '')"
+    return (
+        # the modifier normalizes impossible days such as 02-30, which date() echoes
+        f"CASE WHEN {column} GLOB '{_DAY_GLOB}' AND date({column}, '+0 days') = {column}"
+        f" THEN CAST(julianday({column}) - 2440587.5 AS INTEGER) ELSE {fallback} END"
+    )
+
+
+def _decode_day_sql(column: str) -> str:
+    return (
+        f"CASE typeof({column}) WHEN 'integer' THEN date({column} * 86400, 'unixepoch')"
+        f" ELSE COALESCE({column}, '') END"
+    )
+
+
+def _encode_accession_sql(column: str) -> str:
+    return (
+        f"CASE WHEN {column} GLOB '{_ACCESSION_GLOB}'"
+        f" THEN CAST(replace({column}, '-', '') AS INTEGER) ELSE NULLIF({column}, '') END"
+    )
+
+
+def _decode_accession_sql(column: str) -> str:
+    return (
+        f"CASE typeof({column}) WHEN 'integer'"
+        f" THEN printf('%010d-%02d-%06d', {column} / 100000000,"
+        f" {column} / 1000000 % 100, {column} % 1000000)"
+        f" ELSE COALESCE({column}, '') END"
+    )
 
-SCHEMA_VERSION = "1"
 
 _SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS metadata (
@@ -30,31 +74,172 @@ CREATE TABLE IF NOT EXISTS ticker_map (
     cik     INTEGER NOT NULL
 );
 
-CREATE TABLE IF NOT EXISTS facts (
-    id              INTEGER PRIMARY KEY AUTOINCREMENT,
-    cik             INTEGER NOT NULL,
+-- Strings shared by fact_data and raw_facts: XBRL tags, units, forms and
+-- fiscal periods
+CREATE TABLE IF NOT EXISTS labels (
+    id     INTEGER PRIMARY KEY,
+    label  TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS canonical_metrics (
+    id              INTEGER PRIMARY KEY,
+    canonical_name  TEXT NOT NULL UNIQUE,
+    statement       TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_canonical_metrics_statement
+    ON canonical_metrics (statement, canonical_name);
+
+-- One row per (company, metric, period end, fiscal period, form), clustered
+-- on that key. period_end and filed are encoded days, accession the encoded
+-- accession number; an empty filed or accession is NULL. Read it through the
+-- facts view, which decodes every column back to text.
+CREATE TABLE IF NOT EXISTS fact_data (
+    cik           INTEGER NOT NULL,
+    canonical_id  INTEGER NOT NULL,
+    period_end    INTEGER NOT NULL,
+    fp_id         INTEGER NOT NULL,
+    form_id       INTEGER NOT NULL,
+    tag_id        INTEGER NOT NULL,
+    unit_id       INTEGER NOT NULL,
+    value         REAL NOT NULL,
+    fiscal_year   INTEGER NOT NULL,
+    filed         INTEGER,
+    accession     INTEGER,
+    PRIMARY KEY (cik, canonical_id, period_end, fp_id, form_id),
+    FOREIGN KEY (cik) REFERENCES companies(cik)
+) WITHOUT ROWID;
+
+-- Every value of each loaded XBRL frame, keyed by its calendar period (ccp,
+-- e.g. CY2023 or CY2023Q4I) rather than a fiscal one; one metric and period
+-- across all filers is one key range
+CREATE TABLE IF NOT EXISTS frame_facts (
+    canonical_id  INTEGER NOT NULL,
+    ccp           TEXT NOT NULL,
+    cik           INTEGER NOT NULL,
+    period_end    INTEGER NOT NULL,  -- day number, as in fact_data
+    value         REAL NOT NULL,
+    accession     INTEGER,
+    PRIMARY KEY (canonical_id, ccp, cik),
+    FOREIGN KEY (cik) REFERENCES companies(cik)
+) WITHOUT ROWID;
+
+
+CREATE TABLE IF NOT EXISTS download_jobs (
+    job_id      INTEGER NOT NULL,
+    ticker      TEXT NOT NULL,
+    state       TEXT NOT NULL DEFAULT 'pending',  -- pending, running, done, failed
+    error       TEXT NOT NULL DEFAULT '',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    duration    REAL NOT NULL DEFAULT 0,  -- seconds spent on the last attempt
+    updated_at  TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (job_id, ticker)
+);
+
+CREATE TABLE IF NOT EXISTS download_job_options (
+    job_id  INTEGER PRIMARY KEY,
+    force   INTEGER NOT NULL DEFAULT 0,
+    full    INTEGER NOT NULL DEFAULT 0,
+    sync    INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    cik            INTEGER PRIMARY KEY,
+    max_filed      TEXT NOT NULL,
+    max_accession  TEXT NOT NULL,
+    tag_plan       TEXT NOT NULL
+);
+
+-- Bumped in the transaction that changes a company's facts, so readers can
+-- tell whether a result computed earlier is still current
+CREATE TABLE IF NOT EXISTS fact_versions (
+    cik      INTEGER PRIMARY KEY,
+    version  INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_ticker_map_cik ON ticker_map (cik, ticker);
+CREATE INDEX IF NOT EXISTS idx_ticker_map_nocase ON ticker_map (ticker COLLATE NOCASE, cik);
+
+-- Optional raw store: every us-gaap entry of a payload, compactly encoded.
+-- Tags, units, forms and fiscal periods are ids into labels; dates and
+-- accessions are encoded as in fact_data. ord is the entry's
+-- position within its tag and unit in the payload. usable marks the entries
+-- the parser would keep for the tag whatever the tag mapping (best unit,
+-- valid, first per period); raw_tags lists each company's tags.
+CREATE TABLE IF NOT EXISTS raw_facts (
+    cik        INTEGER NOT NULL,
+    tag_id     INTEGER NOT NULL,
+    unit_id    INTEGER NOT NULL,
+    ord        INTEGER NOT NULL,
+    start_day  INTEGER,
+    end_day    INTEGER,
+    value      REAL,
+    accession  INTEGER,
+    fy         INTEGER,
+    fp_id      INTEGER,
+    form_id    INTEGER,
+    filed_day  INTEGER,
+    usable     INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (cik, tag_id, unit_id, ord)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS raw_tags (
+    cik     INTEGER NOT NULL,
+    tag_id  INTEGER NOT NULL,
+    usable  INTEGER NOT NULL,  -- has usable entries
+    PRIMARY KEY (cik, tag_id)
+) WITHOUT ROWID;
+
+-- Generated from xbrl_tags / parser.UNIT_PRIORITY by sync_tag_map
+CREATE TABLE IF NOT EXISTS tag_map (
     tag             TEXT NOT NULL,
     canonical_name  TEXT NOT NULL,
     statement       TEXT NOT NULL,
-    value           REAL NOT NULL,
-    unit            TEXT NOT NULL,
-    period_end      TEXT NOT NULL,
-    fiscal_year     INTEGER NOT NULL,
-    fiscal_period   TEXT NOT NULL,
-    form            TEXT NOT NULL,
-    filed           TEXT NOT NULL,
-    accession       TEXT NOT NULL,
-    FOREIGN KEY (cik) REFERENCES companies(cik)
+    priority        INTEGER NOT NULL,  -- 0 = preferred tag for the metric
+    PRIMARY KEY (canonical_name, tag)
 );
 
-CREATE UNIQUE INDEX IF NOT EXISTS idx_facts_dedup
-    ON facts (cik, canonical_name, period_end, fiscal_period, form);
+CREATE INDEX IF NOT EXISTS idx_tag_map_tag ON tag_map (tag);
 
-CREATE INDEX IF NOT EXISTS idx_facts_cik ON facts (cik);
-CREATE INDEX IF NOT EXISTS idx_facts_statement ON facts (cik, statement);
+CREATE TABLE IF NOT EXISTS unit_priority (
+    unit  TEXT PRIMARY KEY,
+    rank  INTEGER NOT NULL
+);
+
+-- Newest 10-K/10-Q seen in the submissions feed when the company was last synced
+CREATE TABLE IF NOT EXISTS submission_state (
+    cik        INTEGER PRIMARY KEY,
+    accession  TEXT NOT NULL,
+    filed      TEXT NOT NULL
+);
 """
 
 
+# Views hold no data, so _init_schema recreates any whose definition changed.
+# facts decodes fact_data to the v1 text columns; end_day is the stored
+# period_end, for ordering and ranges that follow the clustered key.
+_VIEWS = {
+    "facts": f"""CREATE VIEW facts AS
+SELECT f.cik, t.label AS tag, m.canonical_name, m.statement, f.value,
+       u.label AS unit, {_decode_day_sql("f.period_end")} AS period_end,
+       f.fiscal_year, p.label AS fiscal_period, o.label AS form,
+       {_decode_day_sql("f.filed")} AS filed, {_decode_accession_sql("f.accession")} AS accession,
+       f.period_end AS end_day
+FROM fact_data f
+JOIN canonical_metrics m ON m.id = f.canonical_id
+JOIN labels t ON t.id = f.tag_id
+JOIN labels u ON u.id = f.unit_id
+JOIN labels p ON p.id = f.fp_id
+JOIN labels o ON o.id = f.form_id""",
+    "frames": f"""CREATE VIEW frames AS
+SELECT r.cik, m.canonical_name, m.statement, r.ccp, r.value,
+       {_decode_day_sql("r.period_end")} AS period_end,
+       {_decode_accession_sql("r.accession")} AS accession
+FROM frame_facts r
+JOIN canonical_metrics m ON m.id = r.canonical_id""",
+}
+
+
 def connect_db(db_path: Path) -> sqlite3.Connection:
     db_path.parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(str(db_path))
@@ -68,8 +253,14 @@ def _init_schema(conn: sqlite3.Connection) -> None:
     cur = conn.execute(
         "SELECT name FROM sqlite_master WHERE type='table' AND name='metadata'"
     )
-    if cur.fetchone() is None:
-        conn.executescript(_SCHEMA_SQL)
+    is_new = cur.fetchone() is None
+    if not is_new:
+        _maybe_migrate(conn)
+    # Every statement is IF NOT EXISTS, so this also adds tables introduced
+    # after an existing database was created.
+    conn.executescript(_SCHEMA_SQL)
+    _sync_views(conn)
+    if is_new:
         conn.execute(
             "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
             ("schema_version", SCHEMA_VERSION),
@@ -77,7 +268,86 @@ def _init_schema(conn: sqlite3.Connection) -> None:
         conn.commit()
 
 
-def upsert_company(conn: sqlite3.Connection, company: Company) -> None:
+def _sync_views(conn: sqlite3.Connection) -> None:
+    cur = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'view'")
+    existing = dict(cur.fetchall())
+    stale = [name for name, sql in _VIEWS.items() if existing.get(name) != sql]
+    if stale:
+        with conn:
+            for name in stale:
+                conn.execute(f"DROP VIEW IF EXISTS {name}")
+                conn.execute(_VIEWS[name])
+
+
+# fact_data columns in storage order
+_FACT_DATA_COLUMNS = """cik, canonical_id, period_end, fp_id, form_id, tag_id, unit_id,
+                       value, fiscal_year, filed, accession"""
+
+# Move v1 facts (renamed to facts_v1) into fact_data
+_MIGRATE_FACTS_SQL = f"""
+INSERT OR IGNORE INTO labels (label)
+    SELECT tag FROM facts_v1 UNION SELECT unit FROM facts_v1
+    UNION SELECT fiscal_period FROM facts_v1 UNION SELECT form FROM facts_v1;
+INSERT INTO canonical_metrics (canonical_name, statement)
+    SELECT canonical_name, MIN(statement) FROM facts_v1 GROUP BY canonical_name
+    ON CONFLICT(canonical_name) DO NOTHING;
+INSERT INTO fact_data ({_FACT_DATA_COLUMNS})
+    SELECT v.cik, m.id, {_encode_day_sql("v.period_end", keep_empty=True)},
+           p.id, o.id, t.id, u.id, v.value, v.fiscal_year,
+           {_encode_day_sql("v.filed")}, {_encode_accession_sql("v.accession")}
+    FROM facts_v1 v
+    JOIN canonical_metrics m ON m.canonical_name = v.canonical_name
+    JOIN labels t ON t.label = v.tag
+    JOIN labels u ON u.label = v.unit
+    JOIN labels p ON p.label = v.fiscal_period
+    JOIN labels o ON o.label = v.form
+    ORDER BY 1, 2, 3, 4, 5;
+DROP TABLE facts_v1;
+"""
+
+
+def _maybe_migrate(conn: sqlite3.Connection) -> None:
+    cur = conn.execute("SELECT value FROM metadata WHERE key = 'schema_version'")
+    row = cur.fetchone()
+    version = int(row[0]) if row else 1
+
+    if version < 2:
+        _migrate_v2(conn)
+
+
+def _migrate_v2(conn: sqlite3.Connection) -> None:
+    """Rewrite v1 ``facts`` (TEXT columns, rowid plus a unique index) as ``fact_data``.
+
+    Runs as one transaction, then vacuums so the file actually shrinks.
+    """
+    cur = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    tables = {row[0] for row in cur}
+    script = ["BEGIN;"]
+    if "raw_labels" in tables:
+        script.append("ALTER TABLE raw_labels RENAME TO labels;")
+    if "facts" in tables:
+        script.append("""
+            DROP INDEX IF EXISTS idx_facts_dedup;
+            DROP INDEX IF EXISTS idx_facts_cik;
+            DROP INDEX IF EXISTS idx_facts_statement;
+            ALTER TABLE facts RENAME TO facts_v1;""")
+    script.append(_SCHEMA_SQL)
+    if "facts" in tables:
+        script.append(_MIGRATE_FACTS_SQL)
+    script.append(
+        "INSERT OR REPLACE INTO metadata (key, value) VALUES ('schema_version', '2');"
+    )
+    script.append("COMMIT;")
+    try:
+        conn.executescript("\n".join(script))
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    conn.execute("VACUUM")
+
+
+def _upsert_company(conn: sqlite3.Connection, company: Company) -> None:
     conn.execute(
         """INSERT INTO companies (cik, name, ticker, sic, exchanges, last_downloaded)
            VALUES (?, ?, ?, ?, ?, ?)
@@ -91,42 +361,681 @@ def upsert_company(conn: sqlite3.Connection, company: Company) -> None:
         (company.cik, company.name, company.ticker, company.sic,
          company.exchanges, company.last_downloaded),
     )
+
+
+def upsert_company(conn: sqlite3.Connection, company: Company) -> None:
+    _upsert_company(conn, company)
     conn.commit()
 
 
-def upsert_facts(conn: sqlite3.Connection, facts: list[FactRow]) -> int:
+def insert_missing_companies(conn: sqlite3.Connection, names: dict[int, str]) -> int:
+    """Add placeholder company rows for unknown CIKs. Does not commit.
+
+    Existing companies are left as they are. New rows take a ticker from
+    ticker_map when one is known and stay never-downloaded, so a later
+    ``download`` still fetches their full companyfacts.
+    """
+    before = conn.total_changes
+    conn.executemany(
+        """INSERT INTO companies (cik, name, ticker)
+           VALUES (?, ?, COALESCE((SELECT MIN(ticker) FROM ticker_map WHERE cik = ?), ''))
+           ON CONFLICT(cik) DO NOTHING""",
+        [(cik, name, cik) for cik, name in names.items()],
+    )
+    return conn.total_changes - before
+
+
+def touch_company(conn: sqlite3.Connection, cik: int, last_downloaded: str) -> None:
+    """Mark a company as checked without rewriting its data."""
+    touch_companies(conn, [cik], last_downloaded)
+
+
+def touch_companies(
+    conn: sqlite3.Connection, ciks: Iterable[int], last_downloaded: str
+) -> None:
+    conn.executemany(
+        "UPDATE companies SET last_downloaded = ? WHERE cik = ?",
+        [(last_downloaded, cik) for cik in ciks],
+    )
+    conn.commit()
+
+
+def _fact_records(facts: list[FactRow] | FactBatch) -> Iterable[tuple[Any, ...]]:
+    if isinstance(facts, FactBatch):
+        return facts.records()
+    return (
+        (f.cik, f.tag, f.canonical_name, f.statement, f.value, f.unit, f.period_end,
+         f.fiscal_year, f.fiscal_period, f.form, f.filed, f.accession)
+        for f in facts
+    )
+
+
+@dataclass
+class UpsertCounts:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.updated
+
+    def __iadd__(self, other: UpsertCounts) -> UpsertCounts:
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        return self
+
+
+# Staging table for set-based fact writes, in fact_data's shape
+_ENCODED_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS facts_encoded (
+    cik           INTEGER NOT NULL,
+    canonical_id  INTEGER NOT NULL,
+    period_end    INTEGER NOT NULL,
+    fp_id         INTEGER NOT NULL,
+    form_id       INTEGER NOT NULL,
+    tag_id        INTEGER NOT NULL,
+    unit_id       INTEGER NOT NULL,
+    value         REAL NOT NULL,
+    fiscal_year   INTEGER NOT NULL,
+    filed         INTEGER,
+    accession     INTEGER,
+    PRIMARY KEY (cik, canonical_id, period_end, fp_id, form_id)
+) WITHOUT ROWID
+"""
+
+# A staged row "changes" an existing fact if any column the upsert rewrites differs
+_CHANGED_SQL = """(
+    f.value IS NOT s.value OR f.tag_id IS NOT s.tag_id OR f.unit_id IS NOT s.unit_id
+    OR f.filed IS NOT s.filed OR f.accession IS NOT s.accession
+)"""
+
+
+def _clear_encoded(conn: sqlite3.Connection) -> None:
+    conn.execute(_ENCODED_SQL)
+    conn.execute("DELETE FROM temp.facts_encoded")
+
+
+def _metric_ids(conn: sqlite3.Connection, statements: dict[str, str]) -> dict[str, int]:
+    """Ids for ``{canonical_name: statement}``, registering new metrics.
+
+    A metric keeps the statement it was first stored under.
+    """
+    conn.executemany(
+        """INSERT INTO canonical_metrics (canonical_name, statement) VALUES (?, ?)
+           ON CONFLICT(canonical_name) DO NOTHING""",
+        sorted(statements.items()),
+    )
+    cur = conn.execute(
+        """SELECT canonical_name, id FROM canonical_metrics
+           WHERE canonical_name IN (SELECT value FROM json_each(?))""",
+        (json.dumps(sorted(statements)),),
+    )
+    return dict(cur.fetchall())
+
+
+def _memoized(encode: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    # A company repeats a few hundred dates and accessions across its facts
+    cache: dict[Any, Any] = {}
+
+    def lookup(value: Any) -> Any:
+        try:
+            return cache[value]
+        except KeyError:
+            cache[value] = result = encode(value)
+            return result
+
+    return lookup
+
+
+def _stage_facts(conn: sqlite3.Connection, facts: list[FactRow] | FactBatch) -> None:
+    """Encode facts into temp.facts_encoded, registering new labels and metrics.
+
+    A repeated key keeps the last row, like running the upserts one by one would.
+    """
+    records = list(_fact_records(facts))
+    names = {label for r in records for label in (r[1], r[5], r[8], r[9])}
+    names.discard(None)  # left to fail the NOT NULL constraints below
+    labels = _label_ids(conn, names)
+    metrics = _metric_ids(conn, {r[2]: r[3] for r in records if r[2] is not None})
+    day = _memoized(encode_day)
+    end_day = _memoized(lambda text: encode_day(text) if text else text)
+    accession = _memoized(encode_accession)
+    _clear_encoded(conn)
+    conn.executemany(
+        f"""INSERT OR REPLACE INTO temp.facts_encoded ({_FACT_DATA_COLUMNS})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (
+            (cik, metrics.get(canonical_name), end_day(period_end),
+             labels.get(fp), labels.get(form), labels.get(tag), labels.get(unit),
+             value, fy, day(filed), accession(accn))
+            for cik, tag, canonical_name, _, value, unit, period_end, fy, fp, form,
+            filed, accn in records
+        ),
+    )
+
+
+def _merge_stage(
+    conn: sqlite3.Connection, touched: Iterable[int] = ()
+) -> UpsertCounts:
+    """Merge temp.facts_encoded into fact_data with one INSERT ... SELECT.
+
+    Rows whose stored values already match are left untouched, so an
+    unchanged refresh writes nothing to the table or its indexes.
+    Companies with a written row, plus ``touched``, are marked changed (see
+    ``_facts_changed``).
+    """
+    cur = conn.execute(
+        f"""SELECT
+               s.cik,
+               SUM(f.cik IS NULL),
+               SUM(f.cik IS NOT NULL AND {_CHANGED_SQL}),
+               COUNT(*)
+           FROM temp.facts_encoded s
+           LEFT JOIN fact_data f
+             ON f.cik = s.cik AND f.canonical_id = s.canonical_id
+            AND f.period_end = s.period_end AND f.fp_id = s.fp_id
+            AND f.form_id = s.form_id
+           GROUP BY s.cik"""
+    )
+    per_cik = cur.fetchall()
+    inserted = sum(row[1] for row in per_cik)
+    updated = sum(row[2] for row in per_cik)
+    total = sum(row[3] for row in per_cik)
+    written = {row[0] for row in per_cik if row[1] or row[2]}
+    conn.execute(
+        f"""INSERT INTO fact_data ({_FACT_DATA_COLUMNS})
+           SELECT {_FACT_DATA_COLUMNS}
+           FROM temp.facts_encoded WHERE true
+           ON CONFLICT(cik, canonical_id, period_end, fp_id, form_id)
+           DO UPDATE SET
+               value=excluded.value,
+               tag_id=excluded.tag_id,
+               unit_id=excluded.unit_id,
+               filed=excluded.filed,
+               accession=excluded.accession
+           WHERE (fact_data.value IS NOT excluded.value
+              OR fact_data.tag_id IS NOT excluded.tag_id
+              OR fact_data.unit_id IS NOT excluded.unit_id
+              OR fact_data.filed IS NOT excluded.filed
+              OR fact_data.accession IS NOT excluded.accession)
+        """
+    )
+    conn.execute("DELETE FROM temp.facts_encoded")
+    _facts_changed(conn, written.union(touched))
+    return UpsertCounts(inserted, updated, total - inserted - updated)
+
+
+def _facts_changed(conn: sqlite3.Connection, ciks: Iterable[int]) -> None:
+    """Bump the fact version of ``ciks`` and rebuild their materialized statements."""
+    ciks = sorted(set(ciks))
+    if not ciks:
+        return
+    conn.execute(
+        """INSERT INTO fact_versions (cik, version)
+           SELECT value, 1 FROM json_each(?) WHERE true
+           ON CONFLICT(cik) DO UPDATE SET version = version + 1""",
+        (json.dumps(ciks),),
+    )
+    refresh_statement_tables(conn, ciks)
+
+
+def fact_version(conn: sqlite3.Connection, cik: int) -> int:
+    """How many writes have changed the company's facts (0 if none recorded)."""
+    cur = conn.execute("SELECT version FROM fact_versions WHERE cik = ?", (cik,))
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def merge_facts(
+    conn: sqlite3.Connection, facts: list[FactRow] | FactBatch
+) -> UpsertCounts:
+    """Set-based upsert of facts. Does not commit; callers own the transaction."""
+    if not facts:
+        return UpsertCounts()
+    _stage_facts(conn, facts)
+    return _merge_stage(conn)
+
+
+# Facts of the company at a staged row's period end, ranked as the source of
+# its fiscal labels: the same metric first, then the earliest filed
+_FRAME_LABELS_SQL = """
+SELECT fp_id, fiscal_year, form_id, cik, canonical_id, period_end, old_fp_id, old_form_id
+FROM (
+    SELECT s.cik, s.canonical_id, s.period_end, s.fp_id AS old_fp_id,
+           s.form_id AS old_form_id, f.fp_id, f.fiscal_year, f.form_id,
+           ROW_NUMBER() OVER (
+               PARTITION BY s.cik, s.canonical_id, s.period_end, s.fp_id, s.form_id
+               ORDER BY f.canonical_id = s.canonical_id DESC, f.filed IS NULL, f.filed,
+                        f.fp_id
+           ) AS rank
+    FROM temp.facts_encoded s
+    JOIN fact_data f
+      ON f.cik = s.cik AND f.canonical_id IN (SELECT value FROM json_each(:metrics))
+     AND f.period_end = s.period_end AND (:instant OR f.form_id = s.form_id)
+)
+WHERE rank = 1
+"""
+
+
+def store_frame_values(
+    conn: sqlite3.Connection, facts: list[FactRow] | FactBatch, ccp: str
+) -> int:
+    """Keep every value of one frame in ``frame_facts`` under its calendar period.
+
+    This needs no fiscal context, so unlike ``merge_frame_facts`` it holds the
+    whole cross-section. Reloading a frame replaces values that changed.
+    Every CIK must have a companies row. Does not commit. Returns rows written.
+    """
     if not facts:
         return 0
-    inserted = 0
-    for fact in facts:
-        try:
-            conn.execute(
-                """INSERT INTO facts
-                   (cik, tag, canonical_name, statement, value, unit,
-                    period_end, fiscal_year, fiscal_period, form, filed, accession)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                   ON CONFLICT(cik, canonical_name, period_end, fiscal_period, form)
-                   DO UPDATE SET
-                       value=excluded.value,
-                       tag=excluded.tag,
-                       unit=excluded.unit,
-                       filed=excluded.filed,
-                       accession=excluded.accession
-                """,
-                (fact.cik, fact.tag, fact.canonical_name, fact.statement,
-                 fact.value, fact.unit, fact.period_end, fact.fiscal_year,
-                 fact.fiscal_period, fact.form, fact.filed, fact.accession),
-            )
-            inserted += 1
-        except sqlite3.IntegrityError:
-            pass
+    _stage_facts(conn, facts)
+    before = conn.total_changes
+    conn.execute(
+        """INSERT INTO frame_facts (canonical_id, ccp, cik, period_end, value, accession)
+           SELECT canonical_id, ?, cik, period_end, value, accession
+           FROM temp.facts_encoded WHERE true
+           ON CONFLICT(canonical_id, ccp, cik) DO UPDATE SET
+               period_end = excluded.period_end, value = excluded.value,
+               accession = excluded.accession
+           WHERE period_end IS NOT excluded.period_end OR value IS NOT excluded.value
+              OR accession IS NOT excluded.accession""",
+        (ccp.upper(),),
+    )
+    return conn.total_changes - before
+
+
+def merge_frame_facts(
+    conn: sqlite3.Connection, facts: list[FactRow] | FactBatch, instant: bool = False
+) -> tuple[UpsertCounts, int]:
+    """Fill gaps in stored facts from calendar-aligned frame values.
+
+    Frames carry no fiscal calendar, so the staged fiscal period and year are
+    only placeholders. Each value takes the fiscal labels (and, for
+    ``instant`` values, the form) of a fact the company already has at that
+    period end; values with no such fact stay calendar-only, in
+    ``frame_facts`` (see ``store_frame_values``). Existing facts are never
+    overwritten. Does not commit. Returns ``(counts, calendar_only)``.
+    """
+    if not facts:
+        return UpsertCounts(), 0
+    _stage_facts(conn, facts)
+    cur = conn.execute(
+        """SELECT id FROM canonical_metrics
+           WHERE statement IN (SELECT value FROM json_each(?))""",
+        (json.dumps(sorted(STATEMENT_TAGS)),),
+    )
+    params = {"metrics": json.dumps([row[0] for row in cur]), "instant": instant}
+    before = conn.total_changes
+    conn.execute(
+        """DELETE FROM temp.facts_encoded AS s WHERE NOT EXISTS (
+               SELECT 1 FROM fact_data f
+               WHERE f.cik = s.cik
+                 AND f.canonical_id IN (SELECT value FROM json_each(:metrics))
+                 AND f.period_end = s.period_end AND (:instant OR f.form_id = s.form_id))""",
+        params,
+    )
+    calendar_only = conn.total_changes - before
+    conn.executemany(
+        """UPDATE temp.facts_encoded SET fp_id = ?, fiscal_year = ?, form_id = ?
+           WHERE cik = ? AND canonical_id = ? AND period_end = ? AND fp_id = ?
+             AND form_id = ?""",
+        conn.execute(_FRAME_LABELS_SQL, params).fetchall(),
+    )
+    before = conn.total_changes
+    conn.execute(
+        """DELETE FROM temp.facts_encoded AS s WHERE EXISTS (
+               SELECT 1 FROM fact_data f
+               WHERE f.cik = s.cik AND f.canonical_id = s.canonical_id
+                 AND f.period_end = s.period_end AND f.fp_id = s.fp_id
+                 AND f.form_id = s.form_id)"""
+    )
+    kept = conn.total_changes - before
+    counts = _merge_stage(conn)
+    counts.unchanged += kept
+    return counts, calendar_only
+
+
+def upsert_facts(conn: sqlite3.Connection, facts: list[FactRow] | FactBatch) -> int:
+    """Upsert facts in one transaction. Returns rows inserted or updated."""
+    if not facts:
+        return 0
+    with conn:
+        counts = merge_facts(conn, facts)
+    return counts.written
+
+
+# Every stored column but cik: two rows are the same fact only if all match
+_FACT_COLUMNS_SQL = """canonical_id, period_end, fp_id, form_id, tag_id, unit_id,
+                      value, fiscal_year, filed, accession"""
+
+
+def rewrite_changed_metrics(
+    conn: sqlite3.Connection,
+    cik: int,
+    facts: list[FactRow] | FactBatch,
+    state: SyncState | None = None,
+) -> list[str]:
+    """Make a company's stored facts equal ``facts``, one canonical metric at a time.
+
+    A metric is rewritten (its rows deleted, then re-inserted) only when its
+    parsed rows differ from the stored ones in any column, or it exists on
+    just one side. Untouched metrics cost no writes. Does not commit.
+    Returns the canonical names that were rewritten.
+    """
+    _stage_facts(conn, facts)
+    cur = conn.execute(
+        f"""SELECT id, canonical_name FROM canonical_metrics WHERE id IN (
+                SELECT canonical_id FROM (
+                    SELECT {_FACT_COLUMNS_SQL} FROM temp.facts_encoded
+                    EXCEPT SELECT {_FACT_COLUMNS_SQL} FROM fact_data WHERE cik = :cik)
+                UNION
+                SELECT canonical_id FROM (
+                    SELECT {_FACT_COLUMNS_SQL} FROM fact_data WHERE cik = :cik
+                    EXCEPT SELECT {_FACT_COLUMNS_SQL} FROM temp.facts_encoded))
+            ORDER BY canonical_name""",
+        {"cik": cik},
+    )
+    rows = cur.fetchall()
+    if rows:
+        ids = json.dumps([row[0] for row in rows])
+        conn.execute(
+            """DELETE FROM fact_data
+               WHERE cik = ? AND canonical_id IN (SELECT value FROM json_each(?))""",
+            (cik, ids),
+        )
+        conn.execute(
+            f"""INSERT INTO fact_data (cik, {_FACT_COLUMNS_SQL})
+                SELECT cik, {_FACT_COLUMNS_SQL} FROM temp.facts_encoded
+                WHERE canonical_id IN (SELECT value FROM json_each(?))""",
+            (ids,),
+        )
+        _facts_changed(conn, [cik])
+    conn.execute("DELETE FROM temp.facts_encoded")
+    changed = [row[1] for row in rows]
+    if state is not None:
+        _upsert_sync_state(conn, state)
+    return changed
+
+
+def _label_ids(conn: sqlite3.Connection, labels: set[str]) -> dict[str, int]:
+    conn.executemany(
+        "INSERT OR IGNORE INTO labels (label) VALUES (?)", [(x,) for x in sorted(labels)]
+    )
+    cur = conn.execute(
+        "SELECT label, id FROM labels WHERE label IN (SELECT value FROM json_each(?))",
+        (json.dumps(sorted(labels)),),
+    )
+    return dict(cur.fetchall())
+
+
+def _form_list() -> str:
+    return ", ".join(f"'{form}'" for form in sorted(VALID_FORMS))
+
+
+# Flag, for one company, the entries the parser would keep for their tag:
+# in the best-ranked unit the tag reports, a periodic form with an end date,
+# fiscal year and value, and the first such entry (payload order) per
+# (end, fp, form). None of this depends on the tag mapping.
+_MARK_USABLE_SQL = f"""
+UPDATE raw_facts SET usable = 1
+WHERE cik = :cik AND (tag_id, unit_id, ord) IN (
+    WITH units AS (
+        SELECT l.id, p.rank FROM labels l JOIN unit_priority p ON p.unit = l.label
+    ),
+    best AS (
+        SELECT r.tag_id, MIN(u.rank) AS rank
+        FROM raw_facts r JOIN units u ON u.id = r.unit_id
+        WHERE r.cik = :cik
+        GROUP BY r.tag_id
+    )
+    SELECT r.tag_id, r.unit_id, MIN(r.ord)
+    FROM raw_facts r
+    JOIN units u ON u.id = r.unit_id
+    JOIN best b ON b.tag_id = r.tag_id AND b.rank = u.rank
+    WHERE r.cik = :cik
+      AND r.form_id IN (SELECT id FROM labels WHERE label IN ({_form_list()}))
+      AND r.end_day IS NOT NULL AND r.fy IS NOT NULL AND r.value IS NOT NULL
+    GROUP BY r.tag_id, r.unit_id, r.end_day, r.fp_id, r.form_id
+)
+"""
+
+
+def store_raw_facts(conn: sqlite3.Connection, cik: int, rows: list[RawFact]) -> int:
+    """Replace a company's ``raw_facts`` with ``rows``. Does not commit."""
+    labels = {label for row in rows for label in (row[0], row[1], row[8], row[9])}
+    labels.discard(None)
+    ids = _label_ids(conn, labels)
+    conn.execute("DELETE FROM raw_facts WHERE cik = ?", (cik,))
+    conn.execute("DELETE FROM raw_tags WHERE cik = ?", (cik,))
+    conn.executemany(
+        """INSERT INTO raw_facts
+           (cik, tag_id, unit_id, ord, start_day, end_day, value, accession,
+            fy, fp_id, form_id, filed_day)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (
+            (cik, ids[tag], ids[unit], ord_, start, end, value, accession,
+             fy, ids.get(fp), ids.get(form), filed)
+            for tag, unit, ord_, start, end, value, accession, fy, fp, form, filed in rows
+        ),
+    )
+    if not conn.execute("SELECT 1 FROM unit_priority LIMIT 1").fetchone():
+        sync_tag_map(conn)
+    conn.execute(_MARK_USABLE_SQL, {"cik": cik})
+    conn.execute(
+        """INSERT INTO raw_tags (cik, tag_id, usable)
+           SELECT cik, tag_id, MAX(usable) FROM raw_facts WHERE cik = ?
+           GROUP BY cik, tag_id""",
+        (cik,),
+    )
+    return len(rows)
+
+
+def sync_tag_map(conn: sqlite3.Connection) -> None:
+    """Regenerate ``tag_map`` and ``unit_priority`` from the Python mappings.
+
+    Changing ``UNIT_PRIORITY`` or ``VALID_FORMS`` changes which raw entries
+    are usable, which needs a reload (``edgar-db reparse --raw``).
+    """
+    conn.execute("DELETE FROM tag_map")
+    conn.executemany(
+        "INSERT INTO tag_map (tag, canonical_name, statement, priority) VALUES (?, ?, ?, ?)",
+        [
+            (tag, canonical_name, statement, priority)
+            for statement, metrics in STATEMENT_TAGS.items()
+            for canonical_name, tags in metrics.items()
+            for priority, tag in enumerate(tags)
+        ],
+    )
+    conn.execute("DELETE FROM unit_priority")
+    conn.executemany(
+        "INSERT INTO unit_priority (unit, rank) VALUES (?, ?)",
+        [(unit, rank) for rank, unit in enumerate(UNIT_PRIORITY)],
+    )
+    conn.execute(
+        """INSERT INTO canonical_metrics (canonical_name, statement)
+           SELECT canonical_name, MIN(statement) FROM tag_map GROUP BY canonical_name
+           ON CONFLICT(canonical_name) DO NOTHING"""
+    )
+
+
+# Canonical facts from the raw store: per (cik, metric) the lowest-priority
+# tag with usable entries wins, and its usable entries become the facts. The
+# window runs over raw_tags only; entries are then reached by primary key.
+# raw_facts shares labels and encodings with fact_data, so rows need no
+# decoding on the way.
+_DERIVE_SQL = """
+WITH choice AS (
+    SELECT p.cik, p.tag_id, m.canonical_name, m.priority,
+           MIN(m.priority) OVER (PARTITION BY p.cik, m.canonical_name) AS best
+    FROM raw_tags p
+    JOIN labels l ON l.id = p.tag_id
+    JOIN tag_map m ON m.tag = l.label
+    WHERE p.usable {cik_filter}
+)
+SELECT c.cik, cm.id, r.end_day, COALESCE(r.fp_id, :blank), r.form_id, c.tag_id,
+       r.unit_id, r.value, r.fy, r.filed_day, r.accession
+FROM choice c
+JOIN canonical_metrics cm ON cm.canonical_name = c.canonical_name
+JOIN raw_facts r ON r.cik = c.cik AND r.tag_id = c.tag_id
+WHERE c.priority = c.best AND r.usable
+"""
+
+
+def remap_raw_facts(
+    conn: sqlite3.Connection, ciks: Iterable[int] | None = None
+) -> tuple[UpsertCounts, int]:
+    """Re-derive ``facts`` from ``raw_facts`` under the current tag mapping.
+
+    One set-based pass for every company in the raw store (or just ``ciks``):
+    derived rows are merged like any other write, and stored facts the
+    mapping no longer produces are deleted. Commits. Returns
+    ``(counts, rows_deleted)``.
+    """
+    params: dict[str, Any] = {}
+    cik_filter = ""
+    if ciks is not None:
+        cik_filter = "AND p.cik IN (SELECT value FROM json_each(:ciks))"
+        params["ciks"] = json.dumps(list(ciks))
+    with conn:
+        sync_tag_map(conn)
+        params["blank"] = _label_ids(conn, {""})[""]
+        _clear_encoded(conn)
+        conn.execute(
+            f"INSERT INTO temp.facts_encoded ({_FACT_DATA_COLUMNS}) "
+            + _DERIVE_SQL.format(cik_filter=cik_filter),
+            params,
+        )
+        cur = conn.execute(
+            f"""DELETE FROM fact_data
+                WHERE cik IN (SELECT DISTINCT p.cik FROM raw_tags p WHERE true {cik_filter})
+                  AND NOT EXISTS (
+                      SELECT 1 FROM temp.facts_encoded s
+                      WHERE s.cik = fact_data.cik AND s.canonical_id = fact_data.canonical_id
+                        AND s.period_end = fact_data.period_end
+                        AND s.fp_id = fact_data.fp_id AND s.form_id = fact_data.form_id)
+                RETURNING cik""",
+            params,
+        )
+        deleted = [row[0] for row in cur]
+        removed = len(deleted)
+        counts = _merge_stage(conn, touched=deleted)
+    return counts, removed
+
+
+def get_sync_state(conn: sqlite3.Connection, cik: int) -> SyncState | None:
+    cur = conn.execute(
+        "SELECT cik, max_filed, max_accession, tag_plan FROM sync_state WHERE cik = ?",
+        (cik,),
+    )
+    row = cur.fetchone()
+    return SyncState(*row) if row else None
+
+
+def _upsert_sync_state(conn: sqlite3.Connection, state: SyncState) -> None:
+    conn.execute(
+        """INSERT OR REPLACE INTO sync_state (cik, max_filed, max_accession, tag_plan)
+           VALUES (?, ?, ?, ?)""",
+        (state.cik, state.max_filed, state.max_accession, state.tag_plan),
+    )
+
+
+def write_company_facts(
+    conn: sqlite3.Connection,
+    company: Company,
+    facts: list[FactRow] | FactBatch,
+    commit: bool = True,
+    state: SyncState | None = None,
+) -> UpsertCounts:
+    """Upsert a company row, its facts and its sync watermark atomically.
+
+    The writes run under a savepoint, so a failure leaves no partial company.
+    With ``commit=False`` the caller commits, e.g. once per batch of companies.
+    """
+    if not conn.in_transaction:
+        # A savepoint outside a transaction commits on release
+        conn.execute("BEGIN")
+    conn.execute("SAVEPOINT write_company_facts")
+    try:
+        _upsert_company(conn, company)
+        counts = merge_facts(conn, facts)
+        if state is not None:
+            _upsert_sync_state(conn, state)
+    except BaseException:
+        conn.execute("ROLLBACK TO write_company_facts")
+        conn.execute("RELEASE write_company_facts")
+        raise
+    conn.execute("RELEASE write_company_facts")
+    if commit:
+        conn.commit()
+    return counts
+
+
+def synced_ciks(conn: sqlite3.Connection, ciks: Iterable[int]) -> set[int]:
+    """The CIKs among ``ciks`` whose companyfacts this database has stored.
+
+    Every companyfacts write records a sync watermark, so these are the
+    companies a ``304 Not Modified`` proves current. The response cache is
+    shared by every database, so for any other CIK a 304 proves nothing.
+    """
+    cur = conn.execute(
+        "SELECT cik FROM sync_state WHERE cik IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(ciks)),),
+    )
+    return {row[0] for row in cur}
+
+
+def filing_watermarks(
+    conn: sqlite3.Connection, ciks: Iterable[int]
+) -> dict[int, tuple[str, str, str]]:
+    """``{cik: (max_filed, max_accession, seen_accession)}`` in one query.
+
+    CIKs with neither a sync watermark nor a recorded submission are omitted.
+    """
+    cur = conn.execute(
+        """SELECT j.value, COALESCE(s.max_filed, ''), COALESCE(s.max_accession, ''),
+                  COALESCE(f.accession, '')
+           FROM json_each(?) j
+           LEFT JOIN sync_state s ON s.cik = j.value
+           LEFT JOIN submission_state f ON f.cik = j.value
+           WHERE s.cik IS NOT NULL OR f.cik IS NOT NULL""",
+        (json.dumps(list(ciks)),),
+    )
+    return {cik: (filed, accession, seen) for cik, filed, accession, seen in cur}
+
+
+def record_submissions(
+    conn: sqlite3.Connection, filings: dict[int, tuple[str, str]]
+) -> None:
+    """Remember the newest periodic filing ``{cik: (accession, filed)}`` per synced CIK."""
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO submission_state (cik, accession, filed) VALUES (?, ?, ?)",
+            [(cik, accession, filed) for cik, (accession, filed) in filings.items()],
+        )
+
+
+def get_metadata(conn: sqlite3.Connection, key: str) -> str | None:
+    cur = conn.execute("SELECT value FROM metadata WHERE key = ?", (key,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def set_metadata(conn: sqlite3.Connection, values: dict[str, str]) -> None:
+    conn.executemany(
+        "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+        list(values.items()),
+    )
     conn.commit()
-    return inserted
 
 
 def upsert_ticker_map(conn: sqlite3.Connection, mappings: dict[str, int]) -> None:
+    # Only rows whose CIK changed are rewritten
     conn.executemany(
-        "INSERT OR REPLACE INTO ticker_map (ticker, cik) VALUES (?, ?)",
+        """INSERT INTO ticker_map (ticker, cik) VALUES (?, ?)
+           ON CONFLICT(ticker) DO UPDATE SET cik=excluded.cik
+           WHERE ticker_map.cik IS NOT excluded.cik""",
         [(ticker, cik) for ticker, cik in mappings.items()],
     )
     conn.commit()
@@ -140,13 +1049,31 @@ def resolve_cik(conn: sqlite3.Connection, ticker: str) -> int | None:
     return row[0] if row else None
 
 
+def ticker_freshness(
+    conn: sqlite3.Connection, tickers: Iterable[str]
+) -> dict[str, tuple[int, str]]:
+    """Resolve tickers and read their last download time in one query.
+
+    Returns ``{TICKER: (cik, last_downloaded)}`` for known tickers;
+    ``last_downloaded`` is ``""`` for companies never downloaded.
+    """
+    cur = conn.execute(
+        """SELECT t.ticker, t.cik, COALESCE(c.last_downloaded, '')
+           FROM json_each(?) j
+           JOIN ticker_map t ON t.ticker = j.value
+           LEFT JOIN companies c ON c.cik = t.cik""",
+        (json.dumps([t.upper() for t in tickers]),),
+    )
+    return {ticker.upper(): (cik, last) for ticker, cik, last in cur}
+
+
 def query_facts_df(
     conn: sqlite3.Connection,
     cik: int,
     statement: str | None = None,
     period: str = "annual",
 ) -> pd.DataFrame:
-    sql = "SELECT * FROM facts WHERE cik = ?"
+    sql = f"SELECT {', '.join(FACT_COLUMNS)} FROM facts WHERE cik = ?"
     params: list[Any] = [cik]
 
     if statement:
@@ -158,18 +1085,199 @@ def query_facts_df(
     elif period == "quarterly":
         sql += " AND form = '10-Q'"
 
-    sql += " ORDER BY period_end DESC, canonical_name"
+    sql += " ORDER BY end_day DESC, canonical_name"
     return pd.read_sql_query(sql, conn, params=params)
 
 
+_PERIOD_FORMS = {"annual": "10-K", "quarterly": "10-Q"}
+
+
+def statement_cells(
+    conn: sqlite3.Connection, cik: int, statement: str, period: str = "annual"
+) -> tuple[dict[int, str], list[tuple[Any, ...]]]:
+    """One company's ``statement`` facts, undecoded, for pivoting.
+
+    Returns ``({canonical_id: canonical_name}, rows)`` with rows of
+    ``(period_end, fiscal_year, fiscal_period, canonical_id, value)`` in
+    ``fact_data`` key order; ``period_end`` is the stored day number.
+    """
+    metrics = dict(conn.execute(
+        "SELECT id, canonical_name FROM canonical_metrics WHERE statement = ?", (statement,)
+    ).fetchall())
+    if not metrics:
+        return metrics, []
+    sql = """SELECT f.period_end, f.fiscal_year, p.label, f.canonical_id, f.value
+             FROM fact_data f
+             JOIN labels p ON p.id = f.fp_id
+             WHERE f.cik = ? AND f.canonical_id IN (SELECT value FROM json_each(?))"""
+    params: list[Any] = [cik, json.dumps(sorted(metrics))]
+    if period in _PERIOD_FORMS:
+        sql += " AND f.form_id = (SELECT id FROM labels WHERE label = ?)"
+        params.append(_PERIOD_FORMS[period])
+    return metrics, conn.execute(sql, params).fetchall()
+
+
+# Optional materialized statements: {statement}_wide holds one row per
+# (company, form, period end, fiscal year, fiscal period) and one REAL column
+# per canonical metric of the statement, clustered so an annual or quarterly
+# statement is one key range already in display order. Created by
+# materialize_statements; every fact write rebuilds the rows of the
+# companies it changed.
+_WIDE_TABLE_SQL = """CREATE TABLE IF NOT EXISTS {table} (
+    cik            INTEGER NOT NULL,
+    form           TEXT NOT NULL,
+    period_end     TEXT NOT NULL,
+    fiscal_year    INTEGER NOT NULL,
+    fiscal_period  TEXT NOT NULL,
+    PRIMARY KEY (cik, form, period_end DESC, fiscal_year, fiscal_period)
+) WITHOUT ROWID"""
+
+_WIDE_KEY_COLUMNS = 5
+
+
+def _wide_table(statement: str) -> str:
+    return f"{statement}_wide"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _wide_statements(conn: sqlite3.Connection) -> list[str]:
+    """Statements whose wide table exists."""
+    tables = {_wide_table(statement): statement for statement in STATEMENT_TAGS}
+    cur = conn.execute(
+        """SELECT name FROM sqlite_master
+           WHERE type = 'table' AND name IN (SELECT value FROM json_each(?))""",
+        (json.dumps(sorted(tables)),),
+    )
+    return [tables[row[0]] for row in cur]
+
+
+def _wide_metrics(conn: sqlite3.Connection, statement: str) -> dict[int, str]:
+    """The statement's ``{canonical_id: canonical_name}``, adding missing columns."""
+    table = _wide_table(statement)
+    metrics = dict(conn.execute(
+        "SELECT id, canonical_name FROM canonical_metrics WHERE statement = ?", (statement,)
+    ).fetchall())
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name in sorted(set(metrics.values()) - columns):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {_quote(name)} REAL")
+    return metrics
+
+
+def refresh_statement_tables(
+    conn: sqlite3.Connection, ciks: Iterable[int] | None = None
+) -> None:
+    """Rebuild the materialized statement rows of ``ciks`` (None: every company).
+
+    A no-op when no wide table exists. Does not commit.
+    """
+    if ciks is not None:
+        ciks = sorted(set(ciks))
+        if not ciks:
+            return
+    for statement in _wide_statements(conn):
+        table = _wide_table(statement)
+        metrics = _wide_metrics(conn, statement)
+        params: list[Any] = []
+        cik_filter = ""
+        if ciks is not None:
+            cik_filter = "AND f.cik IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(ciks))
+            conn.execute(
+                f"DELETE FROM {table} WHERE cik IN (SELECT value FROM json_each(?))",
+                (json.dumps(ciks),),
+            )
+        else:
+            conn.execute(f"DELETE FROM {table}")
+        if not metrics:
+            continue
+        columns = ", ".join(_quote(name) for name in metrics.values())
+        # (cik, metric, period end, fiscal period, form) is the fact_data key,
+        # so each group has at most one value per metric
+        cells = ", ".join(
+            f"MAX(f.value) FILTER (WHERE f.canonical_id = {int(i)})" for i in metrics
+        )
+        params.append(json.dumps(sorted(metrics)))
+        conn.execute(
+            f"""INSERT INTO {table}
+                    (cik, form, period_end, fiscal_year, fiscal_period, {columns})
+                SELECT f.cik, o.label, {_decode_day_sql("f.period_end")},
+                       f.fiscal_year, p.label, {cells}
+                FROM fact_data f
+                JOIN labels o ON o.id = f.form_id
+                JOIN labels p ON p.id = f.fp_id
+                WHERE true {cik_filter}
+                  AND f.canonical_id IN (SELECT value FROM json_each(?))
+                GROUP BY f.cik, f.form_id, f.period_end, f.fiscal_year, f.fp_id""",
+            params,
+        )
+
+
+def materialize_statements(conn: sqlite3.Connection) -> dict[str, int]:
+    """Create and fill the wide statement tables. Commits.
+
+    From then on every fact write keeps them current. Returns the row count
+    per statement.
+    """
+    with conn:
+        for statement in STATEMENT_TAGS:
+            conn.execute(_WIDE_TABLE_SQL.format(table=_wide_table(statement)))
+        refresh_statement_tables(conn)
+    return {
+        statement: conn.execute(f"SELECT COUNT(*) FROM {_wide_table(statement)}").fetchone()[0]
+        for statement in STATEMENT_TAGS
+    }
+
+
+def drop_statement_tables(conn: sqlite3.Connection) -> None:
+    """Drop the wide statement tables; statements are pivoted from facts again."""
+    with conn:
+        for statement in STATEMENT_TAGS:
+            conn.execute(f"DROP TABLE IF EXISTS {_wide_table(statement)}")
+
+
+def wide_statement_rows(
+    conn: sqlite3.Connection, cik: int, statement: str, period: str = "annual"
+) -> tuple[list[str], list[tuple[Any, ...]]] | None:
+    """One company's materialized ``statement``, or None if it is not materialized.
+
+    Only ``annual`` and ``quarterly`` are served (``all`` merges forms).
+    Returns ``(metric names, rows)`` with rows of ``(fiscal_year,
+    fiscal_period, period_end, *values)`` in statement order: period end
+    descending, then fiscal year and fiscal period.
+    """
+    if period not in _PERIOD_FORMS or statement not in STATEMENT_TAGS:
+        return None
+    # Probing by reading keeps the hot path to this one statement
+    try:
+        cur = conn.execute(
+            f"""SELECT * FROM {_wide_table(statement)} WHERE cik = ? AND form = ?
+                ORDER BY period_end DESC, fiscal_year, fiscal_period""",
+            (cik, _PERIOD_FORMS[period]),
+        )
+    except sqlite3.OperationalError as exc:
+        if "no such table" in str(exc):
+            return None
+        raise
+    names = [d[0] for d in cur.description][_WIDE_KEY_COLUMNS:]
+    rows = [(row[3], row[4], row[2], *row[_WIDE_KEY_COLUMNS:]) for row in cur]
+    return names, rows
+
+
 def get_db_stats(conn: sqlite3.Connection) -> dict[str, Any]:
     stats: dict[str, Any] = {}
     cur = conn.execute("SELECT COUNT(*) FROM companies")
     stats["companies"] = cur.fetchone()[0]
-    cur = conn.execute("SELECT COUNT(*) FROM facts")
+    cur = conn.execute("SELECT COUNT(*) FROM fact_data")
     stats["facts"] = cur.fetchone()[0]
     cur = conn.execute("SELECT COUNT(*) FROM ticker_map")
     stats["tickers"] = cur.fetchone()[0]
-    cur = conn.execute("SELECT COUNT(DISTINCT statement) FROM facts")
+    cur = conn.execute(
+        """SELECT COUNT(DISTINCT m.statement)
+           FROM (SELECT DISTINCT canonical_id FROM fact_data) f
+           JOIN canonical_metrics m ON m.id = f.canonical_id"""
+    )
     stats["statements"] = cur.fetchone()[0]
     return stats
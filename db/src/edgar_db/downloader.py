@@ -2,20 +2,34 @@
 
 from __future__ import annotations
 
+import asyncio
 import sqlite3
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Callable
+from typing import Any, Callable, Iterable, Mapping
 
-from .client import EdgarClient
-from .config import Config
-from .db import connect_db, resolve_cik, upsert_company, upsert_facts, upsert_ticker_map
-from .models import Company
-from .parser import parse_company_facts
+from .cache import CacheEntry
+from .client import AsyncEdgarClient, EdgarClient
+from .db import (
+    connect_db,
+    get_metadata,
+    get_sync_state,
+    record_submissions,
+    resolve_cik,
+    set_metadata,
+    synced_ciks,
+    ticker_freshness,
+    touch_companies,
+    touch_company,
+    upsert_ticker_map,
+    write_company_facts,
+)
+from .jobs import JobJournal
+from .models import Company, FactBatch, SyncState
+from .parser import parse_company_facts_batch
 
 
-def _build_ticker_map(client: EdgarClient) -> dict[str, int]:
-    """Fetch SEC company_tickers.json and return {TICKER: cik}."""
-    data = client.get_company_tickers()
+def _ticker_map_from_json(data: dict[str, Any]) -> dict[str, int]:
     mapping: dict[str, int] = {}
     for entry in data.values():
         ticker = entry.get("ticker", "").upper()
@@ -25,61 +39,275 @@ def _build_ticker_map(client: EdgarClient) -> dict[str, int]:
     return mapping
 
 
+def _ticker_map_validators(conn: sqlite3.Connection) -> CacheEntry:
+    return CacheEntry(
+        etag=get_metadata(conn, "ticker_map_etag") or "",
+        last_modified=get_metadata(conn, "ticker_map_last_modified") or "",
+    )
+
+
+def _ticker_map_age(conn: sqlite3.Connection) -> float | None:
+    """Seconds since the ticker map was last fetched or revalidated."""
+    fetched_at = get_metadata(conn, "ticker_map_fetched_at")
+    if not fetched_at:
+        return None
+    return (datetime.now(timezone.utc) - datetime.fromisoformat(fetched_at)).total_seconds()
+
+
 def refresh_ticker_map(
-    conn: sqlite3.Connection, client: EdgarClient
-) -> dict[str, int]:
-    """Download and cache ticker→CIK map."""
-    mapping = _build_ticker_map(client)
+    conn: sqlite3.Connection, client: EdgarClient, conditional: bool = False
+) -> dict[str, int] | None:
+    """Download and cache ticker→CIK map.
+
+    With ``conditional`` the stored ETag / Last-Modified are sent and
+    ``None`` is returned if the map has not changed.
+    """
+    cached = _ticker_map_validators(conn) if conditional else None
+    data, entry = client.get_company_tickers_if_modified(cached)
+    now = datetime.now(timezone.utc).isoformat()
+    if data is None:
+        set_metadata(conn, {"ticker_map_fetched_at": now})
+        return None
+    mapping = _ticker_map_from_json(data)
     upsert_ticker_map(conn, mapping)
+    set_metadata(conn, {
+        "ticker_map_fetched_at": now,
+        "ticker_map_etag": entry.etag if entry else "",
+        "ticker_map_last_modified": entry.last_modified if entry else "",
+    })
     return mapping
 
 
+class TickerResolver:
+    """Ticker → CIK lookups for one batch, backed by the TTL-cached ticker map.
+
+    The stored map is revalidated once it is older than ``ttl`` seconds. A miss
+    refreshes the map at most once per resolver; tickers still unknown after
+    that are remembered, so repeated misses cost nothing.
+    """
+
+    def __init__(
+        self, conn: sqlite3.Connection, client: EdgarClient, ttl: float | None = None
+    ) -> None:
+        self._conn = conn
+        self._client = client
+        self._ttl = client.config.ticker_map_ttl if ttl is None else ttl
+        self._refreshed = False
+        self._unknown: set[str] = set()
+
+    def _refresh(self) -> None:
+        empty = self._conn.execute("SELECT 1 FROM ticker_map LIMIT 1").fetchone() is None
+        refresh_ticker_map(self._conn, self._client, conditional=not empty)
+        self._refreshed = True
+
+    def ensure_fresh(self) -> None:
+        """Revalidate the stored map if it is missing or older than the TTL."""
+        age = _ticker_map_age(self._conn)
+        if not self._refreshed and (age is None or age >= self._ttl):
+            self._refresh()
+
+    def freshness(self, tickers: Iterable[str]) -> dict[str, tuple[int, str]]:
+        """``{TICKER: (cik, last_downloaded)}`` for all known tickers, in one query.
+
+        Misses refresh the map once, like ``resolve``.
+        """
+        symbols = {t.upper() for t in tickers} - self._unknown
+        found = ticker_freshness(self._conn, symbols)
+        missing = symbols - found.keys()
+        if missing and not self._refreshed:
+            self._refresh()
+            found.update(ticker_freshness(self._conn, missing))
+            missing -= found.keys()
+        self._unknown |= missing
+        return found
+
+    def resolve(self, ticker: str) -> int | None:
+        ticker = ticker.upper()
+        if ticker in self._unknown:
+            return None
+        cik = resolve_cik(self._conn, ticker)
+        if cik is None and not self._refreshed:
+            self._refresh()
+            cik = resolve_cik(self._conn, ticker)
+        if cik is None:
+            self._unknown.add(ticker)
+        return cik
+
+
+def _is_recent(last_downloaded: str) -> bool:
+    """True if ``last_downloaded`` is within the last 24h."""
+    if not last_downloaded:
+        return False
+    age = datetime.now(timezone.utc) - datetime.fromisoformat(last_downloaded)
+    return age.total_seconds() < 86400
+
+
+def _is_fresh(conn: sqlite3.Connection, cik: int) -> bool:
+    """True if the company was downloaded within the last 24h."""
+    cur = conn.execute(
+        "SELECT last_downloaded FROM companies WHERE cik = ?", (cik,)
+    )
+    row = cur.fetchone()
+    return bool(row) and _is_recent(row[0])
+
+
+@dataclass
+class BatchPlan:
+    todo: list[tuple[str, int]]  # (ticker, cik) in download order
+    fresh: list[str]  # downloaded within 24h, skipped
+    unknown: list[str]  # not in the ticker map
+
+
+def plan_batch(
+    resolver: TickerResolver,
+    tickers: list[str],
+    force: bool = False,
+    priority: Mapping[str, float] | None = None,
+) -> BatchPlan:
+    """Split tickers into work, fresh and unknown with one freshness query.
+
+    Work is ordered stalest first (never-downloaded companies lead), or by
+    descending ``priority`` (e.g. market cap, keyed by ticker) when given,
+    so an interrupted run has refreshed what matters most. Tickers are
+    upper-cased and stripped, so ``aapl`` and ``AAPL`` are planned once.
+    """
+    tickers = [ticker.strip().upper() for ticker in tickers]
+    info = resolver.freshness(tickers)
+    plan = BatchPlan([], [], [])
+    stale: list[tuple[str, int, str]] = []
+    seen: set[str] = set()
+    for ticker in tickers:
+        if ticker in seen:
+            continue
+        seen.add(ticker)
+        hit = info.get(ticker)
+        if hit is None:
+            plan.unknown.append(ticker)
+        elif not force and _is_recent(hit[1]):
+            plan.fresh.append(ticker)
+        else:
+            stale.append((ticker, hit[0], hit[1]))
+
+    if priority is not None:
+        def key(item: tuple[str, int, str]) -> tuple[bool, float, str]:
+            value = priority.get(item[0])
+            return value is None, -(value or 0.0), item[2]
+    else:
+        def key(item: tuple[str, int, str]) -> tuple[bool, float, str]:
+            return False, 0.0, item[2]
+    plan.todo = [(ticker, cik) for ticker, cik, _ in sorted(stale, key=key)]
+    return plan
+
+
+@dataclass
+class DeltaStats:
+    parsed: int = 0
+    skipped: int = 0  # parsed rows not sent to the writer
+
+    def summary(self) -> str:
+        return f"delta skipped {self.skipped:,} of {self.parsed:,} parsed rows"
+
+
+def _delta_facts(
+    facts: FactBatch, previous: SyncState | None, current: SyncState
+) -> FactBatch:
+    """Rows that may differ from what the last sync wrote.
+
+    Parsed rows are compared after metric/tag selection, so a restatement of an
+    old period shows up as a row carrying its new filing date and is kept. Rows
+    filed on the watermark day itself are re-sent, since several filings can
+    share a date. If the tag chosen for any metric changed, old rows may carry
+    new values under old dates, so everything is written.
+    """
+    if previous is None or not previous.max_filed or previous.tag_plan != current.tag_plan:
+        return facts
+    watermark = previous.max_filed
+    return facts.take(i for i, filed in enumerate(facts.filed) if filed >= watermark)
+
+
+def store_company_facts(
+    conn: sqlite3.Connection,
+    cik: int,
+    ticker: str,
+    entity: str,
+    facts: FactBatch,
+    full: bool = False,
+    stats: DeltaStats | None = None,
+) -> int:
+    """Write the company row, its new facts and the sync watermark in one transaction.
+
+    Unless ``full`` is set, only rows newer than the CIK's watermark are
+    written. Returns the number of facts inserted or updated.
+    """
+    company = Company(
+        cik=cik,
+        name=entity or ticker,
+        ticker=ticker,
+        last_downloaded=datetime.now(timezone.utc).isoformat(),
+    )
+    state = SyncState.from_batch(cik, facts)
+    delta = facts if full else _delta_facts(facts, get_sync_state(conn, cik), state)
+    if stats is not None:
+        stats.parsed += len(facts)
+        stats.skipped += len(facts) - len(delta)
+    return write_company_facts(conn, company, delta, state=state).written
+
+
 def download_company(
     conn: sqlite3.Connection,
     client: EdgarClient,
     ticker: str,
     force: bool = False,
+    full: bool = False,
+    stats: DeltaStats | None = None,
+    resolver: TickerResolver | None = None,
 ) -> int:
-    """Download and store data for a single company. Returns number of facts stored."""
+    """Download and store data for a single company. Returns number of facts stored.
+
+    Refreshes only write rows filed since the last sync unless ``full`` is
+    set; ``stats`` accumulates how many parsed rows were skipped. Batches pass
+    a shared ``resolver`` so unknown tickers refresh the ticker map only once.
+    """
     ticker = ticker.upper()
 
-    # Resolve CIK
-    cik = resolve_cik(conn, ticker)
+    # Resolve CIK, refreshing the ticker map on a first miss
+    resolver = resolver or TickerResolver(conn, client)
+    cik = resolver.resolve(ticker)
     if cik is None:
-        # Try refreshing the ticker map
-        refresh_ticker_map(conn, client)
-        cik = resolve_cik(conn, ticker)
-        if cik is None:
-            raise ValueError(f"Unknown ticker: {ticker}")
+        raise ValueError(f"Unknown ticker: {ticker}")
 
     # Check if recently downloaded (within 24h) unless forced
-    if not force:
-        cur = conn.execute(
-            "SELECT last_downloaded FROM companies WHERE cik = ?", (cik,)
-        )
-        row = cur.fetchone()
-        if row and row[0]:
-            last = datetime.fromisoformat(row[0])
-            age = datetime.now(timezone.utc) - last
-            if age.total_seconds() < 86400:
-                return 0  # Already fresh
-
-    # Fetch company facts
-    data = client.get_company_facts(cik)
-
-    # Store company info
-    entity = data.get("entityName", ticker)
-    company = Company(
-        cik=cik,
-        name=entity,
-        ticker=ticker,
-        last_downloaded=datetime.now(timezone.utc).isoformat(),
-    )
-    upsert_company(conn, company)
+    if not force and _is_fresh(conn, cik):
+        return 0  # Already fresh
+    return _download_resolved(conn, client, ticker, cik, force, full, stats)
 
-    # Parse and store facts
-    facts = parse_company_facts(cik, data)
-    count = upsert_facts(conn, facts)
+
+def _download_resolved(
+    conn: sqlite3.Connection,
+    client: EdgarClient,
+    ticker: str,
+    cik: int,
+    force: bool,
+    full: bool,
+    stats: DeltaStats | None,
+) -> int:
+    """Fetch (conditionally, if a response cache is configured), parse and store.
+
+    The request is only conditional for a company this database has stored
+    (see ``synced_ciks``).
+    """
+    conditional = not force and bool(synced_ciks(conn, [cik]))
+    data, entry = client.get_company_facts_if_modified(cik, conditional=conditional)
+    if data is None:
+        # 304 Not Modified: stored facts are current, skip parse and upsert
+        touch_company(conn, cik, datetime.now(timezone.utc).isoformat())
+        return 0
+    facts = parse_company_facts_batch(cik, data)
+    count = store_company_facts(
+        conn, cik, ticker, data.get("entityName", ""), facts, full, stats
+    )
+    if client.cache is not None and entry is not None:
+        client.cache.store(cik, entry)
     return count
 
 
@@ -89,21 +317,187 @@ def download_batch(
     tickers: list[str],
     force: bool = False,
     progress_callback: Callable[[str, int, int], None] | None = None,
+    concurrency: int = 1,
+    full: bool = False,
+    workers: int = 1,
+    max_in_flight: int = 16,
+    priority: Mapping[str, float] | None = None,
+    job_id: int | None = None,
+    sync: bool = False,
 ) -> dict[str, int]:
-    """Download data for multiple tickers. Returns {ticker: fact_count}."""
-    # Ensure ticker map is loaded
-    refresh_ticker_map(conn, client)
+    """Download data for multiple tickers. Returns {ticker: fact_count}.
+
+    Fresh and unknown tickers are settled up front from one query; the rest
+    are downloaded in ``plan_batch`` order (stalest first, or by ``priority``).
+    With ``concurrency > 1`` the companyfacts requests run on an asyncio
+    client with that many requests in flight, all sharing one rate budget.
+    With ``workers > 1`` fetch, parse (in that many processes) and write run
+    as a pipeline holding at most ``max_in_flight`` companies at once.
+    ``full`` disables delta writes (see ``download_company``). With
+    ``job_id`` (from ``jobs.create_job``) per-ticker progress is journaled in
+    ``download_jobs`` so the run can be resumed.
+
+    With ``sync`` the 24-hour gate is replaced by filing detection: every
+    company's submissions feed is checked and only those with a 10-K/10-Q
+    newer than their last ingested filing are downloaded (see
+    ``submissions``). The rest are marked checked and count as up to date.
+    """
+    if concurrency > 1 and workers > 1:
+        raise ValueError("concurrency and workers cannot both be greater than 1")
+
+    # Ensure the ticker map is loaded and within its TTL
+    resolver = TickerResolver(conn, client)
+    resolver.ensure_fresh()
+    plan = plan_batch(resolver, tickers, force=force or sync, priority=priority)
+    sync_check = None
+    if sync:
+        from .submissions import check_filings
+
+        sync_check = check_filings(conn, client, plan.todo, concurrency=concurrency)
+        touch_companies(
+            conn, [cik for _, cik in sync_check.unchanged],
+            datetime.now(timezone.utc).isoformat(),
+        )
+        plan.fresh = [ticker for ticker, _ in sync_check.unchanged]
+        plan.todo = sync_check.changed
 
     results: dict[str, int] = {}
-    total = len(tickers)
-    for i, ticker in enumerate(tickers, 1):
+    total = len(plan.todo) + len(plan.fresh) + len(plan.unknown)
+    done = 0
+    journal = JobJournal(conn, job_id) if job_id is not None else None
+    for ticker in plan.unknown:
+        results[ticker] = -1  # Signal error
+        done += 1
+        error = f"Unknown ticker: {ticker.upper()}"
+        if journal:
+            journal.finish(ticker, error=error)
+        if progress_callback:
+            progress_callback(f"ERROR: {ticker}: {error}", done, total)
+    for ticker in plan.fresh:
+        results[ticker] = 0
+        if journal:
+            journal.finish(ticker, duration=0.0)
+    done += len(plan.fresh)
+    if progress_callback and plan.fresh:
+        progress_callback(f"{len(plan.fresh)} already up to date", done, total)
+
+    def progress(msg: str, current: int, _total: int) -> None:
         if progress_callback:
-            progress_callback(ticker, i, total)
+            progress_callback(msg, done + current, total)
+
+    stats = DeltaStats()
+    if workers > 1:
+        from .pipeline import download_pipelined
+
+        downloaded, pipeline_stats = download_pipelined(
+            conn, client, plan.todo, force=force, full=full, workers=workers,
+            max_in_flight=max_in_flight, progress_callback=progress, delta_stats=stats,
+            journal=journal,
+        )
+        if progress_callback:
+            progress_callback(f"STATS: {pipeline_stats.summary()}", total, total)
+    elif concurrency > 1:
+        downloaded = asyncio.run(_download_batch_async(
+            conn, client, plan.todo, force, concurrency, progress, full, stats, journal,
+        ))
+    else:
+        downloaded = {}
+        for i, (ticker, cik) in enumerate(plan.todo, 1):
+            progress(ticker, i, total)
+            if journal:
+                journal.start(ticker)
+            try:
+                downloaded[ticker] = _download_resolved(
+                    conn, client, ticker.upper(), cik, force, full, stats
+                )
+            except Exception as exc:
+                downloaded[ticker] = -1  # Signal error
+                if journal:
+                    journal.finish(ticker, error=str(exc))
+                progress(f"ERROR: {ticker}: {exc}", i, total)
+            else:
+                if journal:
+                    journal.finish(ticker)
+    results.update(downloaded)
+    if sync_check is not None:
+        record_submissions(conn, {
+            cik: sync_check.latest[cik]
+            for ticker, cik in sync_check.changed
+            if cik in sync_check.latest and results.get(ticker, -1) >= 0
+        })
+        if progress_callback:
+            progress_callback(f"STATS: {sync_check.summary()}", total, total)
+
+    if progress_callback and not full:
+        progress_callback(f"STATS: {stats.summary()}", total, total)
+    if progress_callback:
+        progress_callback(f"STATS: {client.limiter.metrics.summary()}", total, total)
+    if progress_callback and client.cache is not None:
+        progress_callback(f"STATS: {client.cache.stats.summary()}", total, total)
+    if progress_callback and client.archive is not None:
+        progress_callback(f"STATS: {client.archive.stats.summary()}", total, total)
+    return results
+
+
+async def _download_batch_async(
+    conn: sqlite3.Connection,
+    client: EdgarClient,
+    companies: list[tuple[str, int]],
+    force: bool,
+    concurrency: int,
+    progress_callback: Callable[[str, int, int], None] | None,
+    full: bool,
+    stats: DeltaStats,
+    journal: JobJournal | None = None,
+) -> dict[str, int]:
+    """Fetch with N requests in flight; parse off-loop; write on the loop thread.
+
+    The SQLite connection is only touched from the event-loop thread, between
+    awaits, so writes for one company overlap the network time of the others.
+    """
+    results: dict[str, int] = {}
+    total = len(companies)
+    done = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    synced = set() if force else synced_ciks(conn, [cik for _, cik in companies])
+
+    def report(msg: str) -> None:
+        if progress_callback:
+            progress_callback(msg, done, total)
+
+    async def run_one(aclient: AsyncEdgarClient, ticker: str, cik: int) -> None:
+        nonlocal done
         try:
-            count = download_company(conn, client, ticker, force=force)
+            async with semaphore:
+                if journal:
+                    journal.start(ticker)
+                data, entry = await aclient.get_company_facts_if_modified(
+                    cik, conditional=cik in synced
+                )
+            if data is None:
+                touch_company(conn, cik, datetime.now(timezone.utc).isoformat())
+                count = 0
+            else:
+                facts = await asyncio.to_thread(parse_company_facts_batch, cik, data)
+                count = store_company_facts(
+                    conn, cik, ticker.upper(), data.get("entityName", ""), facts, full, stats
+                )
+                if client.cache is not None and entry is not None:
+                    client.cache.store(cik, entry)
             results[ticker] = count
+            done += 1
+            if journal:
+                journal.finish(ticker)
+            report(ticker)
         except Exception as exc:
             results[ticker] = -1  # Signal error
-            if progress_callback:
-                progress_callback(f"ERROR: {ticker}: {exc}", i, total)
+            done += 1
+            if journal:
+                journal.finish(ticker, error=str(exc))
+            report(f"ERROR: {ticker}: {exc}")
+
+    async with AsyncEdgarClient(
+        client.config, cache=client.cache, limiter=client.limiter, archive=client.archive
+    ) as aclient:
+        await asyncio.gather(*(run_one(aclient, t, cik) for t, cik in companies))
     return results
@@ -0,0 +1,149 @@
+"""Cross-sectional loads from the XBRL frames API.
+
+A frame is one tag, in one unit, for one calendar period, across every filer
+(``/api/xbrl/frames/us-gaap/Revenues/USD/CY2023.json``). A single request
+therefore loads a metric for thousands of companies, which suits screens far
+better than one companyfacts download per company.
+
+Frames are calendar-aligned and carry no fiscal metadata. ``CY2023`` selects
+annual (``10-K``) values, ``CY2023Q2`` quarterly (``10-Q``) ones, and the ``I``
+suffix instants (``CY2023Q4I`` is the balance at calendar year end). Every
+value is kept in ``frame_facts`` under that calendar period, for screens
+(``EdgarQuery.screen``); filers not seen before get a placeholder companies
+row.
+
+For a filer whose fiscal year is not the calendar year, calendar quarters are
+not fiscal quarters (Apple's CY2023Q1 ends 2023-04-01, its fiscal Q2). So a
+value also fills a gap in ``facts`` only where the company already has a fact
+at that period end, whose fiscal period and year it adopts (for an instant,
+its form too). Facts already stored are never overwritten: frames do not
+replace companyfacts.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+from array import array
+from dataclasses import dataclass
+from typing import Any
+
+from .client import EdgarClient
+from .db import UpsertCounts, insert_missing_companies, merge_frame_facts, store_frame_values
+from .models import FactBatch
+from .xbrl_tags import TAG_LOOKUP
+
+_PERIOD_RE = re.compile(r"^CY(\d{4})(?:Q([1-4]))?(I)?$")
+
+
+@dataclass(frozen=True)
+class FramePeriod:
+    # Calendar placeholders until merge_frame_facts adopts the filer's labels
+    fiscal_year: int
+    fiscal_period: str  # FY, Q1..Q4
+    form: str  # 10-K or 10-Q
+    instant: bool
+
+
+def parse_frame_period(period: str) -> FramePeriod:
+    """Map a frames period (``CY2023``, ``CY2023Q2``, ``CY2023Q4I``) onto the facts key."""
+    m = _PERIOD_RE.match(period.upper())
+    if m is None or (m.group(3) and not m.group(2)):
+        raise ValueError(
+            f"Invalid frame period {period!r}; expected CYyyyy, CYyyyyQn or CYyyyyQnI"
+        )
+    year, quarter, instant = int(m.group(1)), m.group(2), bool(m.group(3))
+    if quarter is None or (instant and quarter == "4"):
+        return FramePeriod(year, "FY", "10-K", instant)
+    return FramePeriod(year, f"Q{quarter}", "10-Q", instant)
+
+
+@dataclass
+class FrameResult:
+    tag: str
+    period: str
+    companies: int = 0  # filers in the frame
+    new_companies: int = 0
+    stored: int = 0  # frame_facts rows written
+    calendar_only: int = 0  # values with no stored fact at their period end
+    counts: UpsertCounts | None = None  # gaps filled in facts
+
+    def summary(self) -> str:
+        counts = self.counts or UpsertCounts()
+        return (
+            f"{self.tag} {self.period}: {self.companies} companies "
+            f"({self.new_companies} new), {self.stored} values stored, "
+            f"{counts.inserted} facts filled, {self.calendar_only} calendar-only"
+        )
+
+
+def parse_frame(data: dict[str, Any]) -> tuple[FactBatch, dict[int, str]]:
+    """Convert a frames response into (facts, {cik: entityName})."""
+    tag = data.get("tag", "")
+    mapped = TAG_LOOKUP.get(tag)
+    if mapped is None:
+        raise ValueError(f"Tag {tag!r} is not mapped to a canonical metric")
+    canonical_name, statement = mapped
+    period = parse_frame_period(data.get("ccp", ""))
+    unit = data.get("uom", "").replace("-per-", "/")
+
+    names: dict[int, str] = {}
+    ciks: list[int] = []
+    values: list[float] = []
+    period_ends: list[str] = []
+    accessions: list[str] = []
+    for entry in data.get("data", []):
+        if entry.get("val") is None or not entry.get("end"):
+            continue
+        cik = int(entry["cik"])
+        names[cik] = entry.get("entityName", "")
+        ciks.append(cik)
+        values.append(float(entry["val"]))
+        period_ends.append(entry["end"])
+        accessions.append(entry.get("accn", ""))
+
+    n = len(ciks)
+    batch = FactBatch(
+        cik=array("q", ciks),
+        tag=[tag] * n,
+        canonical_name=[canonical_name] * n,
+        statement=[statement] * n,
+        value=array("d", values),
+        unit=[unit] * n,
+        period_end=period_ends,
+        fiscal_year=array("q", [period.fiscal_year]) * n,
+        fiscal_period=[period.fiscal_period] * n,
+        form=[period.form] * n,
+        filed=[""] * n,
+        accession=accessions,
+    )
+    return batch, names
+
+
+def store_frame(conn: sqlite3.Connection, data: dict[str, Any]) -> FrameResult:
+    """Store one frames response and fill gaps in ``facts``, in a single transaction."""
+    facts, names = parse_frame(data)
+    period = parse_frame_period(data.get("ccp", ""))
+    result = FrameResult(tag=data.get("tag", ""), period=data.get("ccp", ""))
+    result.companies = len(names)
+    with conn:
+        result.new_companies = insert_missing_companies(conn, names)
+        result.stored = store_frame_values(conn, facts, result.period)
+        result.counts, result.calendar_only = merge_frame_facts(
+            conn, facts, instant=period.instant
+        )
+    return result
+
+
+def download_frame(
+    conn: sqlite3.Connection,
+    client: EdgarClient,
+    tag: str,
+    unit: str,
+    period: str,
+) -> FrameResult:
+    """Fetch one frame and store it. One HTTP request for every filer."""
+    if tag not in TAG_LOOKUP:
+        raise ValueError(f"Tag {tag!r} is not mapped to a canonical metric")
+    parse_frame_period(period)  # fail before the request
+    return store_frame(conn, client.get_frame(tag, unit, period.upper()))
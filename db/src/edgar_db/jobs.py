@@ -0,0 +1,123 @@
+"""Persistent journal of batch download jobs, so interrupted runs can resume.
+
+Each ``download_jobs`` row is one ticker of one job and moves through
+``pending → running → done | failed``. Every transition is committed right
+away, so after a crash the journal shows exactly which tickers still need
+work and ``edgar-db download --resume JOB_ID`` picks up only those. The
+download flags a job started with are kept in ``download_job_options`` and
+reapplied on resume.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Anything not done is retried on resume, including rows left "running" by a crash
+UNFINISHED = (PENDING, RUNNING, FAILED)
+
+
+@dataclass(frozen=True)
+class JobOptions:
+    """Download flags that change what a job writes."""
+
+    force: bool = False
+    full: bool = False
+    sync: bool = False
+
+
+def create_job(
+    conn: sqlite3.Connection, tickers: list[str], options: JobOptions = JobOptions()
+) -> int:
+    """Record a new job with every ticker pending. Returns the job id."""
+    with conn:
+        job_id = conn.execute(
+            "SELECT COALESCE(MAX(job_id), 0) + 1 FROM download_jobs"
+        ).fetchone()[0]
+        now = datetime.now(timezone.utc).isoformat()
+        conn.executemany(
+            """INSERT OR IGNORE INTO download_jobs (job_id, ticker, state, updated_at)
+               VALUES (?, ?, ?, ?)""",
+            [(job_id, ticker.upper(), PENDING, now) for ticker in tickers],
+        )
+        conn.execute(
+            "INSERT INTO download_job_options (job_id, force, full, sync) VALUES (?, ?, ?, ?)",
+            (job_id, options.force, options.full, options.sync),
+        )
+    return job_id
+
+
+def job_options(conn: sqlite3.Connection, job_id: int) -> JobOptions | None:
+    """The flags a job was started with; None for jobs recorded before they were kept."""
+    row = conn.execute(
+        "SELECT force, full, sync FROM download_job_options WHERE job_id = ?", (job_id,)
+    ).fetchone()
+    return JobOptions(*map(bool, row)) if row else None
+
+
+def unfinished_tickers(conn: sqlite3.Connection, job_id: int) -> list[str]:
+    """Tickers of a job that are not done, in the order they were added."""
+    placeholders = ", ".join("?" * len(UNFINISHED))
+    cur = conn.execute(
+        f"""SELECT ticker FROM download_jobs
+            WHERE job_id = ? AND state IN ({placeholders})
+            ORDER BY rowid""",
+        (job_id, *UNFINISHED),
+    )
+    return [row[0] for row in cur]
+
+
+def job_exists(conn: sqlite3.Connection, job_id: int) -> bool:
+    cur = conn.execute("SELECT 1 FROM download_jobs WHERE job_id = ? LIMIT 1", (job_id,))
+    return cur.fetchone() is not None
+
+
+def job_summary(conn: sqlite3.Connection, job_id: int) -> dict[str, int]:
+    """{state: ticker count} for a job."""
+    cur = conn.execute(
+        "SELECT state, COUNT(*) FROM download_jobs WHERE job_id = ? GROUP BY state",
+        (job_id,),
+    )
+    return dict(cur.fetchall())
+
+
+class JobJournal:
+    """Records per-ticker progress of one job. Use from the writer thread only."""
+
+    def __init__(self, conn: sqlite3.Connection, job_id: int) -> None:
+        self._conn = conn
+        self.job_id = job_id
+        self._started: dict[str, float] = {}
+
+    def _update(self, ticker: str, sql: str, params: tuple) -> None:
+        with self._conn:
+            self._conn.execute(
+                f"UPDATE download_jobs SET {sql}, updated_at = ? WHERE job_id = ? AND ticker = ?",
+                (*params, datetime.now(timezone.utc).isoformat(), self.job_id, ticker.upper()),
+            )
+
+    def start(self, ticker: str) -> None:
+        self._started[ticker.upper()] = time.perf_counter()
+        self._update(ticker, "state = ?, attempts = attempts + 1", (RUNNING,))
+
+    def finish(self, ticker: str, error: str = "", duration: float | None = None) -> None:
+        """Mark a ticker done, or failed if ``error`` is set.
+
+        ``duration`` defaults to the time since ``start``; tickers finished
+        without a ``start`` (e.g. by the pipeline writer) count the attempt here.
+        """
+        started = self._started.pop(ticker.upper(), None)
+        if duration is None:
+            duration = time.perf_counter() - started if started is not None else 0.0
+        self._update(
+            ticker,
+            "state = ?, error = ?, duration = ?, attempts = attempts + ?",
+            (FAILED if error else DONE, error, duration, int(started is None)),
+        )
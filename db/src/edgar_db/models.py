@@ -1,10 +1,17 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+import sys
+from array import array
+from dataclasses import dataclass, field, fields
 from datetime import date
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-@dataclass
+
+@dataclass(slots=True)
 class FactRow:
     cik: int
     tag: str
@@ -20,6 +27,145 @@ class FactRow:
     accession: str
 
 
+FACT_COLUMNS: tuple[str, ...] = tuple(f.name for f in fields(FactRow))
+
+# Low-cardinality text columns: stored as interned strings so every row
+# shares one object per distinct value.
+_INTERNED_COLUMNS = ("tag", "canonical_name", "statement", "unit", "fiscal_period", "form")
+
+
+@dataclass
+class FactBatch:
+    """Columnar set of facts: one parallel array per FactRow field.
+
+    Numeric columns are ``array.array`` buffers (no per-row Python objects) and
+    low-cardinality strings are interned. ``to_pandas()`` / ``to_arrow()`` wrap
+    the numeric buffers without copying them.
+    """
+
+    cik: array = field(default_factory=lambda: array("q"))
+    tag: list[str] = field(default_factory=list)
+    canonical_name: list[str] = field(default_factory=list)
+    statement: list[str] = field(default_factory=list)
+    value: array = field(default_factory=lambda: array("d"))
+    unit: list[str] = field(default_factory=list)
+    period_end: list[str] = field(default_factory=list)
+    fiscal_year: array = field(default_factory=lambda: array("q"))
+    fiscal_period: list[str] = field(default_factory=list)
+    form: list[str] = field(default_factory=list)
+    filed: list[str] = field(default_factory=list)
+    accession: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[FactRow]) -> FactBatch:
+        batch = cls()
+        for row in rows:
+            batch.append(row)
+        return batch
+
+    def append(self, row: FactRow) -> None:
+        intern = sys.intern
+        self.cik.append(row.cik)
+        self.tag.append(intern(row.tag))
+        self.canonical_name.append(intern(row.canonical_name))
+        self.statement.append(intern(row.statement))
+        self.value.append(row.value)
+        self.unit.append(intern(row.unit))
+        self.period_end.append(row.period_end)
+        self.fiscal_year.append(row.fiscal_year)
+        self.fiscal_period.append(intern(row.fiscal_period))
+        self.form.append(intern(row.form))
+        self.filed.append(row.filed)
+        self.accession.append(row.accession)
+
+    def extend(self, other: FactBatch) -> None:
+        for name in FACT_COLUMNS:
+            getattr(self, name).extend(getattr(other, name))
+
+    def __len__(self) -> int:
+        return len(self.value)
+
+    def __iter__(self) -> Iterator[FactRow]:
+        for record in self.records():
+            yield FactRow(*record)
+
+    def records(self) -> Iterator[tuple[Any, ...]]:
+        """Row tuples in FACT_COLUMNS order, e.g. for ``executemany``."""
+        return zip(*(getattr(self, name) for name in FACT_COLUMNS))
+
+    def rows(self) -> list[FactRow]:
+        return list(self)
+
+    def take(self, indices: Iterable[int]) -> FactBatch:
+        """New batch holding the rows at ``indices``, in that order."""
+        indices = list(indices)
+        out = FactBatch()
+        for name in FACT_COLUMNS:
+            col = getattr(self, name)
+            picked = [col[i] for i in indices]
+            setattr(out, name, array(col.typecode, picked) if isinstance(col, array) else picked)
+        return out
+
+    def to_pandas(self) -> pd.DataFrame:
+        """DataFrame view; numeric columns share memory with the batch."""
+        import numpy as np
+        import pandas as pd
+
+        data: dict[str, Any] = {}
+        for name in FACT_COLUMNS:
+            col = getattr(self, name)
+            if isinstance(col, array):
+                dtype = np.float64 if col.typecode == "d" else np.int64
+                data[name] = np.frombuffer(col, dtype=dtype) if len(col) else np.empty(0, dtype)
+            elif name in _INTERNED_COLUMNS:
+                data[name] = pd.Categorical(col)
+            else:
+                data[name] = np.array(col, dtype=object)
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self) -> Any:
+        """pyarrow Table; numeric columns wrap the batch buffers without copying."""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError(
+                "pyarrow is required for FactBatch.to_arrow; install edgar-db[arrow]"
+            )
+
+        n = len(self)
+        arrays = []
+        for name in FACT_COLUMNS:
+            col = getattr(self, name)
+            if isinstance(col, array):
+                typ = pa.float64() if col.typecode == "d" else pa.int64()
+                arrays.append(pa.Array.from_buffers(typ, n, [None, pa.py_buffer(col)]))
+            elif name in _INTERNED_COLUMNS:
+                arrays.append(pa.array(col, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(col, type=pa.string()))
+        return pa.Table.from_arrays(arrays, names=list(FACT_COLUMNS))
+
+
+@dataclass
+class SyncState:
+    """Per-CIK watermark of the last facts written, used for delta refreshes."""
+
+    cik: int
+    max_filed: str = ""  # ISO date of the newest filing seen
+    max_accession: str = ""  # accession of that filing
+    tag_plan: str = ""  # digest of the tag chosen for each canonical metric
+
+    @classmethod
+    def from_batch(cls, cik: int, facts: FactBatch) -> SyncState:
+        max_filed = max(facts.filed, default="")
+        max_accession = max(
+            (a for f, a in zip(facts.filed, facts.accession) if f == max_filed), default=""
+        )
+        chosen = sorted(set(zip(facts.canonical_name, facts.tag)))
+        tag_plan = hashlib.sha1(repr(chosen).encode()).hexdigest()
+        return cls(cik, max_filed, max_accession, tag_plan)
+
+
 @dataclass
 class Company:
     cik: int
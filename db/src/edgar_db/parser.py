@@ -1,14 +1,156 @@
-"""Parse SEC EDGAR Company Facts JSON into FactRow lists."""
+"""Parse SEC EDGAR Company Facts JSON into FactBatch / FactRow lists."""
 
 from __future__ import annotations
 
+import json
+import re
+import sys
+from array import array
 from typing import Any
 
-from .models import FactRow
+from .dates import encode_day
+from .models import FactBatch, FactRow
 from .xbrl_tags import STATEMENT_TAGS
 
 # Forms we care about
 VALID_FORMS = {"10-K", "10-Q"}
+_FORMS = {sys.intern(form): sys.intern(form) for form in VALID_FORMS}
+
+# Pick the right unit: USD for monetary, USD/shares for per-share,
+# shares for share counts, pure for ratios
+UNIT_PRIORITY = ("USD", "USD/shares", "shares", "pure")
+
+# Dispatch plan compiled once from STATEMENT_TAGS:
+#   _METRICS[i] = (statement, canonical_name), in STATEMENT_TAGS order
+#   _TAG_PLAN[tag] = ((metric index, priority), ...) for every metric using tag
+_METRICS: list[tuple[str, str]] = []
+_TAG_PLAN: dict[str, tuple[tuple[int, int], ...]] = {}
+
+
+def _compile_plan() -> None:
+    plan: dict[str, list[tuple[int, int]]] = {}
+    for statement_name, metrics in STATEMENT_TAGS.items():
+        for canonical_name, tag_candidates in metrics.items():
+            index = len(_METRICS)
+            _METRICS.append((statement_name, canonical_name))
+            for priority, tag in enumerate(tag_candidates):
+                plan.setdefault(tag, []).append((index, priority))
+    _TAG_PLAN.update({tag: tuple(targets) for tag, targets in plan.items()})
+
+
+_compile_plan()
+
+
+def _valid_entries(tag_data: dict[str, Any]) -> tuple[str, list[dict[str, Any]]]:
+    """Return (unit, entries) usable for a tag, deduped on (end, fp, form).
+
+    Keeps the first entry per key, in document order. An empty list means the
+    tag has no usable data and the next candidate tag should be tried.
+    """
+    units = tag_data.get("units", {})
+    for unit_label in UNIT_PRIORITY:
+        if unit_label in units:
+            unit_data = units[unit_label]
+            break
+    else:
+        return "", []
+    if not unit_data:
+        return "", []
+
+    kept: list[dict[str, Any]] = []
+    seen: set[tuple[str, str, str]] = set()
+    for entry in unit_data:
+        form = entry.get("form", "")
+        if form not in VALID_FORMS:
+            continue
+        # Skip entries without end date (instant vs duration ambiguity)
+        period_end = entry.get("end")
+        if not period_end:
+            continue
+        if entry.get("fy") is None or entry.get("val") is None:
+            continue
+        key = (period_end, entry.get("fp", ""), form)
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(entry)
+    return unit_label, kept
+
+
+def parse_company_facts_batch(cik: int, data: dict[str, Any]) -> FactBatch:
+    """Parse Company Facts JSON into a columnar FactBatch.
+
+    Walks the us-gaap section once, routing each tag through the precompiled
+    plan. For each canonical metric the highest-priority tag with usable data
+    wins, exactly as the nested statement → metric → tag loop would choose.
+    Rows come out in STATEMENT_TAGS order, then document order.
+    """
+    us_gaap = data.get("facts", {}).get("us-gaap", {})
+
+    # metric index → {priority: tag} for the candidate tags this filer reports
+    candidates: dict[int, dict[int, str]] = {}
+    for tag in us_gaap:
+        targets = _TAG_PLAN.get(tag)
+        if targets is None:
+            continue
+        for index, priority in targets:
+            candidates.setdefault(index, {})[priority] = tag
+
+    # Accumulate into lists (cheapest append) and convert to arrays once
+    tags: list[str] = []
+    canonical_names: list[str] = []
+    statements: list[str] = []
+    units: list[str] = []
+    values: list[float] = []
+    period_ends: list[str] = []
+    fiscal_years: list[int] = []
+    fiscal_periods: list[str] = []
+    forms: list[str] = []
+    fileds: list[str] = []
+    accessions: list[str] = []
+    intern = sys.intern
+
+    evaluated: dict[str, tuple[str, list[dict[str, Any]]]] = {}
+    for index in sorted(candidates):
+        statement_name, canonical_name = _METRICS[index]
+        by_priority = candidates[index]
+        for priority in sorted(by_priority):
+            tag = by_priority[priority]
+            if tag not in evaluated:
+                evaluated[tag] = _valid_entries(us_gaap[tag])
+            unit_label, entries = evaluated[tag]
+            if not entries:
+                continue
+
+            n = len(entries)
+            tags.extend([intern(tag)] * n)
+            canonical_names.extend([canonical_name] * n)
+            statements.extend([statement_name] * n)
+            units.extend([unit_label] * n)
+            for entry in entries:
+                values.append(float(entry["val"]))
+                period_ends.append(entry["end"])
+                fiscal_years.append(int(entry["fy"]))
+                fiscal_periods.append(intern(entry.get("fp", "")))
+                forms.append(_FORMS[entry["form"]])
+                fileds.append(entry.get("filed", ""))
+                accessions.append(entry.get("accn", ""))
+            break
+
+    return FactBatch(
+        cik=array("q", [cik]) * len(values),
+        tag=tags,
+        canonical_name=canonical_names,
+        statement=statements,
+        value=array("d", values),
+        unit=units,
+        period_end=period_ends,
+        fiscal_year=array("q", fiscal_years),
+        fiscal_period=fiscal_periods,
+        form=forms,
+        filed=fileds,
+        accession=accessions,
+    )
 
 
 def parse_company_facts(cik: int, data: dict[str, Any]) -> list[FactRow]:
@@ -17,78 +159,64 @@ def parse_company_facts(cik: int, data: dict[str, Any]) -> list[FactRow]:
     Uses tag priority: for each canonical metric, try tags in order.
     Only the first matching tag's data is used per metric.
     """
-    facts_section = data.get("facts", {})
-    us_gaap = facts_section.get("us-gaap", {})
+    return parse_company_facts_batch(cik, data).rows()
 
-    rows: list[FactRow] = []
-    seen: set[tuple[str, str, str, str]] = set()  # dedup key
 
-    for statement_name, metrics in STATEMENT_TAGS.items():
-        for canonical_name, tag_candidates in metrics.items():
-            for tag in tag_candidates:
-                tag_data = us_gaap.get(tag)
-                if not tag_data:
-                    continue
-
-                units = tag_data.get("units", {})
-                # Pick the right unit: USD for monetary, USD/shares for per-share,
-                # shares for share counts, pure for ratios
-                unit_data = None
-                unit_label = ""
-                for unit_key in ["USD", "USD/shares", "shares", "pure"]:
-                    if unit_key in units:
-                        unit_data = units[unit_key]
-                        unit_label = unit_key
-                        break
-
-                if not unit_data:
-                    continue
-
-                tag_had_valid_data = False
-                for entry in unit_data:
-                    form = entry.get("form", "")
-                    if form not in VALID_FORMS:
-                        continue
-
-                    # Skip entries without end date (instant vs duration ambiguity)
-                    period_end = entry.get("end")
-                    if not period_end:
-                        continue
-
-                    fp = entry.get("fp", "")
-                    fy = entry.get("fy")
-                    if fy is None:
-                        continue
-
-                    # Dedup: same metric, period, fiscal_period, form
-                    dedup_key = (canonical_name, period_end, fp, form)
-                    if dedup_key in seen:
-                        continue
-
-                    val = entry.get("val")
-                    if val is None:
-                        continue
-
-                    seen.add(dedup_key)
-                    tag_had_valid_data = True
-
-                    rows.append(FactRow(
-                        cik=cik,
-                        tag=tag,
-                        canonical_name=canonical_name,
-                        statement=statement_name,
-                        value=float(val),
-                        unit=unit_label,
-                        period_end=period_end,
-                        fiscal_year=int(fy),
-                        fiscal_period=fp,
-                        form=form,
-                        filed=entry.get("filed", ""),
-                        accession=entry.get("accn", ""),
-                    ))
-
-                # If we found data for this tag, stop trying alternatives
-                if tag_had_valid_data:
-                    break
+def parse_company_facts_payload(cik: int, payload: bytes) -> tuple[str, FactBatch]:
+    """Decode a raw companyfacts body and parse it. Returns (entityName, batch).
 
+    Picklable entry point for parsing in worker processes.
+    """
+    data: dict[str, Any] = json.loads(payload)
+    return data.get("entityName", ""), parse_company_facts_batch(cik, data)
+
+
+# Raw-store encodings (see the raw_facts table): dates as days since the epoch
+# (dates.encode_day), accessions as their digits. Anything that does not fit
+# is kept as text.
+_ACCESSION_RE = re.compile(r"^(\d{10})-(\d{2})-(\d{6})$")
+
+# (tag, unit, ord, start_day, end_day, value, accession, fy, fp, form, filed_day)
+RawFact = tuple[str, str, int, Any, Any, Any, Any, Any, Any, Any, Any]
+
+
+def encode_accession(value: str | None) -> int | str | None:
+    """``0000320193-23-000106`` as the integer of its digits; other text as is."""
+    if not value:
+        return None
+    m = _ACCESSION_RE.match(value)
+    return int("".join(m.groups())) if m else value
+
+
+def encode_raw_facts(data: dict[str, Any]) -> list[RawFact]:
+    """Every us-gaap entry of a Company Facts payload, encoded for ``raw_facts``.
+
+    Unlike ``parse_company_facts_batch`` nothing is filtered or deduplicated,
+    so canonical facts can later be derived in SQL under any tag mapping.
+    """
+    rows: list[RawFact] = []
+    for tag, tag_data in data.get("facts", {}).get("us-gaap", {}).items():
+        for unit, entries in tag_data.get("units", {}).items():
+            for ord_, entry in enumerate(entries):
+                val = entry.get("val")
+                rows.append((
+                    tag, unit, ord_,
+                    encode_day(entry.get("start")),
+                    encode_day(entry.get("end")),
+                    float(val) if val is not None else None,
+                    encode_accession(entry.get("accn")),
+                    entry.get("fy"),
+                    entry.get("fp", ""),
+                    entry.get("form"),
+                    encode_day(entry.get("filed")),
+                ))
     return rows
+
+
+def encode_raw_payload(cik: int, payload: bytes) -> tuple[str, list[RawFact]]:
+    """Decode a raw companyfacts body and encode it. Returns (entityName, rows).
+
+    Picklable entry point for encoding in worker processes.
+    """
+    data: dict[str, Any] = json.loads(payload)
+    return data.get("entityName", ""), encode_raw_facts(data)
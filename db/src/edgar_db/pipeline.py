@@ -0,0 +1,204 @@
+"""Pipelined batch download: fetch, parse and write run as concurrent stages.
+
+::
+
+    fetch thread ──Queue──▶ parse submitter ──Queue──▶ writer (calling thread)
+    (rate limited)          (process pool)             (owns the SQLite conn)
+
+The fetch thread downloads raw companyfacts bodies through the shared
+``EdgarClient`` rate limit. Bodies are decoded and parsed in worker processes,
+so parsing is not serialized on the GIL. The calling thread is the single
+writer: sqlite3 connections belong to the thread that opened them, and one
+writer means no lock contention in SQLite.
+
+A semaphore taken before each fetch and released after the write caps the
+number of companies held anywhere in the pipeline at ``max_in_flight``; both
+queues are bounded by the same number.
+"""
+
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from .cache import CacheEntry
+from .client import EdgarClient
+from .db import synced_ciks, touch_company
+from .downloader import DeltaStats, store_company_facts
+from .jobs import JobJournal
+from .models import FactBatch
+from .parser import parse_company_facts_payload
+
+_DONE = object()  # end-of-stream marker passed down both queues
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    busy: float = 0.0  # seconds spent working, summed over workers
+
+    def summary(self) -> str:
+        rate = self.items / self.busy if self.busy else 0.0
+        return f"{self.name} {self.items} in {self.busy:.1f}s ({rate:.1f}/s)"
+
+
+@dataclass
+class PipelineStats:
+    fetch: StageStats = field(default_factory=lambda: StageStats("fetch"))
+    parse: StageStats = field(default_factory=lambda: StageStats("parse"))
+    write: StageStats = field(default_factory=lambda: StageStats("write"))
+    elapsed: float = 0.0
+
+    def summary(self) -> str:
+        stages = ", ".join(s.summary() for s in (self.fetch, self.parse, self.write))
+        return f"pipeline {stages}; {self.elapsed:.1f}s wall"
+
+
+@dataclass
+class _Job:
+    ticker: str
+    cik: int
+    payload: bytes | None = None  # None on 304 Not Modified
+    entry: CacheEntry | None = None
+    error: Exception | None = None
+    parsed: Future | None = None
+    started: float = 0.0  # perf_counter() when the fetch began
+
+
+def _timed_parse(cik: int, payload: bytes) -> tuple[str, FactBatch, float]:
+    """Worker entry point: parse a body and report how long it took."""
+    start = time.perf_counter()
+    entity, facts = parse_company_facts_payload(cik, payload)
+    return entity, facts, time.perf_counter() - start
+
+
+def download_pipelined(
+    conn: sqlite3.Connection,
+    client: EdgarClient,
+    companies: list[tuple[str, int]],
+    force: bool = False,
+    full: bool = False,
+    workers: int = 2,
+    max_in_flight: int = 16,
+    progress_callback: Callable[[str, int, int], None] | None = None,
+    delta_stats: DeltaStats | None = None,
+    journal: JobJournal | None = None,
+) -> tuple[dict[str, int], PipelineStats]:
+    """Download resolved ``(ticker, cik)`` pairs through the pipeline, in order.
+
+    Freshness is not checked here; ``download_batch`` plans the work. Returns
+    ``({ticker: fact_count}, stats)`` with the same result convention as
+    ``download_batch``.
+    """
+    results: dict[str, int] = {}
+    stats = PipelineStats()
+    total = len(companies)
+    done = 0
+    started = time.perf_counter()
+
+    def report(msg: str) -> None:
+        if progress_callback:
+            progress_callback(msg, done, total)
+
+    jobs = [_Job(ticker, cik) for ticker, cik in companies]
+    # Read up front: the fetch thread cannot use the connection
+    synced = set() if force else synced_ciks(conn, [job.cik for job in jobs])
+    slots = threading.Semaphore(max_in_flight)
+    fetched: queue.Queue[Any] = queue.Queue(maxsize=max_in_flight)
+    parsed: queue.Queue[Any] = queue.Queue(maxsize=max_in_flight)
+    stop = threading.Event()
+
+    def fetch_stage() -> None:
+        try:
+            for job in jobs:
+                slots.acquire()
+                if stop.is_set():
+                    return
+                start = job.started = time.perf_counter()
+                try:
+                    job.payload, job.entry = client.get_company_facts_raw(
+                        job.cik, conditional=job.cik in synced
+                    )
+                except Exception as exc:
+                    job.error = exc
+                stats.fetch.busy += time.perf_counter() - start
+                stats.fetch.items += 1
+                fetched.put(job)
+        finally:
+            fetched.put(_DONE)
+
+    def parse_stage(pool: ProcessPoolExecutor) -> None:
+        try:
+            while (job := fetched.get()) is not _DONE:
+                if job.payload is not None and not stop.is_set():
+                    job.parsed = pool.submit(_timed_parse, job.cik, job.payload)
+                    job.payload = None  # the worker has its own copy
+                parsed.put(job)
+        finally:
+            parsed.put(_DONE)
+
+    def write(job: _Job) -> int:
+        if job.error is not None:
+            raise job.error
+        if job.parsed is None:
+            # 304 Not Modified: stored facts are current
+            touch_company(conn, job.cik, datetime.now(timezone.utc).isoformat())
+            return 0
+        entity, facts, seconds = job.parsed.result()
+        stats.parse.items += 1
+        stats.parse.busy += seconds
+        start = time.perf_counter()
+        count = store_company_facts(
+            conn, job.cik, job.ticker.upper(), entity, facts, full, delta_stats
+        )
+        if client.cache is not None and job.entry is not None:
+            client.cache.store(job.cik, job.entry)
+        stats.write.items += 1
+        stats.write.busy += time.perf_counter() - start
+        return count
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        threads = [
+            threading.Thread(target=fetch_stage, name="edgar-fetch", daemon=True),
+            threading.Thread(target=parse_stage, args=(pool,), name="edgar-parse", daemon=True),
+        ]
+        for t in threads:
+            t.start()
+        drained = False
+        try:
+            while (job := parsed.get()) is not _DONE:
+                error = ""
+                try:
+                    results[job.ticker] = write(job)
+                    msg = job.ticker
+                except Exception as exc:
+                    results[job.ticker] = -1  # Signal error
+                    error = str(exc)
+                    msg = f"ERROR: {job.ticker}: {exc}"
+                if journal:
+                    journal.finish(
+                        job.ticker, error=error, duration=time.perf_counter() - job.started
+                    )
+                slots.release()
+                done += 1
+                report(msg)
+            drained = True
+        finally:
+            if not drained:
+                # Interrupted (e.g. Ctrl-C): unblock the upstream stages and let them exit
+                stop.set()
+                slots.release(max_in_flight)
+                while parsed.get() is not _DONE:
+                    pass
+            for t in threads:
+                t.join()
+
+    stats.elapsed = time.perf_counter() - started
+    return results, stats
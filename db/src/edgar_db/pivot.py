@@ -0,0 +1,20 @@
+"""Wide-table helpers shared by the EDGAR and Yahoo Finance query APIs."""
+
+from __future__ import annotations
+
+import pandas as pd
+
+
+def pivot_by_ticker(
+    df: pd.DataFrame, names: list[str], index: str, ascending: bool
+) -> pd.DataFrame:
+    """Pivot ``(pos, index, value)`` rows into one column per ticker.
+
+    ``pos`` indexes ``names``; columns keep that order. The first row of each
+    ``(pos, index)`` pair wins, so callers order duplicates deterministically.
+    """
+    df = df.drop_duplicates(["pos", index])
+    wide = df.pivot(index=index, columns="pos", values=df.columns[2])
+    wide = wide.sort_index(axis=1).sort_index(ascending=ascending)
+    wide.columns = [names[pos] for pos in wide.columns]
+    return wide
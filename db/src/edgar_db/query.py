@@ -2,24 +2,115 @@
 
 from __future__ import annotations
 
+import json
 import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Iterable
 
+import numpy as np
 import pandas as pd
 
-from .db import connect_db, query_facts_df, resolve_cik
+from .dates import day_range, decode_day
+from .db import connect_db, fact_version, resolve_cik, statement_cells, wide_statement_rows
+from .pivot import pivot_by_ticker
 from .xbrl_tags import STATEMENT_COLUMNS
 
 
+def _column_order(statement: str, names: Iterable[str]) -> list[str]:
+    """Metric columns in canonical order, then any extra metrics by name."""
+    present = set(names)
+    ordered = [n for n in STATEMENT_COLUMNS.get(statement, []) if n in present]
+    return ordered + sorted(present.difference(ordered))
+
+
+def _statement_frame(
+    fiscal_year: list[int],
+    fiscal_period: list[str],
+    period_end: list[str],
+    names: list[str],
+    grid: np.ndarray,
+) -> pd.DataFrame:
+    """A statement DataFrame from its period keys and (period, metric) grid.
+
+    Metrics with no value in any period are left out.
+    """
+    present = ~np.isnan(grid).all(axis=0)
+    columns: dict[str, object] = {
+        "fiscal_year": np.array(fiscal_year, dtype=np.int64),
+        "fiscal_period": fiscal_period,
+        "period_end": period_end,
+    }
+    for j in np.flatnonzero(present):
+        columns[names[j]] = grid[:, j]
+    pivot = pd.DataFrame(columns)
+    pivot.columns.name = "canonical_name"
+    return pivot
+
+
+def _wide_frame(statement: str, names: list[str], rows: list[tuple[Any, ...]]) -> pd.DataFrame:
+    """A statement DataFrame from materialized rows (see ``wide_statement_rows``)."""
+    if not rows:
+        return pd.DataFrame()
+    ordered = _column_order(statement, names)
+    index = {name: j for j, name in enumerate(names)}
+    grid = np.array([row[3:] for row in rows], dtype=float).reshape(len(rows), len(names))
+    fiscal_year, fiscal_period, period_end = (list(c) for c in zip(*(row[:3] for row in rows)))
+    return _statement_frame(
+        fiscal_year, fiscal_period, period_end, ordered,
+        grid[:, [index[name] for name in ordered]],
+    )
+
+
+@dataclass
+class StatementCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"statement cache {self.hits} hits, {self.misses} misses, "
+            f"{self.evictions} evictions"
+        )
+
+
+@dataclass
+class _CachedStatement:
+    cik: int
+    version: int  # the company's fact_version when the frame was built
+    stamp: tuple[int, int]  # database stamp it was last known current at
+    frame: pd.DataFrame
+
+
 class EdgarQuery:
-    """High-level query interface returning pandas DataFrames."""
+    """High-level query interface returning pandas DataFrames.
+
+    Statements are kept in an LRU cache of ``cache_size`` entries (0 turns it
+    off). An entry is reused while the database is unchanged, which one
+    ``PRAGMA data_version`` read establishes for commits on other connections
+    and ``total_changes`` for writes on this one. After any write it is
+    reused only if its ticker still maps to the same company and that
+    company's ``fact_version`` has not moved.
+    """
 
-    def __init__(self, conn: sqlite3.Connection) -> None:
+    def __init__(self, conn: sqlite3.Connection, cache_size: int = 128) -> None:
         self._conn = conn
+        self._cache_size = cache_size
+        self._cache: OrderedDict[tuple[str, str, str], _CachedStatement] = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_stats = StatementCacheStats()
 
     def close(self) -> None:
+        self.clear_cache()
         self._conn.close()
 
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
     def __enter__(self) -> EdgarQuery:
         return self
 
@@ -32,39 +123,91 @@ class EdgarQuery:
             raise ValueError(f"Unknown ticker: {ticker}. Try downloading first.")
         return cik
 
+    def _stamp(self) -> tuple[int, int]:
+        """Changes whenever another connection commits or this one writes."""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0], self._conn.total_changes
+
     def _pivot_statement(
         self, ticker: str, statement: str, period: str = "annual"
     ) -> pd.DataFrame:
+        """A statement-shaped DataFrame, from the cache when still current.
+
+        Returns a copy, so callers may modify it.
+        """
+        key = (ticker.upper(), statement, period)
+        stamp = self._stamp()
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is not None and entry.stamp != stamp:
+            cik = resolve_cik(self._conn, key[0])
+            if cik == entry.cik and fact_version(self._conn, cik) == entry.version:
+                entry.stamp = stamp
+            else:
+                entry = None
+        with self._lock:
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.cache_stats.hits += 1
+                return entry.frame.copy()
+            self.cache_stats.misses += 1
+
+        # The version is read before the statement: a write in between makes
+        # the entry look stale, never current
+        cik = self._resolve_cik(ticker)
+        version = fact_version(self._conn, cik)
+        frame = self._build_statement(cik, statement, period)
+        if self._cache_size > 0:
+            with self._lock:
+                self._cache[key] = _CachedStatement(cik, version, stamp, frame)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+                    self.cache_stats.evictions += 1
+        return frame.copy()
+
+    def _build_statement(self, cik: int, statement: str, period: str) -> pd.DataFrame:
         """Pivot raw facts into a statement-shaped DataFrame.
 
         Rows = periods (fiscal_year + fiscal_period), Columns = canonical metrics.
+        Annual and quarterly statements are read from the wide tables when
+        they are materialized (see ``db.materialize_statements``).
         """
-        cik = self._resolve_cik(ticker)
-        df = query_facts_df(self._conn, cik, statement=statement, period=period)
+        wide = wide_statement_rows(self._conn, cik, statement, period)
+        if wide is not None:
+            return _wide_frame(statement, *wide)
+        metrics, cells = statement_cells(self._conn, cik, statement, period)
 
-        if df.empty:
+        if not cells:
             return pd.DataFrame()
 
-        # Pivot: rows are periods, columns are metrics
-        pivot = df.pivot_table(
-            index=["fiscal_year", "fiscal_period", "period_end"],
-            columns="canonical_name",
-            values="value",
-            aggfunc="first",
-        )
+        names = _column_order(statement, metrics.values())
+        order = {name: j for j, name in enumerate(names)}
+        position = np.zeros(max(metrics) + 1, dtype=np.intp)
+        position[list(metrics)] = [order[name] for name in metrics.values()]
 
-        pivot = pivot.reset_index()
-        pivot = pivot.sort_values("period_end", ascending=False)
+        # Number the periods in statement order: period end descending, then
+        # fiscal year and fiscal period (the order pivot_table plus a stable
+        # sort on period_end gave)
+        day, fiscal_year, fiscal_period, canonical_id, value = zip(*cells)
+        keys = list(zip(day, fiscal_year, fiscal_period))
+        periods = sorted(set(keys), key=lambda k: (k[1], k[2]))
+        iso = {d: decode_day(d) for d in set(day)}
+        periods.sort(key=lambda k: iso[k[0]], reverse=True)
+        number = {k: i for i, k in enumerate(periods)}
 
-        # Reorder columns to match canonical order
-        expected_cols = STATEMENT_COLUMNS.get(statement, [])
-        index_cols = ["fiscal_year", "fiscal_period", "period_end"]
-        ordered = index_cols + [c for c in expected_cols if c in pivot.columns]
-        # Include any extra columns not in the expected list
-        extra = [c for c in pivot.columns if c not in ordered]
-        pivot = pivot[ordered + extra]
+        # Scatter values into a (period, metric) grid. Cells arrive in key
+        # order, so the first of any duplicates (another form, period="all")
+        # has the lowest form id.
+        row = np.fromiter((number[k] for k in keys), dtype=np.intp, count=len(keys))
+        col = position[np.array(canonical_id, dtype=np.intp)]
+        _, first = np.unique(row * len(names) + col, return_index=True)
+        grid = np.full((len(periods), len(names)), np.nan)
+        grid[row[first], col[first]] = np.array(value)[first]
 
-        return pivot.reset_index(drop=True)
+        return _statement_frame(
+            [k[1] for k in periods], [k[2] for k in periods], [iso[k[0]] for k in periods],
+            names, grid,
+        )
 
     def get_income_statement(
         self, ticker: str, period: str = "annual"
@@ -85,41 +228,100 @@ class EdgarQuery:
         return df
 
     def get_metric(
-        self, ticker: str, metric: str, period: str = "annual"
+        self,
+        ticker: str,
+        metric: str,
+        period: str = "annual",
+        start: str | None = None,
+        end: str | None = None,
     ) -> pd.DataFrame:
-        """Get a single metric's time series."""
+        """Get a single metric's time series.
+
+        ``start`` and ``end`` (``YYYY-MM-DD``, inclusive) bound the period end.
+        """
         cik = self._resolve_cik(ticker)
 
         form = "10-K" if period == "annual" else "10-Q"
-        df = pd.read_sql_query(
-            """SELECT fiscal_year, fiscal_period, period_end, value
-               FROM facts
-               WHERE cik = ? AND canonical_name = ? AND form = ?
-               ORDER BY period_end DESC""",
-            self._conn,
-            params=[cik, metric, form],
-        )
-        return df
+        sql = """SELECT fiscal_year, fiscal_period, period_end, value
+                 FROM facts
+                 WHERE cik = ? AND canonical_name = ? AND form = ?"""
+        params: list[object] = [cik, metric, form]
+        if start or end:
+            # A range of the fact_data key, as end_day is the stored day number
+            sql += " AND end_day BETWEEN ? AND ?"
+            params.extend(day_range(start, end))
+        sql += " ORDER BY end_day DESC"
+        return pd.read_sql_query(sql, self._conn, params=params)
 
     def compare(
         self, tickers: list[str], metric: str, period: str = "annual"
     ) -> pd.DataFrame:
-        """Compare a metric across multiple tickers. Returns pivoted DataFrame."""
-        frames = {}
-        for ticker in tickers:
-            try:
-                df = self.get_metric(ticker, metric, period)
-            except ValueError:
-                continue
-            if not df.empty:
-                series = df.set_index("period_end")["value"]
-                series.name = ticker.upper()
-                frames[ticker.upper()] = series
-
-        if not frames:
+        """Compare a metric across multiple tickers. Returns pivoted DataFrame.
+
+        One query for all tickers; unknown tickers and tickers without the
+        metric are left out.
+        """
+        names = list(dict.fromkeys(t.upper() for t in tickers))
+        form = "10-K" if period == "annual" else "10-Q"
+        # The pivot keeps the first row of each (ticker, period end); ordering
+        # by fiscal period makes that choice stable (FY before a Q4 label)
+        df = pd.read_sql_query(
+            """SELECT j.key AS pos, f.period_end, f.value
+               FROM json_each(?) j
+               JOIN ticker_map t ON t.ticker = j.value COLLATE NOCASE
+               JOIN facts f ON f.cik = t.cik
+               WHERE f.canonical_name = ? AND f.form = ?
+               ORDER BY pos, f.end_day, f.fiscal_period""",
+            self._conn,
+            params=[json.dumps(names), metric, form],
+        )
+        if df.empty:
             return pd.DataFrame()
+        return pivot_by_ticker(df, names, "period_end", ascending=False)
+
+    def screen(
+        self,
+        metric: str,
+        period: str,
+        min_value: float | None = None,
+        max_value: float | None = None,
+        limit: int | None = None,
+    ) -> pd.DataFrame:
+        """Every filer's ``metric`` for one frames period, largest first.
+
+        Reads the values ``download-frames`` loads, so it covers filers whose
+        companyfacts were never downloaded. ``period`` is a frames period
+        such as ``CY2023``; ``min_value`` and ``max_value`` are inclusive.
+        """
+        sql = """SELECT c.ticker, c.name, f.cik, f.period_end, f.value
+                 FROM frames f
+                 JOIN companies c ON c.cik = f.cik
+                 WHERE f.canonical_name = ? AND f.ccp = ?"""
+        params: list[object] = [metric, period.upper()]
+        if min_value is not None:
+            sql += " AND f.value >= ?"
+            params.append(min_value)
+        if max_value is not None:
+            sql += " AND f.value <= ?"
+            params.append(max_value)
+        sql += " ORDER BY f.value DESC, f.cik"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return pd.read_sql_query(sql, self._conn, params=params)
 
-        result = pd.DataFrame(frames)
-        result.index.name = "period_end"
-        result = result.sort_index(ascending=False)
-        return result
+    def compare_frames(self, tickers: list[str], metric: str) -> pd.DataFrame:
+        """Like ``compare`` over frame values: one row per frames period (``ccp``)."""
+        names = list(dict.fromkeys(t.upper() for t in tickers))
+        df = pd.read_sql_query(
+            """SELECT j.key AS pos, f.ccp, f.value
+               FROM json_each(?) j
+               JOIN ticker_map t ON t.ticker = j.value COLLATE NOCASE
+               JOIN frames f ON f.cik = t.cik
+               WHERE f.canonical_name = ?""",
+            self._conn,
+            params=[json.dumps(names), metric],
+        )
+        if df.empty:
+            return pd.DataFrame()
+        return pivot_by_ticker(df, names, "ccp", ascending=False)
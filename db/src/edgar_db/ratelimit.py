@@ -0,0 +1,237 @@
+"""Adaptive rate limiting shared by the EDGAR, Yahoo Finance and OpenFIGI clients.
+
+``RateLimiter`` schedules requests GCRA-style: every request reserves the next
+free slot, so callers are spaced exactly ``1 / rate`` apart however many
+threads or coroutines share the limiter, and an idle period never leaves
+a backlog of burst credit that ends in a stall.
+
+With a ``SharedSlots`` store the schedule lives in a small SQLite file
+instead of process memory, so every process on the host using the same key
+(the SEC User-Agent) draws from one budget.
+
+The allowed rate adapts AIMD-style. A throttling response (429/503) halves it
+(down to ``min_rate``) and pauses everyone for the server's ``Retry-After`` or
+one interval, plus jitter so parallel clients do not retry in lockstep. Each
+success then adds back a small step until the configured ceiling is reached.
+"""
+
+from __future__ import annotations
+
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Callable
+
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+def is_rate_limited(exc: Exception) -> bool:
+    """yfinance signals Yahoo throttling as YFRateLimitError / "Too Many Requests"."""
+    text = f"{type(exc).__name__} {exc}".lower()
+    return "ratelimit" in text or "rate limit" in text or "too many requests" in text
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class RateLimitMetrics:
+    allowed_rate: float  # current requests/second
+    requests: int = 0
+    throttled_seconds: float = 0.0  # total delay imposed on callers
+    backoff_events: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"rate {self.allowed_rate:.1f}/s allowed, {self.requests} requests, "
+            f"{self.backoff_events} backoffs, {self.throttled_seconds:.1f}s throttled"
+        )
+
+
+class SharedSlots:
+    """Cross-process request schedule stored in a lock-protected SQLite file.
+
+    Each reservation is one ``BEGIN IMMEDIATE`` transaction that reads and
+    advances the key's next free slot, so concurrent processes are serialized
+    by SQLite's file lock. Times are wall-clock (``time.time()``) because
+    monotonic clocks are not comparable across processes.
+    """
+
+    def __init__(self, path: Path, key: str, timeout: float = 30.0) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._key = key
+        self._conn = sqlite3.connect(
+            str(path), timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS rate_slots (
+                   key        TEXT PRIMARY KEY,
+                   next_slot  REAL NOT NULL
+               )"""
+        )
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _advance(self, update: Callable[[float], tuple[float, float]]) -> float:
+        """Atomically map the stored slot through ``update`` -> (result, new slot)."""
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT next_slot FROM rate_slots WHERE key = ?", (self._key,)
+            ).fetchone()
+            result, next_slot = update(row[0] if row else 0.0)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_slots (key, next_slot) VALUES (?, ?)",
+                (self._key, next_slot),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    def reserve(self, now: float, interval: float) -> float:
+        """Claim the next slot at or after ``now``; returns its start time."""
+        def update(slot: float) -> tuple[float, float]:
+            start = max(now, slot)
+            return start, start + interval
+        return self._advance(update)
+
+    def pause_until(self, until: float) -> None:
+        """Keep every process from starting a request before ``until``."""
+        self._advance(lambda slot: (until, max(slot, until)))
+
+
+class RateLimiter:
+    """Thread-safe adaptive limiter; see the module docstring.
+
+    Args:
+        max_rate: Ceiling in requests per second (e.g. SEC's 10/s).
+        min_rate: Floor the rate never backs off below.
+        backoff: Multiplier applied to the rate on each throttle event.
+        recovery: Fraction of ``max_rate`` added back per successful request.
+        jitter: Random extra fraction added to pauses and retry delays.
+        shared: Cross-process schedule; when set, ``clock`` defaults to
+            wall-clock time.
+    """
+
+    def __init__(
+        self,
+        max_rate: float,
+        min_rate: float | None = None,
+        backoff: float = 0.5,
+        recovery: float = 0.05,
+        jitter: float = 0.1,
+        clock: Callable[[], float] | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+        shared: SharedSlots | None = None,
+    ) -> None:
+        self._max_rate = max_rate
+        self._min_rate = min_rate if min_rate is not None else max_rate / 16
+        self._backoff = backoff
+        self._step = max_rate * recovery
+        self._jitter = jitter
+        self._shared = shared
+        if clock is None:
+            clock = time.time if shared is not None else time.monotonic
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._rate = max_rate
+        self._next_slot = 0.0  # earliest start time of the next request
+        self._metrics = RateLimitMetrics(allowed_rate=max_rate)
+
+    def close(self) -> None:
+        """Close the shared schedule's connection, if any."""
+        if self._shared is not None:
+            self._shared.close()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def metrics(self) -> RateLimitMetrics:
+        """Snapshot of the limiter's counters."""
+        with self._lock:
+            return RateLimitMetrics(
+                allowed_rate=self._rate,
+                requests=self._metrics.requests,
+                throttled_seconds=self._metrics.throttled_seconds,
+                backoff_events=self._metrics.backoff_events,
+            )
+
+    def reserve(self) -> float:
+        """Claim the next request slot; returns how long to wait before sending.
+
+        Async callers ``await asyncio.sleep(limiter.reserve())``.
+        """
+        with self._lock:
+            now = self._clock()
+            if self._shared is not None:
+                start = self._shared.reserve(now, 1.0 / self._rate)
+            else:
+                start = max(now, self._next_slot)
+                self._next_slot = start + 1.0 / self._rate
+            delay = start - now
+            self._metrics.requests += 1
+            self._metrics.throttled_seconds += delay
+            return delay
+
+    def wait(self) -> float:
+        """Block until the next slot. Returns the seconds slept."""
+        delay = self.reserve()
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+    def on_success(self) -> None:
+        """Additive increase back toward the ceiling."""
+        with self._lock:
+            self._rate = min(self._max_rate, self._rate + self._step)
+
+    def on_throttle(self, retry_after: float | None = None) -> float:
+        """Multiplicative decrease and a shared pause. Returns the pause length."""
+        with self._lock:
+            self._rate = max(self._min_rate, self._rate * self._backoff)
+            pause = retry_after if retry_after is not None else 1.0 / self._rate
+            pause *= 1.0 + random.uniform(0.0, self._jitter)
+            if self._shared is not None:
+                self._shared.pause_until(self._clock() + pause)
+            else:
+                self._next_slot = max(self._next_slot, self._clock() + pause)
+            self._metrics.backoff_events += 1
+            return pause
+
+    def retry_delay(self, attempt: int) -> float:
+        """Jittered exponential delay for retrying transport and server errors."""
+        return (2 ** attempt) * (1.0 + random.uniform(0.0, self._jitter))
+
+
+def shared_limiter(rate: float, path: Path | None, key: str) -> RateLimiter:
+    """Limiter drawing from the host-wide schedule at ``path``, or a local one."""
+    shared = SharedSlots(path, key) if path is not None else None
+    return RateLimiter(rate, shared=shared)
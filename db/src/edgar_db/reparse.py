@@ -0,0 +1,194 @@
+"""Re-run the parser over archived companyfacts payloads, without any HTTP.
+
+After ``xbrl_tags.py`` gains a metric or reorders tag priority, every stored
+company can be brought up to date from the ``PayloadArchive`` alone. Payloads
+are decompressed and parsed on a process pool. The calling thread compares
+each company's new rows with the stored ones and rewrites only the canonical
+metrics that differ (see ``db.rewrite_changed_metrics``).
+
+The archived payload is treated as the full truth for its CIK. Facts stored
+from another source, such as frames, are replaced wherever the archive
+disagrees.
+
+With ``raw=True`` every us-gaap entry is loaded into ``raw_facts`` instead,
+and the canonical facts are then derived from it in one set-based SQL pass
+(``db.remap_raw_facts``). After that, a mapping change needs only
+``edgar-db remap``.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+from .archive import PayloadArchive
+from .db import (
+    insert_missing_companies,
+    remap_raw_facts,
+    rewrite_changed_metrics,
+    store_raw_facts,
+)
+from .models import FactBatch, SyncState
+from .parser import RawFact, encode_raw_payload, parse_company_facts_payload
+
+# Companies written per transaction
+_COMMIT_EVERY = 100
+
+
+@dataclass
+class ReparseResult:
+    companies: int = 0  # payloads parsed and compared
+    changed: int = 0  # companies with at least one metric rewritten
+    metrics: int = 0  # (company, canonical metric) pairs rewritten
+    missing: int = 0  # requested CIKs without an archived payload
+    errors: int = 0
+    raw_rows: int = 0  # raw_facts rows loaded (raw mode)
+    deleted: int = 0  # facts the mapping no longer produces (raw mode)
+
+    def summary(self) -> str:
+        if self.raw_rows:
+            return (
+                f"{self.companies} companies loaded ({self.raw_rows:,} raw facts), "
+                f"{self.metrics:,} facts written, {self.deleted:,} removed, "
+                f"{self.missing} not archived, {self.errors} failed"
+            )
+        return (
+            f"{self.companies} companies reparsed, {self.changed} changed "
+            f"({self.metrics} metrics rewritten), {self.missing} not archived, "
+            f"{self.errors} failed"
+        )
+
+
+def _load(root: str, cik: int) -> bytes:
+    payload = PayloadArchive(Path(root)).load(cik)
+    if payload is None:
+        raise FileNotFoundError(f"No archived payload for CIK {cik}")
+    return payload
+
+
+def _parse_archived(root: str, cik: int) -> tuple[int, str, FactBatch]:
+    """Load and parse one archived payload. Runs inside pool workers."""
+    return (cik, *parse_company_facts_payload(cik, _load(root, cik)))
+
+
+def _encode_archived(root: str, cik: int) -> tuple[int, str, list[RawFact]]:
+    """Load one archived payload and encode it for raw_facts. Runs inside pool workers."""
+    return (cik, *encode_raw_payload(cik, _load(root, cik)))
+
+
+def reparse_archive(
+    conn: sqlite3.Connection,
+    archive: PayloadArchive,
+    ciks: list[int] | None = None,
+    workers: int | None = None,
+    progress_callback: Callable[[str, int, int], None] | None = None,
+    raw: bool = False,
+) -> ReparseResult:
+    """Reparse archived payloads and rewrite the metrics whose facts changed.
+
+    Args:
+        conn: Open database connection (written from this thread only).
+        archive: Archive the payloads are read from.
+        ciks: Companies to reparse; defaults to every archived CIK.
+        workers: Parser processes. Defaults to the CPU count; ``1`` parses inline.
+        progress_callback: Called as ``(message, current, total)``.
+        raw: Load ``raw_facts`` and derive facts in SQL (see module docstring).
+    """
+    workers = workers or os.cpu_count() or 1
+    result = ReparseResult()
+    if ciks is None:
+        todo = archive.ciks()
+    else:
+        todo = [cik for cik in ciks if archive.digest(cik) is not None]
+        result.missing = len(ciks) - len(todo)
+    total = len(todo)
+    root = str(archive.root)
+
+    def store(cik: int, entity: str, facts: FactBatch) -> None:
+        if not conn.in_transaction:
+            conn.execute("BEGIN")  # else RELEASE commits every company
+        conn.execute("SAVEPOINT reparse_company")
+        try:
+            insert_missing_companies(conn, {cik: entity or str(cik)})
+            changed = rewrite_changed_metrics(
+                conn, cik, facts, state=SyncState.from_batch(cik, facts)
+            )
+        except BaseException:
+            conn.execute("ROLLBACK TO reparse_company")
+            conn.execute("RELEASE reparse_company")
+            raise
+        conn.execute("RELEASE reparse_company")
+        result.companies += 1
+        if changed:
+            result.changed += 1
+            result.metrics += len(changed)
+        if result.companies % _COMMIT_EVERY == 0:
+            conn.commit()
+
+    def store_raw(cik: int, entity: str, rows: list[RawFact]) -> None:
+        if not conn.in_transaction:
+            conn.execute("BEGIN")  # else RELEASE commits every company
+        conn.execute("SAVEPOINT reparse_company")
+        try:
+            insert_missing_companies(conn, {cik: entity or str(cik)})
+            result.raw_rows += store_raw_facts(conn, cik, rows)
+        except BaseException:
+            conn.execute("ROLLBACK TO reparse_company")
+            conn.execute("RELEASE reparse_company")
+            raise
+        conn.execute("RELEASE reparse_company")
+        result.companies += 1
+        loaded.append(cik)
+        if result.companies % _COMMIT_EVERY == 0:
+            conn.commit()
+
+    worker = _encode_archived if raw else _parse_archived
+    write = store_raw if raw else store
+    loaded: list[int] = []
+
+    def finish(cik: int, done: int, parsed: Callable[[], tuple]) -> None:
+        try:
+            write(*parsed())
+        except Exception as exc:
+            result.errors += 1
+            if progress_callback:
+                progress_callback(f"ERROR: CIK {cik}: {exc}", done, total)
+            return
+        if progress_callback:
+            progress_callback(f"CIK {cik}", done, total)
+
+    try:
+        if workers <= 1:
+            for i, cik in enumerate(todo, 1):
+                finish(cik, i, partial(worker, root, cik))
+        else:
+            # Few payloads queued per worker while this thread writes
+            max_pending = workers * 4
+            pending: deque[tuple[int, Future]] = deque()
+            done = 0
+
+            def drain_one() -> None:
+                nonlocal done
+                cik, fut = pending.popleft()
+                done += 1
+                finish(cik, done, fut.result)
+
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for cik in todo:
+                    if len(pending) >= max_pending:
+                        drain_one()
+                    pending.append((cik, pool.submit(worker, root, cik)))
+                while pending:
+                    drain_one()
+    finally:
+        conn.commit()
+    if raw and loaded:
+        counts, result.deleted = remap_raw_facts(conn, loaded)
+        result.metrics = counts.written
+    return result
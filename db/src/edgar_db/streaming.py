@@ -0,0 +1,104 @@
+"""Incremental companyfacts decoding that keeps only the tags we map.
+
+A companyfacts document carries every dei, us-gaap and ifrs tag a filer ever
+used, but ``parse_company_facts`` only reads the us-gaap tags in ``TAG_LOOKUP``.
+``CompanyFactsDecoder`` is fed the response body chunk by chunk and returns a
+pruned document of the same shape. Filtering happens on parser events: only a
+mapped tag's events are built into Python objects, so unmapped tags cost a
+tokenizer pass and no allocation, and peak memory is bounded by the mapped
+tags rather than by the whole document.
+
+Incremental decoding needs the optional ``ijson`` package
+(``pip install edgar-db[stream]``). Without it the decoder buffers the body and
+prunes after a regular ``json.loads``, which gives identical results.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable
+
+from .xbrl_tags import TAG_LOOKUP
+
+WANTED_TAGS: frozenset[str] = frozenset(TAG_LOOKUP)
+
+_HEADER_KEYS = ("cik", "entityName")
+
+
+def _import_ijson():
+    import ijson
+    return ijson
+
+
+def _prune(data: dict[str, Any], wanted: frozenset[str]) -> dict[str, Any]:
+    us_gaap = data.get("facts", {}).get("us-gaap", {})
+    result = {k: data[k] for k in _HEADER_KEYS if k in data}
+    result["facts"] = {"us-gaap": {t: v for t, v in us_gaap.items() if t in wanted}}
+    return result
+
+
+class CompanyFactsDecoder:
+    """Push-style decoder: ``feed()`` body chunks, then call ``result()``."""
+
+    def __init__(self, wanted: frozenset[str] = WANTED_TAGS) -> None:
+        self._wanted = wanted
+        self.bytes_read = 0
+        try:
+            ijson = _import_ijson()
+        except ImportError:
+            ijson = None
+            self._buffer: list[bytes] = []
+        self._ijson = ijson
+        if ijson is None:
+            return
+
+        self._header: dict[str, Any] = {}
+        self._us_gaap: dict[str, Any] = {}
+        self._events = ijson.sendable_list()
+        self._parser = ijson.parse_coro(self._events, use_float=True)
+        self._tag = ""
+        self._builder = None  # ObjectBuilder of the mapped tag being decoded
+
+    def _consume(self) -> None:
+        for prefix, event, value in self._events:
+            if self._builder is not None:
+                # A tag's events all sit below its prefix; the next event at
+                # the us-gaap level (a map_key or end_map) closes it
+                if prefix != "facts.us-gaap":
+                    self._builder.event(event, value)
+                    continue
+                self._us_gaap[self._tag] = self._builder.value
+                self._builder = None
+            if prefix == "facts.us-gaap":
+                if event == "map_key" and value in self._wanted:
+                    self._tag = value
+                    self._builder = self._ijson.ObjectBuilder()
+            elif prefix in _HEADER_KEYS:
+                self._header[prefix] = value
+        del self._events[:]
+
+    def feed(self, chunk: bytes) -> None:
+        self.bytes_read += len(chunk)
+        if self._ijson is None:
+            self._buffer.append(chunk)
+            return
+        self._parser.send(chunk)
+        self._consume()
+
+    def result(self) -> dict[str, Any]:
+        if self._ijson is None:
+            return _prune(json.loads(b"".join(self._buffer)), self._wanted)
+
+        self._parser.close()
+        self._consume()
+        return {**self._header, "facts": {"us-gaap": self._us_gaap}}
+
+
+def decode_company_facts(
+    chunks: Iterable[bytes], wanted: frozenset[str] = WANTED_TAGS
+) -> dict[str, Any]:
+    """Decode an iterable of body chunks into a pruned companyfacts document."""
+    decoder = CompanyFactsDecoder(wanted)
+    for chunk in chunks:
+        decoder.feed(chunk)
+    return decoder.result()
@@ -0,0 +1,110 @@
+"""Filing-driven change detection from the EDGAR submissions feed.
+
+``data.sec.gov/submissions/CIK##########.json`` lists a filer's recent
+filings (``filings.recent`` holds parallel ``accessionNumber`` /
+``filingDate`` / ``form`` arrays, newest first) and is a few KB against the
+megabytes of companyfacts. A company only needs its companyfacts downloaded
+again when a 10-K or 10-Q newer than the last ingested filing has appeared.
+So a daily universe refresh in sync mode fetches submissions for everyone
+and companyfacts only for the few hundred companies that actually filed.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from .client import EdgarClient
+from .db import filing_watermarks
+from .parser import VALID_FORMS
+
+
+def latest_periodic_filing(data: dict[str, Any]) -> tuple[str, str] | None:
+    """``(accession, filing_date)`` of the newest 10-K/10-Q in a submissions feed."""
+    recent = data.get("filings", {}).get("recent", {})
+    latest: tuple[str, str] | None = None
+    for accession, filed, form in zip(
+        recent.get("accessionNumber", []), recent.get("filingDate", []), recent.get("form", [])
+    ):
+        if form in VALID_FORMS and (latest is None or filed > latest[1]):
+            latest = (accession, filed)
+    return latest
+
+
+def has_new_filing(
+    latest: tuple[str, str] | None, watermark: tuple[str, str, str] | None
+) -> bool:
+    """True if ``latest`` is a periodic filing not yet reflected in the database.
+
+    ``watermark`` is ``(max_filed, max_accession, seen_accession)`` from
+    ``filing_watermarks``. A filing counts as ingested when it is the one the
+    stored facts came from, or the one seen at the last sync (a filing
+    whose facts map to no tracked metric never raises ``max_filed``).
+    """
+    if watermark is None:
+        return True  # never synced
+    if latest is None:
+        return False
+    accession, filed = latest
+    max_filed, max_accession, seen_accession = watermark
+    if accession in (max_accession, seen_accession):
+        return False
+    return filed >= max_filed
+
+
+@dataclass
+class SyncCheck:
+    changed: list[tuple[str, int]] = field(default_factory=list)  # (ticker, cik)
+    unchanged: list[tuple[str, int]] = field(default_factory=list)
+    latest: dict[int, tuple[str, str]] = field(default_factory=dict)  # cik → filing
+    errors: int = 0  # feeds that failed; those companies are downloaded anyway
+
+    def summary(self) -> str:
+        checked = len(self.changed) + len(self.unchanged)
+        text = f"sync checked {checked} submissions, {len(self.changed)} with new filings"
+        if self.errors:
+            text += f" ({self.errors} unreadable, downloaded anyway)"
+        return text
+
+
+def check_filings(
+    conn: sqlite3.Connection,
+    client: EdgarClient,
+    companies: list[tuple[str, int]],
+    concurrency: int = 1,
+) -> SyncCheck:
+    """Split ``(ticker, cik)`` pairs into companies with and without new filings.
+
+    Feeds are fetched on ``concurrency`` threads sharing the client's rate
+    limiter; the database is only touched from the calling thread. Order is
+    preserved in both lists.
+    """
+    def fetch(cik: int) -> tuple[str, str] | None | Exception:
+        try:
+            return latest_periodic_filing(client.get_submissions(cik))
+        except Exception as exc:
+            return exc
+
+    ciks = [cik for _, cik in companies]
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            filings = list(pool.map(fetch, ciks))
+    else:
+        filings = [fetch(cik) for cik in ciks]
+
+    watermarks = filing_watermarks(conn, ciks)
+    check = SyncCheck()
+    for (ticker, cik), latest in zip(companies, filings):
+        if isinstance(latest, Exception):
+            check.errors += 1
+            check.changed.append((ticker, cik))
+            continue
+        if latest is not None:
+            check.latest[cik] = latest
+        if has_new_filing(latest, watermarks.get(cik)):
+            check.changed.append((ticker, cik))
+        else:
+            check.unchanged.append((ticker, cik))
+    return check
@@ -7,6 +7,13 @@ from typing import Any
 
 import httpx
 
+from edgar_db.ratelimit import (
+    THROTTLE_STATUSES,
+    RateLimiter,
+    is_rate_limited,
+    parse_retry_after,
+)
+
 from .config import Config
 
 
@@ -21,27 +28,32 @@ _OPENFIGI_URL = "https://api.openfigi.com/v3/mapping"
 class YFinanceClient:
     def __init__(self, config: Config) -> None:
         self._config = config
-        self._min_interval = 1.0 / config.rate_limit
-        self._last_request_time = 0.0
+        self._limiter = RateLimiter(config.rate_limit)
         self._yf = _import_yf()
 
+    @property
+    def limiter(self) -> RateLimiter:
+        return self._limiter
+
     def _throttle(self) -> None:
-        now = time.monotonic()
-        elapsed = now - self._last_request_time
-        if elapsed < self._min_interval:
-            time.sleep(self._min_interval - elapsed)
-        self._last_request_time = time.monotonic()
+        self._limiter.wait()
 
     def _retry(self, func: Any, *args: Any, **kwargs: Any) -> Any:
         last_exc: Exception | None = None
         for attempt in range(self._config.max_retries):
             self._throttle()
             try:
-                return func(*args, **kwargs)
+                result = func(*args, **kwargs)
             except Exception as exc:
                 last_exc = exc
-                time.sleep(2 ** attempt)
+                if is_rate_limited(exc):
+                    # The limiter pauses the next _throttle() for us
+                    self._limiter.on_throttle()
+                else:
+                    time.sleep(self._limiter.retry_delay(attempt))
                 continue
+            self._limiter.on_success()
+            return result
         raise last_exc or RuntimeError("Request failed after retries")
 
     def get_info(self, ticker: str) -> dict[str, Any]:
@@ -57,35 +69,43 @@ class YFinanceClient:
 class OpenFIGIClient:
     def __init__(self, config: Config) -> None:
         self._config = config
-        self._min_interval = 60.0 / (250.0 if config.openfigi_api_key else 25.0)
-        self._last_request_time = 0.0
+        # 25 requests/minute without an API key, 250 with one
+        self._limiter = RateLimiter((250.0 if config.openfigi_api_key else 25.0) / 60.0)
+
+    @property
+    def limiter(self) -> RateLimiter:
+        return self._limiter
 
     def _throttle(self) -> None:
-        now = time.monotonic()
-        elapsed = now - self._last_request_time
-        if elapsed < self._min_interval:
-            time.sleep(self._min_interval - elapsed)
-        self._last_request_time = time.monotonic()
+        self._limiter.wait()
 
     def fetch_figi(self, ticker: str) -> dict[str, Any] | None:
-        self._throttle()
         headers: dict[str, str] = {"Content-Type": "application/json"}
         if self._config.openfigi_api_key:
             headers["X-OPENFIGI-APIKEY"] = self._config.openfigi_api_key
 
         payload = [{"idType": "TICKER", "idValue": ticker, "exchCode": "US"}]
 
-        try:
-            resp = httpx.post(
-                _OPENFIGI_URL,
-                json=payload,
-                headers=headers,
-                timeout=self._config.timeout,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            if data and isinstance(data, list) and "data" in data[0]:
-                return data[0]["data"][0]
-        except Exception:
-            pass
+        for _ in range(self._config.max_retries):
+            self._throttle()
+            try:
+                resp = httpx.post(
+                    _OPENFIGI_URL,
+                    json=payload,
+                    headers=headers,
+                    timeout=self._config.timeout,
+                )
+                if resp.status_code in THROTTLE_STATUSES:
+                    self._limiter.on_throttle(
+                        parse_retry_after(resp.headers.get("Retry-After"))
+                    )
+                    continue
+                resp.raise_for_status()
+                self._limiter.on_success()
+                data = resp.json()
+                if data and isinstance(data, list) and "data" in data[0]:
+                    return data[0]["data"][0]
+            except Exception:
+                pass
+            return None
         return None
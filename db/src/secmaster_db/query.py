@@ -34,6 +34,13 @@ class SecMasterQuery:
         cols = [desc[0] for desc in cur.description]
         return SecurityRow(**dict(zip(cols, row)))
 
+    def market_caps(self) -> dict[str, float]:
+        """{TICKER: market cap} for securities with a known market cap."""
+        cur = self._conn.execute(
+            "SELECT ticker, market_cap FROM securities WHERE market_cap > 0"
+        )
+        return dict(cur.fetchall())
+
     def list_all(self) -> pd.DataFrame:
         return pd.read_sql_query(
             "SELECT ticker, name, sector, industry, country, style_box FROM securities ORDER BY ticker",
@@ -7,6 +7,8 @@ from typing import Any
 
 import pandas as pd
 
+from edgar_db.ratelimit import RateLimiter, is_rate_limited
+
 from .config import Config
 
 
@@ -18,16 +20,15 @@ def _import_yf():
 class YFinanceClient:
     def __init__(self, config: Config) -> None:
         self._config = config
-        self._min_interval = 1.0 / config.rate_limit
-        self._last_request_time = 0.0
+        self._limiter = RateLimiter(config.rate_limit)
         self._yf = _import_yf()
 
+    @property
+    def limiter(self) -> RateLimiter:
+        return self._limiter
+
     def _throttle(self) -> None:
-        now = time.monotonic()
-        elapsed = now - self._last_request_time
-        if elapsed < self._min_interval:
-            time.sleep(self._min_interval - elapsed)
-        self._last_request_time = time.monotonic()
+        self._limiter.wait()
 
     def _retry(self, func: Any, *args: Any, **kwargs: Any) -> Any:
         last_exc: Exception | None = None
@@ -35,11 +36,16 @@ class YFinanceClient:
             self._throttle()
             try:
                 result = func(*args, **kwargs)
-                return result
             except Exception as exc:
                 last_exc = exc
-                time.sleep(2 ** attempt)
+                if is_rate_limited(exc):
+                    # The limiter pauses the next _throttle() for us
+                    self._limiter.on_throttle()
+                else:
+                    time.sleep(self._limiter.retry_delay(attempt))
                 continue
+            self._limiter.on_success()
+            return result
         raise last_exc or RuntimeError("Request failed after retries")
 
     def _ticker(self, symbol: str) -> Any:
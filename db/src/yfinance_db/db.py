@@ -4,11 +4,17 @@ import sqlite3
 from pathlib import Path
 from typing import Any
 
+from edgar_db.dates import encode_day
+
 from .models import (
     CompanyRow, CompanyStatRow, DividendRow, FinancialRow, PriceRow, SplitRow,
 )
 
-SCHEMA_VERSION = "1"
+SCHEMA_VERSION = "2"
+
+# Price dates are stored as days since 1970-01-01 (edgar_db.dates.encode_day);
+# text that is not a valid date is kept as is. The prices view shows ISO dates.
+_DAY_GLOB = "[0-9]" * 4 + "-" + "[0-9]" * 2 + "-" + "[0-9]" * 2
 
 _SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS metadata (
@@ -25,21 +31,25 @@ CREATE TABLE IF NOT EXISTS companies (
     last_downloaded  TEXT DEFAULT ''
 );
 
-CREATE TABLE IF NOT EXISTS prices (
-    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+CREATE TABLE IF NOT EXISTS price_data (
     ticker   TEXT NOT NULL,
-    date     TEXT NOT NULL,
     interval TEXT NOT NULL DEFAULT '1d',
+    day      INTEGER NOT NULL,
     open     REAL NOT NULL,
     high     REAL NOT NULL,
     low      REAL NOT NULL,
     close    REAL NOT NULL,
     volume   INTEGER NOT NULL,
+    PRIMARY KEY (ticker, interval, day),
     FOREIGN KEY (ticker) REFERENCES companies(ticker)
-);
+) WITHOUT ROWID;
 
-CREATE UNIQUE INDEX IF NOT EXISTS idx_prices_dedup
-    ON prices (ticker, date, interval);
+CREATE VIEW IF NOT EXISTS prices AS
+SELECT ticker,
+       CASE typeof(day) WHEN 'integer' THEN date(day * 86400, 'unixepoch') ELSE day END
+           AS date,
+       interval, open, high, low, close, volume, day
+FROM price_data;
 
 CREATE TABLE IF NOT EXISTS company_stats (
     id                   INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -133,6 +143,53 @@ def _init_schema(conn: sqlite3.Connection) -> None:
             ("schema_version", SCHEMA_VERSION),
         )
         conn.commit()
+    else:
+        _maybe_migrate(conn)
+
+
+def _maybe_migrate(conn: sqlite3.Connection) -> None:
+    cur = conn.execute("SELECT value FROM metadata WHERE key = 'schema_version'")
+    row = cur.fetchone()
+    version = int(row[0]) if row else 1
+
+    if version < 2:
+        _migrate_v2(conn)
+
+
+# Move v1 prices (TEXT dates, renamed to prices_v1) into price_data
+_MIGRATE_PRICES_SQL = f"""
+INSERT INTO price_data (ticker, interval, day, open, high, low, close, volume)
+    SELECT ticker, interval,
+           CASE WHEN date GLOB '{_DAY_GLOB}' AND date(date, '+0 days') = date
+                THEN CAST(julianday(date) - 2440587.5 AS INTEGER) ELSE date END,
+           open, high, low, close, volume
+    FROM prices_v1
+    ORDER BY 1, 2, 3;
+DROP TABLE prices_v1;
+"""
+
+
+def _migrate_v2(conn: sqlite3.Connection) -> None:
+    """Rewrite v1 ``prices`` (TEXT dates, rowid plus a unique index) as ``price_data``.
+
+    Runs as one transaction, then vacuums so the file actually shrinks.
+    """
+    script = f"""
+        BEGIN;
+        DROP INDEX IF EXISTS idx_prices_dedup;
+        ALTER TABLE prices RENAME TO prices_v1;
+        {_SCHEMA_SQL}
+        {_MIGRATE_PRICES_SQL}
+        INSERT OR REPLACE INTO metadata (key, value) VALUES ('schema_version', '2');
+        COMMIT;
+    """
+    try:
+        conn.executescript(script)
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    conn.execute("VACUUM")
 
 
 def upsert_company(conn: sqlite3.Connection, company: CompanyRow) -> None:
@@ -158,16 +215,17 @@ def upsert_prices(conn: sqlite3.Connection, prices: list[PriceRow]) -> int:
     inserted = 0
     for p in prices:
         conn.execute(
-            """INSERT INTO prices (ticker, date, interval, open, high, low, close, volume)
+            """INSERT INTO price_data (ticker, interval, day, open, high, low, close, volume)
                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-               ON CONFLICT(ticker, date, interval) DO UPDATE SET
+               ON CONFLICT(ticker, interval, day) DO UPDATE SET
                    open=excluded.open,
                    high=excluded.high,
                    low=excluded.low,
                    close=excluded.close,
                    volume=excluded.volume
             """,
-            (p.ticker, p.date, p.interval, p.open, p.high, p.low, p.close, p.volume),
+            (p.ticker, p.interval, encode_day(p.date), p.open, p.high, p.low, p.close,
+             p.volume),
         )
         inserted += 1
     conn.commit()
@@ -275,7 +333,7 @@ def get_db_stats(conn: sqlite3.Connection) -> dict[str, Any]:
     stats: dict[str, Any] = {}
     cur = conn.execute("SELECT COUNT(*) FROM companies")
     stats["companies"] = cur.fetchone()[0]
-    cur = conn.execute("SELECT COUNT(*) FROM prices")
+    cur = conn.execute("SELECT COUNT(*) FROM price_data")
     stats["prices"] = cur.fetchone()[0]
     cur = conn.execute("SELECT COUNT(*) FROM financials")
     stats["financials"] = cur.fetchone()[0]
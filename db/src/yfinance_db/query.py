@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
+import json
 import sqlite3
 
 import pandas as pd
 
+from edgar_db.dates import day_range
+from edgar_db.pivot import pivot_by_ticker
+
 
 class YFinanceQuery:
     """High-level query interface returning pandas DataFrames."""
@@ -29,15 +33,14 @@ class YFinanceQuery:
         end: str | None = None,
         interval: str = "1d",
     ) -> pd.DataFrame:
+        """Price bars in date order; ``start``/``end`` (``YYYY-MM-DD``) are inclusive."""
         sql = "SELECT date, open, high, low, close, volume FROM prices WHERE ticker = ? AND interval = ?"
         params: list[object] = [ticker.upper(), interval]
-        if start:
-            sql += " AND date >= ?"
-            params.append(start)
-        if end:
-            sql += " AND date <= ?"
-            params.append(end)
-        sql += " ORDER BY date"
+        if start or end:
+            # A range of the price_data key rather than a string comparison
+            sql += " AND day BETWEEN ? AND ?"
+            params.extend(day_range(start, end))
+        sql += " ORDER BY day"
         return pd.read_sql_query(sql, self._conn, params=params)
 
     def get_company_info(self, ticker: str) -> pd.Series:
@@ -118,18 +121,20 @@ class YFinanceQuery:
     def compare(
         self, tickers: list[str], metric: str, period: str = "annual"
     ) -> pd.DataFrame:
-        frames: dict[str, pd.Series] = {}
-        for ticker in tickers:
-            df = self.get_metric(ticker, metric, period)
-            if not df.empty:
-                series = df.set_index("period_end")["value"]
-                series.name = ticker.upper()
-                frames[ticker.upper()] = series
-        if not frames:
+        """One column per ticker with ``metric`` by period end, in one query."""
+        names = list(dict.fromkeys(t.upper() for t in tickers))
+        df = pd.read_sql_query(
+            """SELECT j.key AS pos, f.period_end, f.value
+               FROM json_each(?) j
+               JOIN financials f ON f.ticker = j.value
+               WHERE f.metric = ? AND f.period_type = ?
+               ORDER BY pos, f.period_end, f.statement""",
+            self._conn,
+            params=[json.dumps(names), metric, period],
+        )
+        if df.empty:
             return pd.DataFrame()
-        result = pd.DataFrame(frames)
-        result.index.name = "period_end"
-        return result.sort_index(ascending=False)
+        return pivot_by_ticker(df, names, "period_end", ascending=False)
 
     def compare_prices(
         self,
@@ -137,15 +142,17 @@ class YFinanceQuery:
         start: str | None = None,
         end: str | None = None,
     ) -> pd.DataFrame:
-        frames: dict[str, pd.Series] = {}
-        for ticker in tickers:
-            df = self.get_prices(ticker, start=start, end=end)
-            if not df.empty:
-                series = df.set_index("date")["close"]
-                series.name = ticker.upper()
-                frames[ticker.upper()] = series
-        if not frames:
+        """Daily closes, one column per ticker, in one query."""
+        names = list(dict.fromkeys(t.upper() for t in tickers))
+        sql = """SELECT j.key AS pos, p.date, p.close
+                 FROM json_each(?) j
+                 JOIN prices p ON p.ticker = j.value AND p.interval = '1d'"""
+        params: list[object] = [json.dumps(names)]
+        if start or end:
+            sql += " WHERE p.day BETWEEN ? AND ?"
+            params.extend(day_range(start, end))
+        df = pd.read_sql_query(sql, self._conn, params=params)
+        if df.empty:
             return pd.DataFrame()
-        result = pd.DataFrame(frames)
-        result.index.name = "date"
-        return result.sort_index()
+        return pivot_by_ticker(df, names, "date", ascending=True)
+
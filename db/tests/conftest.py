@@ -4,13 +4,44 @@ import json
 import sqlite3
 from pathlib import Path
 
+import httpx
 import pytest
+import respx
 
+from edgar_db.client import COMPANY_TICKERS_URL, EdgarClient
+from edgar_db.config import Config
 from edgar_db.db import connect_db
+from edgar_db.models import FactRow
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
 
 
+def _make_fact(**overrides) -> FactRow:
+    """An Apple FY2023 10-K revenue fact, with ``overrides`` applied."""
+    defaults = dict(
+        cik=320193,
+        tag="Revenues",
+        canonical_name="revenue",
+        statement="income",
+        value=100000.0,
+        unit="USD",
+        period_end="2023-09-30",
+        fiscal_year=2023,
+        fiscal_period="FY",
+        form="10-K",
+        filed="2023-11-03",
+        accession="0000320193-23-000106",
+    )
+    defaults.update(overrides)
+    return FactRow(**defaults)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_rate_limit(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Keep clients off the user's host-wide rate-limit schedule."""
+    monkeypatch.setenv("EDGAR_RATE_LIMIT_PATH", str(tmp_path / "ratelimit.db"))
+
+
 @pytest.fixture
 def sample_facts_json() -> dict:
     with open(FIXTURES_DIR / "company_facts_sample.json") as f:
@@ -27,3 +58,31 @@ def sample_tickers_json() -> dict:
 def tmp_db(tmp_path: Path) -> sqlite3.Connection:
     db_path = tmp_path / "test.db"
     return connect_db(db_path)
+
+
+@pytest.fixture
+def config() -> Config:
+    return Config(user_agent="TestApp test@example.com", rate_limit=100.0)
+
+
+@pytest.fixture
+def client(config: Config) -> EdgarClient:
+    c = EdgarClient(config)
+    yield c
+    c.close()
+
+
+@pytest.fixture
+def mock_sec(sample_tickers_json: dict, sample_facts_json: dict):
+    """Mock company_tickers.json plus a companyfacts response for every ticker."""
+    with respx.mock(assert_all_called=False) as router:
+        router.get(COMPANY_TICKERS_URL).mock(
+            return_value=httpx.Response(200, json=sample_tickers_json)
+        )
+        for entry in sample_tickers_json.values():
+            cik = str(entry["cik_str"]).zfill(10)
+            facts = dict(sample_facts_json, cik=entry["cik_str"], entityName=entry["title"])
+            router.get(f"https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json").mock(
+                return_value=httpx.Response(200, json=facts)
+            )
+        yield router
@@ -0,0 +1,177 @@
+"""Tests for the raw payload archive and reparse-without-network."""
+
+from __future__ import annotations
+
+import copy
+import gzip
+import json
+import sqlite3
+from dataclasses import replace
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+import respx
+
+from edgar_db.archive import PayloadArchive
+from edgar_db.cache import CacheEntry, ResponseCache
+from edgar_db.client import BASE_URL, COMPANY_TICKERS_URL, EdgarClient
+from edgar_db.config import Config
+from edgar_db.downloader import download_batch, download_company
+from edgar_db.models import FactBatch
+from edgar_db.reparse import reparse_archive
+
+
+@pytest.fixture
+def archive(tmp_path: Path) -> PayloadArchive:
+    return PayloadArchive(tmp_path / "archive")
+
+
+@pytest.fixture
+def archiving_client(config: Config, archive: PayloadArchive) -> EdgarClient:
+    c = EdgarClient(config, archive=archive)
+    yield c
+    c.close()
+
+
+class TestPayloadArchive:
+    def test_round_trip(self, archive: PayloadArchive) -> None:
+        digest = archive.store(320193, b'{"cik": 320193}')
+        assert archive.load(320193) == b'{"cik": 320193}'
+        assert archive.digest(320193) == digest
+        obj = archive.root / "objects" / digest[:2] / f"{digest}.json.gz"
+        assert gzip.decompress(obj.read_bytes()) == b'{"cik": 320193}'
+        assert archive.load(789019) is None
+
+    def test_dedup_and_supersede(self, archive: PayloadArchive) -> None:
+        first = archive.store(320193, b"v1")
+        archive.store(320193, b"v1")
+        assert (archive.stats.stored, archive.stats.deduplicated) == (1, 1)
+
+        archive.store(320193, b"v2")
+        assert archive.load(320193) == b"v2"
+        assert not (archive.root / "objects" / first[:2] / f"{first}.json.gz").exists()
+
+    def test_ciks(self, archive: PayloadArchive) -> None:
+        assert archive.ciks() == []
+        archive.store(789019, b"b")
+        archive.store(320193, b"a")
+        assert archive.ciks() == [320193, 789019]
+
+
+class TestClientArchiving:
+    def test_download_archives_payload(
+        self, tmp_db: sqlite3.Connection, archiving_client: EdgarClient,
+        archive: PayloadArchive, mock_sec, sample_facts_json: dict,
+    ) -> None:
+        download_company(tmp_db, archiving_client, "AAPL")
+        assert json.loads(archive.load(320193))["facts"] == sample_facts_json["facts"]
+
+    @pytest.mark.parametrize("mode", [{"concurrency": 2}, {"workers": 2}])
+    def test_batch_modes_archive(
+        self, tmp_db: sqlite3.Connection, archiving_client: EdgarClient,
+        archive: PayloadArchive, mock_sec, mode: dict,
+    ) -> None:
+        download_batch(tmp_db, archiving_client, ["AAPL", "MSFT"], **mode)
+        assert archive.ciks() == [320193, 789019]
+
+
+    @pytest.mark.parametrize("concurrency", [1, 2])
+    def test_streaming_archives_full_payload(
+        self, tmp_db: sqlite3.Connection, config: Config, archive: PayloadArchive,
+        sample_tickers_json: dict, sample_facts_json: dict, concurrency: int,
+    ) -> None:
+        noisy = copy.deepcopy(sample_facts_json)
+        noisy["facts"]["us-gaap"]["SomeUnmappedTag"] = {"units": {"USD": []}}
+        streaming = replace(config, stream_parse=True)
+        with respx.mock() as router, EdgarClient(streaming, archive=archive) as client:
+            router.get(COMPANY_TICKERS_URL).mock(
+                return_value=httpx.Response(200, json=sample_tickers_json)
+            )
+            router.get(f"{BASE_URL}/api/xbrl/companyfacts/CIK0000320193.json").mock(
+                return_value=httpx.Response(200, json=noisy)
+            )
+            with patch("edgar_db.downloader.parse_company_facts_batch") as parse:
+                parse.return_value = FactBatch()
+                download_batch(tmp_db, client, ["AAPL"], concurrency=concurrency)
+
+        (decoded,) = [call.args[1] for call in parse.call_args_list]
+        assert "SomeUnmappedTag" not in decoded["facts"]["us-gaap"]
+        assert json.loads(archive.load(320193)) == noisy
+
+    def test_unarchived_cik_fetched_in_full(
+        self, tmp_path: Path, config: Config, archive: PayloadArchive, mock_sec,
+    ) -> None:
+        cache = ResponseCache(tmp_path / "cache")
+        cache.store(320193, CacheEntry(etag='"v1"', size=1))
+        with EdgarClient(config, cache=cache, archive=archive) as client:
+            data, _ = client.get_company_facts_if_modified(320193)
+            assert data is not None
+            client.get_company_facts_if_modified(320193)
+        first, second = mock_sec.calls
+        assert "If-None-Match" not in first.request.headers
+        assert second.request.headers["If-None-Match"] == '"v1"'
+
+
+class TestReparse:
+    def _facts(self, conn: sqlite3.Connection) -> list[tuple]:
+        return conn.execute(
+            "SELECT * FROM facts ORDER BY cik, canonical_name, period_end, form"
+        ).fetchall()
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_rewrites_only_changed_metrics(
+        self, tmp_db: sqlite3.Connection, archiving_client: EdgarClient,
+        archive: PayloadArchive, mock_sec, workers: int,
+    ) -> None:
+        download_batch(tmp_db, archiving_client, ["AAPL", "MSFT"])
+        expected = self._facts(tmp_db)
+
+        # Corrupt one metric and drop another, as a tag edit would change them
+        metric = "(SELECT id FROM canonical_metrics WHERE canonical_name = ?)"
+        tmp_db.execute(
+            f"UPDATE fact_data SET value = -1 WHERE cik = 320193 AND canonical_id = {metric}",
+            ("revenue",),
+        )
+        tmp_db.execute(
+            f"DELETE FROM fact_data WHERE cik = 789019 AND canonical_id = {metric}",
+            ("net_income",),
+        )
+        tmp_db.commit()
+
+        with respx.mock():  # any HTTP request would fail
+            result = reparse_archive(tmp_db, archive, workers=workers)
+
+        assert (result.companies, result.changed, result.metrics) == (2, 2, 2)
+        assert self._facts(tmp_db) == expected
+
+        again = reparse_archive(tmp_db, archive, workers=workers)
+        assert (again.companies, again.changed) == (2, 0)
+
+    def test_commits_per_batch(
+        self, tmp_path: Path, tmp_db: sqlite3.Connection, archiving_client: EdgarClient,
+        archive: PayloadArchive, mock_sec,
+    ) -> None:
+        download_batch(tmp_db, archiving_client, ["AAPL", "MSFT"])
+        tmp_db.execute("DELETE FROM fact_data")
+        tmp_db.commit()
+        other = sqlite3.connect(tmp_path / "test.db")
+        visible: list[int] = []
+        reparse_archive(
+            tmp_db, archive, workers=1,
+            progress_callback=lambda msg, i, total: visible.append(
+                other.execute("SELECT COUNT(*) FROM fact_data").fetchone()[0]
+            ),
+        )
+        assert visible == [0, 0]
+        assert other.execute("SELECT COUNT(*) FROM fact_data").fetchone()[0] > 0
+        other.close()
+
+    def test_selected_ciks(
+        self, tmp_db: sqlite3.Connection, archiving_client: EdgarClient,
+        archive: PayloadArchive, mock_sec,
+    ) -> None:
+        download_company(tmp_db, archiving_client, "AAPL")
+        result = reparse_archive(tmp_db, archive, ciks=[320193, 789019], workers=1)
+        assert (result.companies, result.missing) == (1, 1)
@@ -0,0 +1,71 @@
+"""Tests for offline ingestion from a companyfacts.zip archive."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from edgar_db.bulk import ingest_companyfacts_zip
+from edgar_db.db import connect_db, upsert_ticker_map
+from edgar_db.parser import parse_company_facts
+
+
+@pytest.fixture
+def archive(tmp_path: Path, sample_facts_json: dict) -> Path:
+    path = tmp_path / "companyfacts.zip"
+    msft = dict(sample_facts_json, cik=789019, entityName="MICROSOFT CORP")
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("CIK0000320193.json", json.dumps(sample_facts_json))
+        zf.writestr("CIK0000789019.json", json.dumps(msft))
+        zf.writestr("CIK0000000001.json", json.dumps({"cik": 1, "facts": {}}))
+        zf.writestr("CIK0000000002.json", "{not json")
+        zf.writestr("README.txt", "ignored")
+    return path
+
+
+class TestIngestCompanyFactsZip:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_loads_all_members(
+        self, tmp_db: sqlite3.Connection, archive: Path, sample_facts_json: dict, workers: int
+    ) -> None:
+        upsert_ticker_map(tmp_db, {"AAPL": 320193})
+        result = ingest_companyfacts_zip(tmp_db, archive, workers=workers)
+
+        expected = len(parse_company_facts(320193, sample_facts_json))
+        assert result.companies == 2
+        assert result.facts == 2 * expected
+        assert result.empty == 1
+        assert result.errors == 1
+        assert tmp_db.execute("SELECT COUNT(*) FROM facts").fetchone()[0] == 2 * expected
+
+        rows = dict(tmp_db.execute("SELECT cik, ticker FROM companies").fetchall())
+        assert rows == {320193: "AAPL", 789019: ""}
+
+    def test_reports_progress(self, tmp_db: sqlite3.Connection, archive: Path) -> None:
+        messages: list[tuple[str, int, int]] = []
+        ingest_companyfacts_zip(
+            tmp_db, archive, workers=1,
+            progress_callback=lambda msg, i, total: messages.append((msg, i, total)),
+        )
+        assert len(messages) == 4
+        assert all(total == 4 for _, _, total in messages)
+        assert any(msg.startswith("ERROR: CIK0000000002.json") for msg, _, _ in messages)
+
+    def test_commits_per_batch(self, tmp_path: Path, archive: Path) -> None:
+        conn = connect_db(tmp_path / "bulk.db")
+        other = sqlite3.connect(tmp_path / "bulk.db")
+        visible: list[int] = []
+        ingest_companyfacts_zip(
+            conn, archive, workers=1,
+            progress_callback=lambda msg, i, total: visible.append(
+                other.execute("SELECT COUNT(*) FROM companies").fetchone()[0]
+            ),
+        )
+        assert visible == [0, 0, 0, 0]
+        assert other.execute("SELECT COUNT(*) FROM companies").fetchone()[0] == 2
+        other.close()
+        conn.close()
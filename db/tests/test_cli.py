@@ -87,3 +87,148 @@ class TestDownloadCommand:
             mock_config.return_value.ensure_db_dir = MagicMock()
             result = runner.invoke(cli, ["download"])
             assert result.exit_code != 0 or "Error" in result.output
+
+
+class TestIngestBulkCommand:
+    def test_ingests_archive(self, tmp_path: Path, sample_facts_json: dict) -> None:
+        import zipfile
+
+        archive = tmp_path / "companyfacts.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("CIK0000320193.json", json.dumps(sample_facts_json))
+        db_path = tmp_path / "test.db"
+
+        runner = CliRunner()
+        with patch("edgar_db.cli._get_config") as mock_config:
+            mock_config.return_value = MagicMock(db_path=db_path)
+            result = runner.invoke(cli, ["ingest-bulk", str(archive), "--workers", "1"])
+        assert result.exit_code == 0, result.output
+        assert "1 companies" in result.output
+
+
+class TestDownloadFramesCommand:
+    def test_loads_frame(self, tmp_path: Path) -> None:
+        import httpx
+        import respx
+
+        from edgar_db.config import Config
+
+        frame = json.loads((FIXTURES_DIR / "frame_sample.json").read_text())
+        db_path = tmp_path / "test.db"
+        config = Config(user_agent="TestApp test@example.com", db_path=db_path)
+
+        runner = CliRunner()
+        with patch("edgar_db.cli._get_config", return_value=config), respx.mock() as router:
+            router.get(url__regex=r".*/frames/us-gaap/.*/USD/CY2023\.json").mock(
+                return_value=httpx.Response(200, json=frame)
+            )
+            result = runner.invoke(
+                cli, ["download-frames", "-t", frame["tag"], "-p", "CY2023", "-p", "CY20"]
+            )
+        assert result.exit_code == 1  # the invalid period fails, the valid one loads
+        assert "CY2023: 4 companies" in result.output
+        assert "Invalid frame period" in result.output
+
+        with patch("edgar_db.cli._get_config", return_value=config):
+            result = runner.invoke(cli, ["screen", "revenue", "-p", "cy2023", "--format", "csv"])
+        assert result.exit_code == 0, result.output
+        lines = result.output.strip().splitlines()
+        assert lines[0] == "ticker,name,cik,period_end,value"
+        assert len(lines) == 5 and ",1018724," in lines[1]
+
+
+class TestReparseCommand:
+    def test_unknown_ticker(self, tmp_path: Path) -> None:
+        runner = CliRunner()
+        with patch("edgar_db.cli._get_config") as mock_config:
+            mock_config.return_value = MagicMock(
+                db_path=tmp_path / "test.db", archive_dir=tmp_path / "archive"
+            )
+            result = runner.invoke(cli, ["reparse", "--tickers", "ZZZZ"])
+        assert result.exit_code == 1
+        assert "Unknown ticker: ZZZZ" in result.output
+
+    def test_reparse_archive(self, tmp_path: Path) -> None:
+        from edgar_db.archive import PayloadArchive
+
+        db_path = tmp_path / "test.db"
+        _setup_test_db(db_path)
+        sample = (FIXTURES_DIR / "company_facts_sample.json").read_bytes()
+        PayloadArchive(tmp_path / "archive").store(320193, sample)
+
+        runner = CliRunner()
+        with patch("edgar_db.cli._get_config") as mock_config:
+            mock_config.return_value = MagicMock(
+                db_path=db_path, archive_dir=tmp_path / "archive"
+            )
+            result = runner.invoke(cli, ["reparse", "-t", "AAPL", "--workers", "1"])
+        assert result.exit_code == 0, result.output
+        assert "1 companies reparsed, 1 changed" in result.output
+
+
+class TestMaterializeCommand:
+    def test_materialize_and_drop(self, tmp_path: Path) -> None:
+        db_path = tmp_path / "test.db"
+        _setup_test_db(db_path)
+
+        runner = CliRunner()
+        with patch("edgar_db.cli._get_config") as mock_config:
+            mock_config.return_value = MagicMock(db_path=db_path)
+            result = runner.invoke(cli, ["materialize"])
+            assert result.exit_code == 0, result.output
+            assert "income 1 rows" in result.output
+            result = runner.invoke(cli, ["materialize", "--drop"])
+            assert result.exit_code == 0, result.output
+
+        conn = connect_db(db_path)
+        tables = conn.execute("SELECT name FROM sqlite_master WHERE name LIKE '%_wide'").fetchall()
+        conn.close()
+        assert tables == []
+
+
+class TestResumeOption:
+    def test_unknown_job(self, tmp_path: Path) -> None:
+        runner = CliRunner()
+        with patch("edgar_db.cli._get_config") as mock_config:
+            mock_config.return_value = MagicMock(db_path=tmp_path / "test.db")
+            result = runner.invoke(cli, ["download", "--resume", "42"])
+        assert result.exit_code == 1
+        assert "No download job 42" in result.output
+
+    def test_complete_job(self, tmp_path: Path) -> None:
+        from edgar_db.jobs import JobJournal, create_job
+
+        db_path = tmp_path / "test.db"
+        conn = connect_db(db_path)
+        job_id = create_job(conn, ["AAPL"])
+        JobJournal(conn, job_id).finish("AAPL")
+        conn.close()
+
+        runner = CliRunner()
+        with patch("edgar_db.cli._get_config") as mock_config:
+            mock_config.return_value = MagicMock(db_path=db_path)
+            result = runner.invoke(cli, ["download", "--resume", str(job_id)])
+        assert result.exit_code == 0
+        assert "already complete" in result.output
+
+    def test_resume_reapplies_options(self, tmp_path: Path) -> None:
+        from edgar_db.jobs import JobOptions, create_job
+
+        db_path = tmp_path / "test.db"
+        conn = connect_db(db_path)
+        job_id = create_job(conn, ["AAPL", "MSFT"], JobOptions(force=True, full=True))
+        conn.close()
+
+        runner = CliRunner()
+        with patch("edgar_db.cli._get_config") as mock_config, \
+                patch("edgar_db.client.EdgarClient"), \
+                patch("edgar_db.downloader.download_batch", return_value={}) as batch:
+            mock_config.return_value = MagicMock(db_path=db_path)
+            result = runner.invoke(cli, ["download", "--resume", str(job_id)])
+            assert result.exit_code == 0, result.output
+            kwargs = batch.call_args.kwargs
+            assert (kwargs["force"], kwargs["full"], kwargs["sync"]) == (True, True, False)
+
+            result = runner.invoke(cli, ["download", "--resume", str(job_id), "--sync"])
+        assert result.exit_code == 1
+        assert f"Job {job_id} was started without --sync" in result.output
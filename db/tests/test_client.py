@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import json
+import sqlite3
 from pathlib import Path
 from unittest.mock import patch
 
@@ -10,8 +11,15 @@ import httpx
 import pytest
 import respx
 
-from edgar_db.client import BASE_URL, COMPANY_TICKERS_URL, EdgarClient
+from edgar_db.client import (
+    BASE_URL,
+    COMPANY_TICKERS_URL,
+    AsyncEdgarClient,
+    EdgarClient,
+)
+from edgar_db.cache import ResponseCache
 from edgar_db.config import Config
+from edgar_db.ratelimit import RateLimiter
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
 
@@ -79,19 +87,145 @@ class TestGetCompanyFacts:
             client.get_company_facts(cik)
 
 
+class TestConditionalGet:
+    @respx.mock
+    def test_304_uses_cached_validators(
+        self, config: Config, tmp_path: Path, sample_facts_json: dict
+    ) -> None:
+        cik = 320193
+        cache = ResponseCache(tmp_path / "cache")
+        body = json.dumps(sample_facts_json).encode()
+        route = respx.get(f"{BASE_URL}/api/xbrl/companyfacts/CIK{str(cik).zfill(10)}.json")
+        route.side_effect = [
+            httpx.Response(200, content=body, headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+            httpx.Response(304),
+        ]
+
+        with EdgarClient(config, cache=cache) as c:
+            data, entry = c.get_company_facts_if_modified(cik)
+            assert data["entityName"] == "Apple Inc."
+            cache.store(cik, entry)
+
+            data, entry = c.get_company_facts_if_modified(cik)
+            assert data is None
+            assert entry.size == len(body)
+
+        sent = route.calls[1].request.headers
+        assert sent["If-None-Match"] == '"v1"'
+        assert sent["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+        assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+        assert cache.stats.bytes_saved == len(body)
+
+    @respx.mock
+    def test_unconditional_skips_validators(
+        self, config: Config, tmp_path: Path, sample_facts_json: dict
+    ) -> None:
+        cik = 320193
+        cache = ResponseCache(tmp_path / "cache")
+        route = respx.get(f"{BASE_URL}/api/xbrl/companyfacts/CIK{str(cik).zfill(10)}.json")
+        route.mock(return_value=httpx.Response(200, json=sample_facts_json, headers={"ETag": '"v1"'}))
+
+        with EdgarClient(config, cache=cache) as c:
+            _, entry = c.get_company_facts_if_modified(cik)
+            cache.store(cik, entry)
+            data, _ = c.get_company_facts_if_modified(cik, conditional=False)
+
+        assert data is not None
+        assert "If-None-Match" not in route.calls[1].request.headers
+
+
 class TestRateLimiting:
     def test_throttle_spacing(self, config: Config) -> None:
         """Rate limiter should enforce minimum interval between requests."""
         import time
         config.rate_limit = 5.0  # 5 req/sec → 0.2s interval
         c = EdgarClient(config)
-        c._last_request_time = time.monotonic()
         start = time.monotonic()
         c._throttle()
+        c._throttle()
         elapsed = time.monotonic() - start
         assert elapsed >= 0.15  # Allow some tolerance
         c.close()
 
+    @respx.mock
+    def test_429_honors_retry_after(self, config: Config) -> None:
+        route = respx.get(COMPANY_TICKERS_URL)
+        route.side_effect = [
+            httpx.Response(429, headers={"Retry-After": "3"}),
+            httpx.Response(200, json={}),
+        ]
+        slept: list[float] = []
+        limiter = RateLimiter(10.0, jitter=0.0, sleep=slept.append)
+        with EdgarClient(config, limiter=limiter) as c:
+            assert c.get_company_tickers() == {}
+        assert slept and slept[-1] >= 2.9
+        assert limiter.metrics.backoff_events == 1
+        assert limiter.rate == 5.5  # halved, then one success adds 5% of the ceiling
+
+    @respx.mock
+    def test_persistent_429_raises(self, config: Config) -> None:
+        respx.get(COMPANY_TICKERS_URL).mock(return_value=httpx.Response(429))
+        limiter = RateLimiter(10.0, sleep=lambda s: None)
+        with EdgarClient(config, limiter=limiter) as c:
+            with pytest.raises(httpx.HTTPStatusError, match="429"):
+                c.get_company_tickers()
+
+
+    def test_close_releases_shared_schedule(self, tmp_path: Path) -> None:
+        import asyncio
+
+        config = Config(user_agent="TestApp test@example.com", rate_limit_path=tmp_path / "rate.db")
+        with EdgarClient(config) as owner:
+            aclient = AsyncEdgarClient(config)
+            asyncio.run(aclient.aclose())
+            borrower = AsyncEdgarClient(config, limiter=owner.limiter)
+            asyncio.run(borrower.aclose())
+            owner.limiter.reserve()  # still open: the borrower did not close it
+        for limiter in (owner.limiter, aclient._limiter):
+            with pytest.raises(sqlite3.ProgrammingError):
+                limiter.reserve()
+
+
+class TestAsyncClient:
+    @respx.mock
+    def test_fetches_facts(self, config: Config, sample_facts_json: dict) -> None:
+        import asyncio
+
+        cik = 320193
+        route = respx.get(f"{BASE_URL}/api/xbrl/companyfacts/CIK{str(cik).zfill(10)}.json")
+        route.side_effect = [
+            httpx.Response(503),
+            httpx.Response(200, json=sample_facts_json),
+        ]
+
+        async def fetch() -> dict:
+            async with AsyncEdgarClient(config) as c:
+                return await c.get_company_facts(cik)
+
+        with patch("edgar_db.client.asyncio.sleep"):
+            result = asyncio.run(fetch())
+        assert result["entityName"] == "Apple Inc."
+        assert route.call_count == 2
+
+    def test_shared_limiter_rate(self) -> None:
+        """Concurrent requests together should not exceed the limiter rate."""
+        import asyncio
+        import time
+
+        limiter = RateLimiter(20.0)
+
+        async def acquire() -> None:
+            await asyncio.sleep(limiter.reserve())
+
+        async def run() -> float:
+            start = time.monotonic()
+            await asyncio.gather(*(acquire() for _ in range(5)))
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(run())
+        # First slot is immediate, the other four are spaced 50ms apart
+        assert elapsed >= 0.18
+
 
 class TestPadCik:
     def test_padding(self) -> None:
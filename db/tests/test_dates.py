@@ -0,0 +1,25 @@
+"""Tests for the day-number date encoding."""
+
+from __future__ import annotations
+
+import pytest
+
+from edgar_db.dates import day_range, decode_day, encode_day
+
+
+class TestDayEncoding:
+    def test_round_trip(self) -> None:
+        assert encode_day("1970-01-02") == 1
+        assert decode_day(encode_day("2023-09-30")) == "2023-09-30"
+
+    def test_non_dates_kept(self) -> None:
+        assert encode_day("") is None
+        assert encode_day("2023-02-30") == "2023-02-30"
+        assert decode_day("Q3") == "Q3"
+
+    def test_day_range(self) -> None:
+        assert day_range("1970-01-01", "1970-01-31T00:00") == (0, 30)
+        first, last = day_range(None, None)
+        assert first < 0 < last
+        with pytest.raises(ValueError, match="Invalid date range"):
+            day_range("soon", None)
@@ -3,35 +3,28 @@
 from __future__ import annotations
 
 import sqlite3
+from dataclasses import astuple
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
 
 from edgar_db.db import (
+    UpsertCounts,
+    connect_db,
+    fact_version,
     get_db_stats,
+    merge_facts,
     query_facts_df,
     resolve_cik,
     upsert_company,
     upsert_facts,
     upsert_ticker_map,
+    write_company_facts,
 )
-from edgar_db.models import Company, FactRow
-
-
-def _make_fact(**overrides) -> FactRow:
-    defaults = dict(
-        cik=320193,
-        tag="Revenues",
-        canonical_name="revenue",
-        statement="income",
-        value=100000.0,
-        unit="USD",
-        period_end="2023-09-30",
-        fiscal_year=2023,
-        fiscal_period="FY",
-        form="10-K",
-        filed="2023-11-03",
-        accession="0000320193-23-000106",
-    )
-    defaults.update(overrides)
-    return FactRow(**defaults)
+from edgar_db.models import Company, FactBatch
+
+from .conftest import _make_fact
 
 
 class TestSchema:
@@ -41,13 +34,128 @@ class TestSchema:
         )
         tables = {row[0] for row in cur.fetchall()}
         assert "companies" in tables
-        assert "facts" in tables
+        assert "fact_data" in tables
+        assert "labels" in tables
+        assert "canonical_metrics" in tables
         assert "ticker_map" in tables
         assert "metadata" in tables
+        assert "frame_facts" in tables
+        views = tmp_db.execute("SELECT name FROM sqlite_master WHERE type='view' ORDER BY name")
+        assert [row[0] for row in views] == ["facts", "frames"]
 
     def test_schema_version(self, tmp_db: sqlite3.Connection) -> None:
         cur = tmp_db.execute("SELECT value FROM metadata WHERE key='schema_version'")
-        assert cur.fetchone()[0] == "1"
+        assert cur.fetchone()[0] == "2"
+
+    def test_facts_view_round_trips_text(self, tmp_db: sqlite3.Connection) -> None:
+        upsert_company(tmp_db, Company(cik=320193, name="Apple", ticker="AAPL"))
+        facts = [
+            _make_fact(),
+            _make_fact(canonical_name="net_income", filed="", accession=""),
+            _make_fact(canonical_name="eps_basic", period_end="2023-02-30",
+                       accession="odd-accession"),
+        ]
+        upsert_facts(tmp_db, facts)
+        cols = "cik, tag, canonical_name, statement, value, unit, period_end, " \
+            "fiscal_year, fiscal_period, form, filed, accession"
+        stored = tmp_db.execute(f"SELECT {cols} FROM facts ORDER BY canonical_name")
+        assert stored.fetchall() == sorted(
+            (astuple(f) for f in facts), key=lambda row: row[2]
+        )
+        encoded = tmp_db.execute(
+            """SELECT f.period_end, f.filed, f.accession FROM fact_data f
+               JOIN canonical_metrics m ON m.id = f.canonical_id
+               ORDER BY m.canonical_name"""
+        ).fetchall()
+        assert encoded == [
+            ("2023-02-30", 19664, "odd-accession"),  # not a real date: kept as text
+            (19630, None, None),
+            (19630, 19664, 32019323000106),
+        ]
+
+
+_V1_SCHEMA = """
+CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE companies (
+    cik INTEGER PRIMARY KEY, name TEXT NOT NULL, ticker TEXT NOT NULL,
+    sic TEXT DEFAULT '', exchanges TEXT DEFAULT '', last_downloaded TEXT DEFAULT ''
+);
+CREATE TABLE facts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, cik INTEGER NOT NULL, tag TEXT NOT NULL,
+    canonical_name TEXT NOT NULL, statement TEXT NOT NULL, value REAL NOT NULL,
+    unit TEXT NOT NULL, period_end TEXT NOT NULL, fiscal_year INTEGER NOT NULL,
+    fiscal_period TEXT NOT NULL, form TEXT NOT NULL, filed TEXT NOT NULL,
+    accession TEXT NOT NULL
+);
+CREATE UNIQUE INDEX idx_facts_dedup
+    ON facts (cik, canonical_name, period_end, fiscal_period, form);
+CREATE INDEX idx_facts_cik ON facts (cik);
+CREATE INDEX idx_facts_statement ON facts (cik, statement);
+CREATE TABLE raw_labels (id INTEGER PRIMARY KEY, label TEXT NOT NULL UNIQUE);
+INSERT INTO metadata VALUES ('schema_version', '1');
+INSERT INTO raw_labels (label) VALUES ('Revenues');
+"""
+
+
+class TestMigration:
+    def test_v1_facts_migrate_in_place(self, tmp_path: Path) -> None:
+        path = tmp_path / "v1.db"
+        conn = sqlite3.connect(str(path))
+        conn.executescript(_V1_SCHEMA)
+        facts = [
+            _make_fact(),
+            _make_fact(fiscal_period="Q3", form="10-Q", period_end="2023-07-01"),
+            _make_fact(cik=789019, canonical_name="total_assets", statement="balance",
+                       tag="Assets", filed="", accession="odd-accession"),
+        ]
+        conn.execute("INSERT INTO companies (cik, name, ticker) VALUES (320193, 'Apple', 'AAPL')")
+        conn.execute("INSERT INTO companies (cik, name, ticker) VALUES (789019, 'MS', 'MSFT')")
+        conn.executemany(
+            "INSERT INTO facts (cik, tag, canonical_name, statement, value, unit, period_end,"
+            " fiscal_year, fiscal_period, form, filed, accession)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [astuple(f) for f in facts],
+        )
+        conn.commit()
+        conn.close()
+
+        conn = connect_db(path)
+        assert conn.execute(
+            "SELECT value FROM metadata WHERE key = 'schema_version'"
+        ).fetchone() == ("2",)
+        migrated = query_facts_df(conn, 320193, period="all")
+        assert len(migrated) == 2
+        assert set(migrated["fiscal_period"]) == {"FY", "Q3"}
+        stored = conn.execute(
+            "SELECT cik, tag, filed, accession FROM facts ORDER BY cik, period_end"
+        ).fetchall()
+        assert stored == [
+            (320193, "Revenues", "2023-11-03", "0000320193-23-000106"),
+            (320193, "Revenues", "2023-11-03", "0000320193-23-000106"),
+            (789019, "Assets", "", "odd-accession"),
+        ]
+        # raw_labels became labels, keeping its ids
+        assert conn.execute("SELECT id FROM labels WHERE label = 'Revenues'").fetchone() == (1,)
+        indexes = conn.execute(
+            "SELECT name FROM sqlite_master WHERE name LIKE 'idx_facts%'"
+        ).fetchall()
+        assert indexes == []
+        # Writes keep working on the migrated store
+        counts = merge_facts(conn, [_make_fact(value=1.0)])
+        assert counts == UpsertCounts(updated=1)
+        conn.close()
+        # and reopening does not migrate again
+        connect_db(path).close()
+
+    def test_later_versions_are_not_migrated(self, tmp_path: Path) -> None:
+        path = tmp_path / "v10.db"
+        conn = connect_db(path)
+        conn.execute("UPDATE metadata SET value = '10' WHERE key = 'schema_version'")
+        conn.commit()
+        conn.close()
+        with patch("edgar_db.db._migrate_v2") as migrate:
+            connect_db(path).close()
+        migrate.assert_not_called()
 
 
 class TestUpsertCompany:
@@ -88,6 +196,15 @@ class TestUpsertFacts:
     def test_empty_list(self, tmp_db: sqlite3.Connection) -> None:
         assert upsert_facts(tmp_db, []) == 0
 
+    def test_bumps_fact_version_on_change(self, tmp_db: sqlite3.Connection) -> None:
+        upsert_company(tmp_db, Company(cik=320193, name="Apple", ticker="AAPL"))
+        assert fact_version(tmp_db, 320193) == 0
+        upsert_facts(tmp_db, [_make_fact()])
+        upsert_facts(tmp_db, [_make_fact()])  # unchanged
+        assert fact_version(tmp_db, 320193) == 1
+        upsert_facts(tmp_db, [_make_fact(value=1.0)])
+        assert fact_version(tmp_db, 320193) == 2
+
 
 class TestTickerMap:
     def test_upsert_and_resolve(self, tmp_db: sqlite3.Connection) -> None:
@@ -131,3 +248,63 @@ class TestDbStats:
         assert stats["companies"] == 1
         assert stats["facts"] == 1
         assert stats["tickers"] == 1
+
+
+class TestUpsertFactBatch:
+    def test_accepts_batch(self, tmp_db: sqlite3.Connection) -> None:
+        upsert_company(tmp_db, Company(cik=320193, name="Apple", ticker="AAPL"))
+        batch = FactBatch.from_rows([_make_fact(), _make_fact(canonical_name="net_income")])
+        assert upsert_facts(tmp_db, batch) == 2
+        assert tmp_db.execute("SELECT COUNT(*) FROM facts").fetchone()[0] == 2
+
+
+class TestStagedMerge:
+    def test_counts(self, tmp_db: sqlite3.Connection) -> None:
+        upsert_company(tmp_db, Company(cik=320193, name="Apple", ticker="AAPL"))
+        facts = [_make_fact(), _make_fact(canonical_name="net_income", value=50000.0)]
+        assert merge_facts(tmp_db, facts) == UpsertCounts(inserted=2)
+
+        changed = [_make_fact(value=1.0), _make_fact(canonical_name="net_income", value=50000.0)]
+        assert merge_facts(tmp_db, changed) == UpsertCounts(updated=1, unchanged=1)
+        tmp_db.commit()
+        assert tmp_db.execute(
+            "SELECT value FROM facts WHERE canonical_name = 'revenue'"
+        ).fetchone()[0] == 1.0
+
+    def test_duplicate_keys_in_batch_last_wins(self, tmp_db: sqlite3.Connection) -> None:
+        upsert_company(tmp_db, Company(cik=320193, name="Apple", ticker="AAPL"))
+        counts = merge_facts(tmp_db, [_make_fact(value=1.0), _make_fact(value=2.0)])
+        assert counts == UpsertCounts(inserted=1)
+        assert tmp_db.execute("SELECT value FROM facts").fetchone()[0] == 2.0
+
+    def test_unchanged_rows_not_rewritten(self, tmp_db: sqlite3.Connection) -> None:
+        upsert_company(tmp_db, Company(cik=320193, name="Apple", ticker="AAPL"))
+        upsert_facts(tmp_db, [_make_fact()])
+        before = tmp_db.total_changes
+        assert upsert_facts(tmp_db, [_make_fact()]) == 0
+        # Only the staging table is touched
+        assert tmp_db.total_changes - before == 2
+
+    def test_write_company_facts_is_atomic(self, tmp_db: sqlite3.Connection) -> None:
+        company = Company(cik=320193, name="Apple", ticker="AAPL")
+        with pytest.raises(sqlite3.Error):
+            write_company_facts(tmp_db, company, [_make_fact(), _make_fact(value="x", unit=None)])
+        assert tmp_db.execute("SELECT COUNT(*) FROM companies").fetchone()[0] == 0
+        assert tmp_db.execute("SELECT COUNT(*) FROM facts").fetchone()[0] == 0
+
+        counts = write_company_facts(tmp_db, company, [_make_fact()])
+        assert counts.inserted == 1
+        assert tmp_db.execute("SELECT COUNT(*) FROM companies").fetchone()[0] == 1
+
+    def test_write_company_facts_defers_commit(self, tmp_path: Path) -> None:
+        conn = connect_db(tmp_path / "batch.db")
+        other = sqlite3.connect(tmp_path / "batch.db")
+        company = Company(cik=320193, name="Apple", ticker="AAPL")
+        write_company_facts(conn, company, [_make_fact()], commit=False)
+        assert conn.in_transaction
+        assert other.execute("SELECT COUNT(*) FROM companies").fetchone()[0] == 0
+
+        conn.commit()
+        assert other.execute("SELECT COUNT(*) FROM companies").fetchone()[0] == 1
+        other.close()
+        conn.close()
@@ -0,0 +1,300 @@
+"""Tests for the download orchestrator with mocked HTTP responses."""
+
+from __future__ import annotations
+
+import copy
+import sqlite3
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import httpx
+import pytest
+import respx
+
+from edgar_db.cache import ResponseCache
+from edgar_db.client import BASE_URL, COMPANY_TICKERS_URL, EdgarClient
+from edgar_db.config import Config
+from edgar_db.db import connect_db, get_metadata, get_sync_state
+from edgar_db.downloader import (
+    DeltaStats,
+    TickerResolver,
+    download_batch,
+    download_company,
+    plan_batch,
+    refresh_ticker_map,
+)
+
+
+def _facts_url(cik: int) -> str:
+    return f"{BASE_URL}/api/xbrl/companyfacts/CIK{str(cik).zfill(10)}.json"
+
+
+class TestDownloadCompany:
+    def test_stores_facts(self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec) -> None:
+        count = download_company(tmp_db, client, "AAPL")
+        assert count > 0
+        stored = tmp_db.execute("SELECT COUNT(*) FROM facts WHERE cik = 320193").fetchone()[0]
+        assert stored == count
+
+    def test_skips_fresh(self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec) -> None:
+        download_company(tmp_db, client, "AAPL")
+        assert download_company(tmp_db, client, "AAPL") == 0
+
+    def test_unknown_ticker(self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec) -> None:
+        with pytest.raises(ValueError, match="Unknown ticker"):
+            download_company(tmp_db, client, "ZZZZ")
+
+
+class TestTickerMapCache:
+    def test_batch_reuses_map_within_ttl(
+        self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec
+    ) -> None:
+        download_batch(tmp_db, client, ["AAPL"])
+        download_batch(tmp_db, client, ["MSFT"])
+        assert mock_sec.routes[0].call_count == 1
+        assert get_metadata(tmp_db, "ticker_map_fetched_at")
+
+    def test_misses_refresh_once_per_batch(
+        self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec
+    ) -> None:
+        refresh_ticker_map(tmp_db, client)
+        bad = [f"BAD{i}" for i in range(20)]
+        results = download_batch(tmp_db, client, ["AAPL", *bad, "BAD0"])
+        assert all(results[t] == -1 for t in bad)
+        # One load plus one refresh for the first miss
+        assert mock_sec.routes[0].call_count == 2
+
+    def test_stale_map_is_revalidated(
+        self, tmp_db: sqlite3.Connection, config: Config, sample_tickers_json: dict
+    ) -> None:
+        config.ticker_map_ttl = 0
+        with respx.mock() as router, EdgarClient(config) as client:
+            route = router.get(COMPANY_TICKERS_URL)
+            route.side_effect = [
+                httpx.Response(200, json=sample_tickers_json, headers={"ETag": '"t1"'}),
+                httpx.Response(304),
+            ]
+            TickerResolver(tmp_db, client).ensure_fresh()
+            first = get_metadata(tmp_db, "ticker_map_fetched_at")
+            resolver = TickerResolver(tmp_db, client)
+            resolver.ensure_fresh()
+            assert route.calls[1].request.headers["If-None-Match"] == '"t1"'
+            assert resolver.resolve("aapl") == 320193
+        assert get_metadata(tmp_db, "ticker_map_fetched_at") >= first
+        assert get_metadata(tmp_db, "ticker_map_etag") == '"t1"'
+
+
+class TestBatchPlan:
+    @pytest.fixture
+    def resolver(self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec) -> TickerResolver:
+        refresh_ticker_map(tmp_db, client)
+        tmp_db.executemany(
+            "INSERT INTO companies (cik, name, ticker, last_downloaded) VALUES (?, ?, ?, ?)",
+            [
+                (320193, "Apple", "AAPL", "2020-01-02T00:00:00+00:00"),
+                (789019, "Microsoft", "MSFT", "2020-01-01T00:00:00+00:00"),
+            ],
+        )
+        tmp_db.commit()
+        return TickerResolver(tmp_db, client)
+
+    def test_stalest_first(self, resolver: TickerResolver) -> None:
+        plan = plan_batch(resolver, ["AAPL", "MSFT", "AMZN", "ZZZZ"])
+        assert plan.todo == [("AMZN", 1018724), ("MSFT", 789019), ("AAPL", 320193)]
+        assert plan.unknown == ["ZZZZ"]
+
+    def test_mixed_case_duplicates_planned_once(self, resolver: TickerResolver) -> None:
+        plan = plan_batch(resolver, ["aapl", "AAPL", " Aapl ", "msft"])
+        assert plan.todo == [("MSFT", 789019), ("AAPL", 320193)]
+
+    def test_priority_order(self, resolver: TickerResolver) -> None:
+        plan = plan_batch(resolver, ["AAPL", "MSFT", "AMZN"], priority={"AAPL": 3.0, "MSFT": 2.0})
+        assert [t for t, _ in plan.todo] == ["AAPL", "MSFT", "AMZN"]
+
+    def test_single_freshness_query(self, tmp_db: sqlite3.Connection, resolver: TickerResolver) -> None:
+        tmp_db.execute("UPDATE companies SET last_downloaded = ? WHERE cik = 320193",
+                       (datetime.now(timezone.utc).isoformat(),))
+        statements: list[str] = []
+        tmp_db.set_trace_callback(statements.append)
+        plan = plan_batch(resolver, ["AAPL", "MSFT", "AMZN"])
+        tmp_db.set_trace_callback(None)
+        assert plan.fresh == ["AAPL"]
+        assert len(statements) == 1
+
+    def test_fresh_dropped_before_fetch(
+        self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec
+    ) -> None:
+        download_batch(tmp_db, client, ["AAPL"])
+        results = download_batch(tmp_db, client, ["AAPL", "MSFT"])
+        assert results["AAPL"] == 0 and results["MSFT"] > 0
+        assert mock_sec.get(_facts_url(320193)).call_count == 1
+
+
+class TestConditionalDownload:
+    def test_not_modified_skips_upsert(
+        self, tmp_db: sqlite3.Connection, config: Config, tmp_path, sample_tickers_json: dict,
+        sample_facts_json: dict,
+    ) -> None:
+        cache = ResponseCache(tmp_path / "cache")
+        with respx.mock() as router, EdgarClient(config, cache=cache) as client:
+            router.get(COMPANY_TICKERS_URL).mock(
+                return_value=httpx.Response(200, json=sample_tickers_json)
+            )
+            router.get(_facts_url(320193)).side_effect = [
+                httpx.Response(200, json=sample_facts_json, headers={"ETag": '"v1"'}),
+                httpx.Response(304),
+            ]
+            first = download_company(tmp_db, client, "AAPL")
+            tmp_db.execute("UPDATE companies SET last_downloaded = ''")
+            tmp_db.commit()
+
+            with patch("edgar_db.downloader.write_company_facts") as mock_write:
+                assert download_company(tmp_db, client, "AAPL") == 0
+                mock_write.assert_not_called()
+
+        assert first > 0
+        assert cache.stats.hits == 1
+        last = tmp_db.execute(
+            "SELECT last_downloaded FROM companies WHERE cik = 320193"
+        ).fetchone()[0]
+        assert last != ""
+
+    @pytest.mark.parametrize("batch", [None, {}, {"concurrency": 4}, {"workers": 2}])
+    def test_fresh_db_ignores_warm_cache(
+        self, tmp_path, config: Config, sample_tickers_json: dict, sample_facts_json: dict,
+        batch: dict | None,
+    ) -> None:
+        def facts(request: httpx.Request) -> httpx.Response:
+            if "If-None-Match" in request.headers:
+                return httpx.Response(304)
+            return httpx.Response(200, json=sample_facts_json, headers={"ETag": '"v1"'})
+
+        cache = ResponseCache(tmp_path / "cache")
+        warm = connect_db(tmp_path / "warm.db")
+        fresh = connect_db(tmp_path / "fresh.db")
+        with respx.mock() as router, EdgarClient(config, cache=cache) as client:
+            router.get(COMPANY_TICKERS_URL).mock(
+                return_value=httpx.Response(200, json=sample_tickers_json)
+            )
+            router.get(_facts_url(320193)).side_effect = facts
+            assert download_company(warm, client, "AAPL") > 0
+            if batch is None:
+                stored = download_company(fresh, client, "AAPL")
+            else:
+                stored = download_batch(fresh, client, ["AAPL"], **batch)["AAPL"]
+
+        assert stored > 0
+        assert cache.stats.hits == 0
+        count = "SELECT COUNT(*) FROM facts"
+        assert fresh.execute(count).fetchone() == warm.execute(count).fetchone()
+
+    def test_batch_reports_cache_stats(
+        self, tmp_db: sqlite3.Connection, config: Config, tmp_path, mock_sec
+    ) -> None:
+        messages: list[str] = []
+        with EdgarClient(config, cache=ResponseCache(tmp_path / "cache")) as client:
+            download_batch(
+                tmp_db, client, ["AAPL", "MSFT"],
+                progress_callback=lambda msg, i, total: messages.append(msg),
+            )
+        assert messages[-1] == "STATS: cache 0 hits, 2 misses, 0.0 MB saved"
+
+
+class TestDownloadBatch:
+    def test_sequential(self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec) -> None:
+        results = download_batch(tmp_db, client, ["AAPL", "MSFT", "ZZZZ"])
+        assert results["AAPL"] > 0
+        assert results["MSFT"] > 0
+        assert results["ZZZZ"] == -1
+
+    def test_concurrent_matches_sequential(
+        self, tmp_path, client: EdgarClient, mock_sec
+    ) -> None:
+        seq_conn = connect_db(tmp_path / "seq.db")
+        conc_conn = connect_db(tmp_path / "conc.db")
+        tickers = ["AAPL", "MSFT", "ZZZZ"]
+        seq = download_batch(seq_conn, client, tickers)
+        messages: list[str] = []
+        conc = download_batch(
+            conc_conn, client, tickers, concurrency=4,
+            progress_callback=lambda msg, i, total: messages.append(msg),
+        )
+        assert conc == seq
+        assert any(m.startswith("ERROR: ZZZZ") for m in messages)
+
+        sql = "SELECT cik, canonical_name, period_end, form, value FROM facts ORDER BY 1, 2, 3, 4"
+        assert conc_conn.execute(sql).fetchall() == seq_conn.execute(sql).fetchall()
+
+
+def _restated(sample_facts_json: dict) -> dict:
+    """A later version of the sample: one old period restated, one period added."""
+    data = copy.deepcopy(sample_facts_json)
+    revenues = data["facts"]["us-gaap"]["Revenues"]["units"]["USD"]
+    revenues[0].update(val=1.0, filed="2024-02-01", accn="0000320193-24-000001")
+    revenues.append({
+        "end": "2023-12-30", "val": 119575000000, "accn": "0000320193-24-000006",
+        "fy": 2024, "fp": "Q1", "form": "10-Q", "filed": "2024-02-02",
+    })
+    return data
+
+
+class TestDeltaIngestion:
+    SQL = (
+        "SELECT cik, tag, canonical_name, period_end, fiscal_period, form, value, filed"
+        " FROM facts ORDER BY 1, 3, 4, 5, 6"
+    )
+    TICKERS = {"0": {"cik_str": 320193, "ticker": "AAPL", "title": "Apple Inc."}}
+
+    def _download(self, conn, client, responses, **kwargs) -> list[DeltaStats]:
+        stats = []
+        with respx.mock() as router:
+            router.get(COMPANY_TICKERS_URL).mock(
+                return_value=httpx.Response(200, json=self.TICKERS)
+            )
+            router.get(_facts_url(320193)).side_effect = [
+                httpx.Response(200, json=data) for data in responses
+            ]
+            for _ in responses:
+                stats.append(DeltaStats())
+                download_company(conn, client, "AAPL", force=True, stats=stats[-1], **kwargs)
+        return stats
+
+    def test_records_watermark(self, tmp_db, client, sample_facts_json: dict) -> None:
+        self._download(tmp_db, client, [sample_facts_json])
+        state = get_sync_state(tmp_db, 320193)
+        assert state.max_filed == "2023-11-03"
+        assert state.max_accession == "0000320193-23-000106"
+
+    def test_unchanged_refresh_skips_history(self, tmp_db, client, sample_facts_json: dict) -> None:
+        first, second = self._download(tmp_db, client, [sample_facts_json] * 2)
+        assert first.skipped == 0
+        assert 0 < second.skipped < second.parsed
+        rows = tmp_db.execute("SELECT COUNT(*) FROM facts WHERE filed < '2023-11-03'").fetchone()[0]
+        assert second.skipped == rows
+
+    def test_restatement_matches_full_write(
+        self, tmp_path, client, sample_facts_json: dict
+    ) -> None:
+        delta_conn = connect_db(tmp_path / "delta.db")
+        full_conn = connect_db(tmp_path / "full.db")
+        v2 = _restated(sample_facts_json)
+        _, refresh = self._download(delta_conn, client, [sample_facts_json, v2])
+        self._download(full_conn, client, [v2])
+
+        assert refresh.skipped > 0
+        assert delta_conn.execute(self.SQL).fetchall() == full_conn.execute(self.SQL).fetchall()
+        value = delta_conn.execute(
+            "SELECT value FROM facts WHERE canonical_name = 'revenue' AND period_end = '2022-09-24'"
+        ).fetchone()[0]
+        assert value == 1.0
+
+    def test_tag_change_writes_everything(self, tmp_db, client, sample_facts_json: dict) -> None:
+        v2 = copy.deepcopy(sample_facts_json)
+        del v2["facts"]["us-gaap"]["Revenues"]
+        _, refresh = self._download(tmp_db, client, [sample_facts_json, v2])
+        assert refresh.skipped == 0
+
+    def test_full_disables_delta(self, tmp_db, client, sample_facts_json: dict) -> None:
+        _, refresh = self._download(tmp_db, client, [sample_facts_json] * 2, full=True)
+        assert refresh.skipped == 0
+        assert refresh.parsed > 0
@@ -0,0 +1,241 @@
+"""Tests for XBRL frames ingestion."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+
+import httpx
+import pandas as pd
+import pytest
+import respx
+
+from edgar_db.client import EdgarClient
+from edgar_db.db import upsert_company, upsert_facts, upsert_ticker_map
+from edgar_db.frames import (
+    FramePeriod,
+    download_frame,
+    parse_frame,
+    parse_frame_period,
+    store_frame,
+)
+from edgar_db.models import Company, FactRow
+from edgar_db.query import EdgarQuery
+
+from .conftest import _make_fact
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+FRAME_URL = (
+    "https://data.sec.gov/api/xbrl/frames/us-gaap/"
+    "RevenueFromContractWithCustomerExcludingAssessedTax/USD/CY2023.json"
+)
+
+
+@pytest.fixture
+def frame_json() -> dict:
+    with open(FIXTURES_DIR / "frame_sample.json") as f:
+        return json.load(f)
+
+
+def _revenue(tag: str, value: float, **overrides) -> FactRow:
+    return _make_fact(tag=tag, value=value, **overrides)
+
+
+class TestFramePeriod:
+    @pytest.mark.parametrize(
+        "period, expected",
+        [
+            ("CY2023", FramePeriod(2023, "FY", "10-K", False)),
+            ("CY2023Q2", FramePeriod(2023, "Q2", "10-Q", False)),
+            ("cy2023q2i", FramePeriod(2023, "Q2", "10-Q", True)),
+            ("CY2023Q4I", FramePeriod(2023, "FY", "10-K", True)),
+        ],
+    )
+    def test_mapping(self, period: str, expected: FramePeriod) -> None:
+        assert parse_frame_period(period) == expected
+
+    @pytest.mark.parametrize("period", ["2023", "CY2023I", "CY2023Q5", "FY2023"])
+    def test_invalid(self, period: str) -> None:
+        with pytest.raises(ValueError, match="Invalid frame period"):
+            parse_frame_period(period)
+
+
+class TestParseFrame:
+    def test_rows(self, frame_json: dict) -> None:
+        facts, names = parse_frame(frame_json)
+        assert len(facts) == 4
+        row = facts.rows()[0]
+        assert (row.cik, row.canonical_name, row.statement, row.unit) == (
+            320193, "revenue", "income", "USD"
+        )
+        assert (row.fiscal_year, row.fiscal_period, row.form, row.filed) == (
+            2023, "FY", "10-K", ""
+        )
+        assert names[1750] == "AAR CORP."
+
+    def test_per_share_unit(self, frame_json: dict) -> None:
+        frame_json.update(tag="EarningsPerShareDiluted", uom="USD-per-shares")
+        facts, _ = parse_frame(frame_json)
+        assert set(facts.unit) == {"USD/shares"}
+
+    def test_unmapped_tag(self, frame_json: dict) -> None:
+        frame_json["tag"] = "SomethingElse"
+        with pytest.raises(ValueError, match="not mapped"):
+            parse_frame(frame_json)
+
+
+def _aapl_frame(tag: str, period: str, end: str, value: float) -> dict:
+    return {
+        "tag": tag, "ccp": period, "uom": "USD",
+        "data": [{"accn": "0000320193-23-000077", "cik": 320193,
+                  "entityName": "Apple Inc.", "end": end, "val": value}],
+    }
+
+
+class TestStoreFrame:
+    def test_loads_every_filer(self, tmp_db: sqlite3.Connection, frame_json: dict) -> None:
+        result = store_frame(tmp_db, frame_json)
+
+        assert (result.companies, result.new_companies, result.stored) == (4, 4, 4)
+        # Nothing on file to take fiscal labels from, so nothing enters facts
+        assert (result.calendar_only, result.counts.inserted) == (4, 0)
+        rows = tmp_db.execute(
+            """SELECT cik, canonical_name, ccp, period_end, value, accession FROM frames
+               ORDER BY cik"""
+        ).fetchall()
+        assert rows[0] == (
+            1750, "revenue", "CY2023", "2023-05-31", 1990600000.0, "0001104659-23-081377"
+        )
+        assert [row[0] for row in rows] == [1750, 320193, 789019, 1018724]
+        names = dict(tmp_db.execute("SELECT cik, name FROM companies").fetchall())
+        assert names[1750] == "AAR CORP."
+
+    def test_reload_writes_only_changes(
+        self, tmp_db: sqlite3.Connection, frame_json: dict
+    ) -> None:
+        store_frame(tmp_db, frame_json)
+        assert store_frame(tmp_db, frame_json).stored == 0
+
+        frame_json["data"][0]["val"] = 1.0
+        result = store_frame(tmp_db, frame_json)
+        assert (result.stored, result.new_companies) == (1, 0)
+        value = tmp_db.execute("SELECT value FROM frames WHERE cik = 320193").fetchone()
+        assert value == (1.0,)
+
+    def test_fills_gap_with_stored_fiscal_labels(
+        self, tmp_db: sqlite3.Connection, frame_json: dict
+    ) -> None:
+        upsert_company(tmp_db, Company(cik=320193, name="Apple Inc.", ticker="AAPL"))
+        upsert_facts(tmp_db, [_revenue("NetIncomeLoss", 1.0, canonical_name="net_income",
+                                    fiscal_year=2024)])
+        result = store_frame(tmp_db, frame_json)
+
+        assert (result.counts.inserted, result.calendar_only, result.stored) == (1, 3, 4)
+        stored = tmp_db.execute(
+            """SELECT fiscal_year, fiscal_period, form, value FROM facts
+               WHERE cik = 320193 AND canonical_name = 'revenue'"""
+        ).fetchone()
+        assert stored == (2024, "FY", "10-K", 383285000000.0)
+
+    @pytest.mark.parametrize("tag", ["Revenues", "RevenueFromContractWithCustomerExcludingAssessedTax"])
+    def test_never_overwrites(self, tmp_db: sqlite3.Connection, frame_json: dict, tag: str) -> None:
+        upsert_company(tmp_db, Company(cik=320193, name="Apple Inc.", ticker="AAPL"))
+        upsert_facts(tmp_db, [_revenue(tag, 1.0)])
+        result = store_frame(tmp_db, frame_json)
+
+        assert (result.counts.written, result.counts.unchanged) == (0, 1)
+        stored = tmp_db.execute("SELECT tag, value FROM facts WHERE cik = 320193").fetchone()
+        assert stored == (tag, 1.0)
+
+    def test_non_calendar_fiscal_year(self, tmp_db: sqlite3.Connection) -> None:
+        # Apple's fiscal year ends in late September: calendar Q1 2023 is its
+        # fiscal Q2, and the calendar year-end balance is in its fiscal 2024 Q1 10-Q
+        upsert_company(tmp_db, Company(cik=320193, name="Apple Inc.", ticker="AAPL"))
+        upsert_facts(tmp_db, [
+            _revenue("Revenues", 94836000000,
+                period_end="2023-04-01", fiscal_period="Q2", form="10-Q"),
+            _revenue("NetIncomeLoss", 24160000000,
+                canonical_name="net_income", period_end="2023-04-01",
+                fiscal_period="Q2", form="10-Q"),
+            _revenue("NetIncomeLoss", 33916000000,
+                canonical_name="net_income", period_end="2023-12-30",
+                fiscal_year=2024, fiscal_period="Q1", form="10-Q"),
+        ])
+        store_frame(tmp_db, _aapl_frame("Revenues", "CY2023Q1", "2023-04-01", 1.0))
+        store_frame(tmp_db, _aapl_frame("CostOfRevenue", "CY2023Q1", "2023-04-01", 2.0))
+        store_frame(tmp_db, _aapl_frame("Assets", "CY2023Q4I", "2023-12-30", 3.0))
+
+        rows = tmp_db.execute(
+            """SELECT canonical_name, fiscal_year, fiscal_period, form, value FROM facts
+               WHERE cik = 320193 ORDER BY period_end, canonical_name"""
+        ).fetchall()
+        assert rows == [
+            ("cost_of_revenue", 2023, "Q2", "10-Q", 2.0),
+            ("net_income", 2023, "Q2", "10-Q", 24160000000.0),
+            ("revenue", 2023, "Q2", "10-Q", 94836000000.0),
+            ("net_income", 2024, "Q1", "10-Q", 33916000000.0),
+            ("total_assets", 2024, "Q1", "10-Q", 3.0),
+        ]
+
+
+class TestDownloadFrame:
+    def test_one_request(
+        self, tmp_db: sqlite3.Connection, client: EdgarClient, frame_json: dict
+    ) -> None:
+        with respx.mock() as router:
+            route = router.get(FRAME_URL).mock(
+                return_value=httpx.Response(200, json=frame_json)
+            )
+            result = download_frame(
+                tmp_db, client, frame_json["tag"], "USD", "CY2023"
+            )
+        assert route.call_count == 1
+        assert (result.companies, result.stored) == (4, 4)
+        assert tmp_db.execute("SELECT COUNT(*) FROM frame_facts").fetchone() == (4,)
+
+    def test_per_share_url(self, client: EdgarClient) -> None:
+        with respx.mock() as router:
+            route = router.get(
+                "https://data.sec.gov/api/xbrl/frames/us-gaap/"
+                "EarningsPerShareDiluted/USD-per-shares/CY2023Q2.json"
+            ).mock(return_value=httpx.Response(200, json={"data": []}))
+            client.get_frame("EarningsPerShareDiluted", "USD/shares", "CY2023Q2")
+        assert route.called
+
+    def test_rejects_unmapped_tag(
+        self, tmp_db: sqlite3.Connection, client: EdgarClient
+    ) -> None:
+        with respx.mock() as router:
+            with pytest.raises(ValueError, match="not mapped"):
+                download_frame(tmp_db, client, "SomethingElse", "USD", "CY2023")
+            assert not router.calls
+
+
+class TestScreen:
+    @pytest.fixture
+    def query(self, tmp_db: sqlite3.Connection, frame_json: dict) -> EdgarQuery:
+        upsert_ticker_map(tmp_db, {"AAPL": 320193, "MSFT": 789019})
+        store_frame(tmp_db, frame_json)
+        quarter = dict(frame_json, ccp="CY2023Q2", data=[
+            dict(frame_json["data"][0], end="2023-07-01", val=81797000000),
+        ])
+        store_frame(tmp_db, quarter)
+        return EdgarQuery(tmp_db)
+
+    def test_ranks_every_filer(self, query: EdgarQuery) -> None:
+        df = query.screen("revenue", "cy2023")
+        assert list(df["cik"]) == [1018724, 320193, 789019, 1750]
+        assert list(df.columns) == ["ticker", "name", "cik", "period_end", "value"]
+        assert df["ticker"].iloc[1] == "AAPL"
+
+    def test_bounds_and_limit(self, query: EdgarQuery) -> None:
+        df = query.screen("revenue", "CY2023", min_value=2e9, max_value=4e11, limit=1)
+        assert list(df["cik"]) == [320193]
+
+    def test_compare_frames(self, query: EdgarQuery) -> None:
+        df = query.compare_frames(["MSFT", "aapl", "ZZZZ"], "revenue")
+        assert list(df.columns) == ["MSFT", "AAPL"]
+        assert list(df.index) == ["CY2023Q2", "CY2023"]
+        assert df.loc["CY2023Q2", "AAPL"] == 81797000000
+        assert pd.isna(df.loc["CY2023Q2", "MSFT"])
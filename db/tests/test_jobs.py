@@ -0,0 +1,96 @@
+"""Tests for the download job journal and resumable batches."""
+
+from __future__ import annotations
+
+import sqlite3
+
+import httpx
+import pytest
+
+from edgar_db.client import EdgarClient
+from edgar_db.downloader import download_batch
+from edgar_db.jobs import (
+    JobJournal,
+    JobOptions,
+    create_job,
+    job_options,
+    job_summary,
+    unfinished_tickers,
+)
+
+
+def _rows(conn: sqlite3.Connection, job_id: int) -> dict[str, tuple]:
+    cur = conn.execute(
+        "SELECT ticker, state, error, attempts FROM download_jobs WHERE job_id = ?", (job_id,)
+    )
+    return {ticker: rest for ticker, *rest in cur}
+
+
+class TestJournal:
+    def test_create_job(self, tmp_db: sqlite3.Connection) -> None:
+        first = create_job(tmp_db, ["aapl", "MSFT"])
+        second = create_job(tmp_db, ["AMZN"])
+        assert second == first + 1
+        assert unfinished_tickers(tmp_db, first) == ["AAPL", "MSFT"]
+        assert job_summary(tmp_db, first) == {"pending": 2}
+
+    def test_options(self, tmp_db: sqlite3.Connection) -> None:
+        full = create_job(tmp_db, ["AAPL"], JobOptions(full=True))
+        plain = create_job(tmp_db, ["AAPL"])
+        assert job_options(tmp_db, full) == JobOptions(full=True)
+        assert job_options(tmp_db, plain) == JobOptions()
+        assert job_options(tmp_db, plain + 1) is None
+
+    def test_transitions(self, tmp_db: sqlite3.Connection) -> None:
+        job_id = create_job(tmp_db, ["AAPL", "MSFT", "AMZN"])
+        journal = JobJournal(tmp_db, job_id)
+        journal.start("AAPL")
+        journal.finish("AAPL")
+        journal.start("MSFT")
+        journal.finish("MSFT", error="boom")
+        journal.start("AMZN")  # left running, as after a crash
+
+        rows = _rows(tmp_db, job_id)
+        assert rows["AAPL"] == ["done", "", 1]
+        assert rows["MSFT"] == ["failed", "boom", 1]
+        assert rows["AMZN"] == ["running", "", 1]
+        assert unfinished_tickers(tmp_db, job_id) == ["MSFT", "AMZN"]
+
+
+class TestResumableBatch:
+    @pytest.mark.parametrize("mode", [{}, {"concurrency": 2}, {"workers": 2}])
+    def test_batch_records_states(
+        self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec, mode: dict
+    ) -> None:
+        mock_sec.get(
+            "https://data.sec.gov/api/xbrl/companyfacts/CIK0000789019.json"
+        ).mock(return_value=httpx.Response(404))
+        tickers = ["AAPL", "MSFT", "ZZZZ"]
+        job_id = create_job(tmp_db, tickers)
+        download_batch(tmp_db, client, tickers, job_id=job_id, **mode)
+
+        rows = _rows(tmp_db, job_id)
+        assert rows["AAPL"] == ["done", "", 1]
+        assert rows["MSFT"][0] == "failed" and "404" in rows["MSFT"][1]
+        assert rows["ZZZZ"] == ["failed", "Unknown ticker: ZZZZ", 1]
+        duration = tmp_db.execute(
+            "SELECT duration FROM download_jobs WHERE ticker = 'AAPL'"
+        ).fetchone()[0]
+        assert duration > 0
+
+    def test_resume_only_unfinished(
+        self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec
+    ) -> None:
+        job_id = create_job(tmp_db, ["AAPL", "MSFT", "AMZN"])
+        download_batch(tmp_db, client, ["AAPL"], job_id=job_id)
+        JobJournal(tmp_db, job_id).start("MSFT")  # crashed mid-download
+
+        remaining = unfinished_tickers(tmp_db, job_id)
+        assert remaining == ["MSFT", "AMZN"]
+        download_batch(tmp_db, client, remaining, job_id=job_id)
+
+        assert unfinished_tickers(tmp_db, job_id) == []
+        assert mock_sec.get(
+            "https://data.sec.gov/api/xbrl/companyfacts/CIK0000320193.json"
+        ).call_count == 1
+        assert _rows(tmp_db, job_id)["MSFT"] == ["done", "", 2]
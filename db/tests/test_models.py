@@ -0,0 +1,82 @@
+"""Tests for the FactRow / FactBatch data containers."""
+
+from __future__ import annotations
+
+import sys
+
+import numpy as np
+import pytest
+
+from edgar_db.models import FACT_COLUMNS, FactBatch, SyncState
+from edgar_db.parser import parse_company_facts_batch
+
+from .conftest import _make_fact
+
+
+class TestFactRow:
+    def test_slots(self) -> None:
+        assert not hasattr(_make_fact(), "__dict__")
+
+
+class TestFactBatch:
+    def test_round_trip_rows(self) -> None:
+        rows = [_make_fact(), _make_fact(canonical_name="net_income", value=5.0)]
+        batch = FactBatch.from_rows(rows)
+        assert len(batch) == 2
+        assert list(batch) == rows
+        assert next(batch.records()) == tuple(getattr(rows[0], c) for c in FACT_COLUMNS)
+
+    def test_strings_interned(self, sample_facts_json: dict) -> None:
+        batch = parse_company_facts_batch(320193, sample_facts_json)
+        forms = {id(f) for f in batch.form}
+        assert len(forms) == len(set(batch.form))
+
+    def test_extend(self) -> None:
+        batch = FactBatch.from_rows([_make_fact()])
+        batch.extend(FactBatch.from_rows([_make_fact(value=2.0)]))
+        assert list(batch.value) == [100000.0, 2.0]
+
+    def test_take(self) -> None:
+        rows = [_make_fact(value=float(i)) for i in range(4)]
+        taken = FactBatch.from_rows(rows).take([3, 1])
+        assert list(taken) == [rows[3], rows[1]]
+        assert taken.value.typecode == "d"
+
+    def test_to_pandas_shares_numeric_buffers(self, sample_facts_json: dict) -> None:
+        batch = parse_company_facts_batch(320193, sample_facts_json)
+        df = batch.to_pandas()
+        assert list(df.columns) == list(FACT_COLUMNS)
+        assert len(df) == len(batch)
+        assert np.shares_memory(df["value"].to_numpy(), np.frombuffer(batch.value))
+        assert df["fiscal_year"].dtype == np.int64
+
+    def test_to_pandas_empty(self) -> None:
+        assert FactBatch().to_pandas().empty
+
+    def test_to_arrow(self, sample_facts_json: dict) -> None:
+        pa = pytest.importorskip("pyarrow")
+        batch = parse_company_facts_batch(320193, sample_facts_json)
+        table = batch.to_arrow()
+        assert table.num_rows == len(batch)
+        assert table.column("value").to_pylist() == list(batch.value)
+        assert pa.types.is_dictionary(table.schema.field("form").type)
+
+    def test_to_arrow_names_extra(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setitem(sys.modules, "pyarrow", None)
+        with pytest.raises(ImportError, match=r"edgar-db\[arrow\]"):
+            FactBatch.from_rows([_make_fact()]).to_arrow()
+
+
+class TestSyncState:
+    def test_from_batch(self) -> None:
+        batch = FactBatch.from_rows([
+            _make_fact(filed="2023-01-01", accession="a"),
+            _make_fact(canonical_name="net_income", tag="NetIncomeLoss", filed="2024-01-01", accession="b"),
+        ])
+        state = SyncState.from_batch(1, batch)
+        assert (state.max_filed, state.max_accession) == ("2024-01-01", "b")
+
+    def test_tag_plan_tracks_tag_choice(self) -> None:
+        a = SyncState.from_batch(1, FactBatch.from_rows([_make_fact(tag="Revenues")]))
+        b = SyncState.from_batch(1, FactBatch.from_rows([_make_fact(tag="SalesRevenueNet")]))
+        assert a.tag_plan != b.tag_plan
@@ -1,6 +1,10 @@
 """Tests for the Company Facts JSON parser."""
 
-from edgar_db.parser import parse_company_facts
+import random
+
+from edgar_db.models import FactBatch, FactRow
+from edgar_db.parser import parse_company_facts, parse_company_facts_batch
+from edgar_db.xbrl_tags import STATEMENT_TAGS, TAG_LOOKUP
 
 
 class TestParseCompanyFacts:
@@ -65,3 +69,71 @@ class TestParseCompanyFacts:
     def test_no_us_gaap(self) -> None:
         rows = parse_company_facts(1, {"facts": {}})
         assert rows == []
+
+
+def _reference_parse(cik: int, data: dict) -> list[FactRow]:
+    """The original statement → metric → tag → unit → entry loop, as an oracle."""
+    us_gaap = data.get("facts", {}).get("us-gaap", {})
+    rows: list[FactRow] = []
+    seen: set = set()
+    for statement_name, metrics in STATEMENT_TAGS.items():
+        for canonical_name, tag_candidates in metrics.items():
+            for tag in tag_candidates:
+                units = (us_gaap.get(tag) or {}).get("units", {})
+                unit_label = next((u for u in ["USD", "USD/shares", "shares", "pure"] if u in units), "")
+                found = False
+                for entry in units.get(unit_label) or []:
+                    form, end, fp, fy = entry.get("form", ""), entry.get("end"), entry.get("fp", ""), entry.get("fy")
+                    key = (canonical_name, end, fp, form)
+                    if form not in ("10-K", "10-Q") or not end or fy is None or key in seen:
+                        continue
+                    if entry.get("val") is None:
+                        continue
+                    seen.add(key)
+                    found = True
+                    rows.append(FactRow(
+                        cik, tag, canonical_name, statement_name, float(entry["val"]),
+                        unit_label, end, int(fy), fp, form,
+                        entry.get("filed", ""), entry.get("accn", ""),
+                    ))
+                if found:
+                    break
+    return rows
+
+
+def _random_document(rng: random.Random) -> dict:
+    tags = rng.sample(sorted(TAG_LOOKUP), 40) + ["UnmappedTag"]
+    us_gaap = {}
+    for tag in tags:
+        units = {}
+        for unit in rng.sample(["USD", "USD/shares", "shares", "pure", "EUR"], rng.randint(1, 2)):
+            units[unit] = [
+                {
+                    "end": rng.choice(["2022-12-31", "2023-03-31", "2023-06-30", None]),
+                    "val": rng.choice([1.0, 2.5, -3, None, 10 ** 9]),
+                    "fy": rng.choice([2022, 2023, None]),
+                    "fp": rng.choice(["FY", "Q1", "Q2"]),
+                    "form": rng.choice(["10-K", "10-Q", "8-K", "10-K/A"]),
+                    "filed": "2023-08-01",
+                    "accn": f"0000000001-23-{rng.randint(0, 999999):06d}",
+                }
+                for _ in range(rng.randint(0, 8))
+            ]
+        us_gaap[tag] = {"label": tag, "units": units}
+    return {"facts": {"us-gaap": us_gaap}}
+
+
+class TestSinglePassEngine:
+    def test_matches_reference_on_fixture(self, sample_facts_json: dict) -> None:
+        assert parse_company_facts(320193, sample_facts_json) == _reference_parse(320193, sample_facts_json)
+
+    def test_matches_reference_on_random_documents(self) -> None:
+        rng = random.Random(1234)
+        for _ in range(200):
+            doc = _random_document(rng)
+            assert parse_company_facts(7, doc) == _reference_parse(7, doc)
+
+    def test_batch_matches_rows(self, sample_facts_json: dict) -> None:
+        batch = parse_company_facts_batch(320193, sample_facts_json)
+        assert isinstance(batch, FactBatch)
+        assert list(batch) == parse_company_facts(320193, sample_facts_json)
@@ -0,0 +1,68 @@
+"""Tests for the fetch/parse/write download pipeline."""
+
+from __future__ import annotations
+
+import sqlite3
+
+import httpx
+import pytest
+
+from edgar_db.client import EdgarClient
+from edgar_db.db import connect_db
+from edgar_db.downloader import download_batch, refresh_ticker_map
+from edgar_db.pipeline import download_pipelined
+
+TICKERS = ["AAPL", "MSFT", "AMZN", "ZZZZ"]
+SQL = "SELECT cik, canonical_name, period_end, form, value FROM facts ORDER BY 1, 2, 3, 4"
+
+
+class TestPipeline:
+    @pytest.mark.parametrize("max_in_flight", [1, 2, 16])
+    def test_matches_sequential(
+        self, tmp_path, client: EdgarClient, mock_sec, max_in_flight: int
+    ) -> None:
+        seq_conn = connect_db(tmp_path / "seq.db")
+        pipe_conn = connect_db(tmp_path / "pipe.db")
+        seq = download_batch(seq_conn, client, TICKERS)
+        pipe = download_batch(
+            pipe_conn, client, TICKERS, workers=2, max_in_flight=max_in_flight
+        )
+        assert pipe == seq
+        assert pipe["ZZZZ"] == -1
+        assert pipe_conn.execute(SQL).fetchall() == seq_conn.execute(SQL).fetchall()
+
+    def test_stage_stats(self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec) -> None:
+        refresh_ticker_map(tmp_db, client)
+        messages: list[str] = []
+        results, stats = download_pipelined(
+            tmp_db, client, [("AAPL", 320193), ("MSFT", 789019), ("AMZN", 1018724)],
+            workers=2, progress_callback=lambda msg, i, total: messages.append(msg),
+        )
+        assert all(v > 0 for v in results.values())
+        assert (stats.fetch.items, stats.parse.items, stats.write.items) == (3, 3, 3)
+        assert stats.summary().startswith("pipeline fetch 3 in ")
+        assert messages == ["AAPL", "MSFT", "AMZN"]
+
+    def test_fetch_and_parse_errors(
+        self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec
+    ) -> None:
+        mock_sec.get(
+            "https://data.sec.gov/api/xbrl/companyfacts/CIK0000789019.json"
+        ).mock(return_value=httpx.Response(404))
+        mock_sec.get(
+            "https://data.sec.gov/api/xbrl/companyfacts/CIK0001018724.json"
+        ).mock(return_value=httpx.Response(200, content=b"{not json"))
+        results = download_batch(tmp_db, client, ["AAPL", "MSFT", "AMZN"], workers=2)
+        assert results["AAPL"] > 0
+        assert results["MSFT"] == -1
+        assert results["AMZN"] == -1
+
+    def test_skips_fresh(self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec) -> None:
+        download_batch(tmp_db, client, ["AAPL"], workers=2)
+        assert download_batch(tmp_db, client, ["AAPL"], workers=2) == {"AAPL": 0}
+
+    def test_rejects_concurrency_with_workers(
+        self, tmp_db: sqlite3.Connection, client: EdgarClient
+    ) -> None:
+        with pytest.raises(ValueError):
+            download_batch(tmp_db, client, ["AAPL"], workers=2, concurrency=2)
@@ -3,31 +3,26 @@
 from __future__ import annotations
 
 import sqlite3
+from pathlib import Path
 
+import pandas as pd
 import pytest
 
-from edgar_db.db import upsert_company, upsert_facts, upsert_ticker_map
-from edgar_db.models import Company, FactRow
+from edgar_db.db import (
+    connect_db,
+    drop_statement_tables,
+    materialize_statements,
+    query_facts_df,
+    rewrite_changed_metrics,
+    upsert_company,
+    upsert_facts,
+    upsert_ticker_map,
+)
+from edgar_db.models import Company
 from edgar_db.query import EdgarQuery
+from edgar_db.xbrl_tags import STATEMENT_COLUMNS
 
-
-def _make_fact(**overrides) -> FactRow:
-    defaults = dict(
-        cik=320193,
-        tag="Revenues",
-        canonical_name="revenue",
-        statement="income",
-        value=100000.0,
-        unit="USD",
-        period_end="2023-09-30",
-        fiscal_year=2023,
-        fiscal_period="FY",
-        form="10-K",
-        filed="2023-11-03",
-        accession="0000320193-23-000106",
-    )
-    defaults.update(overrides)
-    return FactRow(**defaults)
+from .conftest import _make_fact
 
 
 @pytest.fixture
@@ -91,6 +86,189 @@ class TestGetIncomeStatement:
         assert dates == sorted(dates, reverse=True)
 
 
+@pytest.fixture
+def edge_db(query_db: EdgarQuery) -> EdgarQuery:
+    upsert_facts(query_db._conn, [
+        # A comparative period restated under a later fiscal year: two rows share
+        # a period end
+        _make_fact(canonical_name="gross_profit", value=1.0, fiscal_year=2023,
+                   period_end="2022-09-24"),
+        # A metric outside STATEMENT_COLUMNS goes after the known ones
+        _make_fact(canonical_name="aardvark_income", value=2.0, fiscal_year=2023),
+        # Text that is not a date sorts as text
+        _make_fact(canonical_name="revenue", value=3.0, fiscal_year=2021,
+                   period_end="2021-02-30"),
+        _make_fact(canonical_name="revenue", value=4.0, fiscal_year=2023,
+                   fiscal_period="Q3", form="10-Q", period_end="2023-07-01"),
+    ])
+    return query_db
+
+
+def _pivot_table_statement(query: EdgarQuery, cik: int, statement: str, period: str) -> pd.DataFrame:
+    """The original pivot_table implementation, kept as the reference output."""
+    df = query_facts_df(query._conn, cik, statement=statement, period=period)
+    if df.empty:
+        return pd.DataFrame()
+    pivot = df.pivot_table(
+        index=["fiscal_year", "fiscal_period", "period_end"],
+        columns="canonical_name",
+        values="value",
+        aggfunc="first",
+    )
+    pivot = pivot.reset_index().sort_values("period_end", ascending=False)
+    index_cols = ["fiscal_year", "fiscal_period", "period_end"]
+    ordered = index_cols + [c for c in STATEMENT_COLUMNS[statement] if c in pivot.columns]
+    extra = [c for c in pivot.columns if c not in ordered]
+    return pivot[ordered + extra].reset_index(drop=True)
+
+
+class TestPivotStatement:
+    @pytest.mark.parametrize("statement", ["income", "balance", "cashflow"])
+    @pytest.mark.parametrize("period", ["annual", "quarterly", "all"])
+    def test_matches_pivot_table(self, edge_db: EdgarQuery, statement: str, period: str) -> None:
+        pd.testing.assert_frame_equal(
+            edge_db._pivot_statement("AAPL", statement, period),
+            _pivot_table_statement(edge_db, 320193, statement, period),
+        )
+
+    def test_edge_cases_are_present(self, edge_db: EdgarQuery) -> None:
+        df = edge_db.get_income_statement("AAPL")
+        assert list(df["period_end"]) == ["2023-09-30", "2022-09-24", "2022-09-24", "2021-02-30"]
+        assert list(df["fiscal_year"]) == [2023, 2022, 2023, 2021]
+        assert df.columns[-1] == "aardvark_income"
+
+    def test_unknown_statement(self, edge_db: EdgarQuery) -> None:
+        assert edge_db._pivot_statement("AAPL", "equity").empty
+
+
+def _wide_rows(conn: sqlite3.Connection) -> dict[str, list[tuple]]:
+    return {
+        statement: conn.execute(f"SELECT * FROM {statement}_wide ORDER BY 1, 2, 3, 4, 5").fetchall()
+        for statement in ("income", "balance", "cashflow")
+    }
+
+
+class TestMaterializedStatements:
+    @pytest.fixture
+    def wide_db(self, edge_db: EdgarQuery) -> EdgarQuery:
+        materialize_statements(edge_db._conn)
+        return edge_db
+
+    @pytest.mark.parametrize("statement", ["income", "balance", "cashflow"])
+    @pytest.mark.parametrize("period", ["annual", "quarterly", "all"])
+    def test_matches_pivot_table(self, wide_db: EdgarQuery, statement: str, period: str) -> None:
+        pd.testing.assert_frame_equal(
+            wide_db._pivot_statement("AAPL", statement, period),
+            _pivot_table_statement(wide_db, 320193, statement, period),
+        )
+
+    def test_row_counts(self, edge_db: EdgarQuery) -> None:
+        counts = materialize_statements(edge_db._conn)
+        # AAPL: 4 annual and 2 quarterly income rows, MSFT: 1
+        assert counts == {"income": 7, "balance": 1, "cashflow": 1}
+
+    def test_statement_is_one_read(self, wide_db: EdgarQuery) -> None:
+        statements: list[str] = []
+        wide_db._conn.set_trace_callback(statements.append)
+        wide_db.get_income_statement("AAPL")
+        wide_db._conn.set_trace_callback(None)
+        # Besides the ticker and version lookups, the statement is one read
+        assert len([sql for sql in statements if "income_wide" in sql]) == 1
+        assert not any("fact_data" in sql for sql in statements)
+
+    def test_maintained_on_write(self, wide_db: EdgarQuery) -> None:
+        conn = wide_db._conn
+        upsert_facts(conn, [
+            _make_fact(canonical_name="revenue", value=5.0, fiscal_year=2024,
+                       period_end="2024-09-28"),
+            # A new metric becomes a new column
+            _make_fact(canonical_name="zebra_income", value=6.0, fiscal_year=2024,
+                       period_end="2024-09-28"),
+        ])
+        df = wide_db.get_income_statement("AAPL")
+        assert df.iloc[0][["period_end", "revenue", "zebra_income"]].tolist() == [
+            "2024-09-28", 5.0, 6.0,
+        ]
+
+        # A metric the company no longer reports leaves its statement
+        rewrite_changed_metrics(conn, 789019, [_make_fact(cik=789019, value=7.0)])
+        conn.commit()
+        df = wide_db.get_income_statement("MSFT")
+        assert list(df.columns) == ["fiscal_year", "fiscal_period", "period_end", "revenue"]
+        assert df["revenue"].tolist() == [7.0]
+
+        written = _wide_rows(conn)
+        materialize_statements(conn)
+        assert _wide_rows(conn) == written
+
+    def test_dropped_tables_fall_back_to_facts(self, wide_db: EdgarQuery) -> None:
+        drop_statement_tables(wide_db._conn)
+        pd.testing.assert_frame_equal(
+            wide_db.get_income_statement("AAPL"),
+            _pivot_table_statement(wide_db, 320193, "income", "annual"),
+        )
+
+
+class TestStatementCache:
+    def test_repeat_is_a_hit(self, query_db: EdgarQuery) -> None:
+        first = query_db.get_income_statement("AAPL")
+        statements: list[str] = []
+        query_db._conn.set_trace_callback(statements.append)
+        second = query_db.get_income_statement("aapl")
+        query_db._conn.set_trace_callback(None)
+        pd.testing.assert_frame_equal(first, second)
+        assert statements == ["PRAGMA data_version"]
+        assert (query_db.cache_stats.hits, query_db.cache_stats.misses) == (1, 1)
+
+    def test_returns_copies(self, query_db: EdgarQuery) -> None:
+        df = query_db.get_income_statement("AAPL")
+        df["revenue"] = 0.0
+        assert query_db.get_income_statement("AAPL")["revenue"].iloc[0] == 383285000000
+
+    def test_write_to_the_company_invalidates(self, query_db: EdgarQuery) -> None:
+        query_db.get_income_statement("AAPL")
+        upsert_facts(query_db._conn, [_make_fact(value=1.0)])
+        assert query_db.get_income_statement("AAPL")["revenue"].iloc[0] == 1.0
+        assert query_db.cache_stats.misses == 2
+
+    def test_write_to_another_company_keeps_entries(self, query_db: EdgarQuery) -> None:
+        query_db.get_income_statement("AAPL")
+        upsert_facts(query_db._conn, [_make_fact(cik=789019, value=1.0)])
+        query_db.get_income_statement("AAPL")
+        assert query_db.cache_stats.hits == 1
+        assert query_db.get_income_statement("MSFT")["revenue"].iloc[0] == 1.0
+
+    def test_commit_from_another_connection_invalidates(self, query_db: EdgarQuery) -> None:
+        query_db.get_income_statement("AAPL")
+        path = query_db._conn.execute("PRAGMA database_list").fetchone()[2]
+        other = connect_db(Path(path))
+        upsert_facts(other, [_make_fact(value=1.0)])
+        other.close()
+        assert query_db.get_income_statement("AAPL")["revenue"].iloc[0] == 1.0
+
+    def test_ticker_remap_invalidates(self, query_db: EdgarQuery) -> None:
+        query_db.get_income_statement("AAPL")
+        upsert_ticker_map(query_db._conn, {"AAPL": 789019})
+        assert query_db.get_income_statement("AAPL")["revenue"].iloc[0] == 211900000000
+
+    def test_evicts_least_recently_used(self, query_db: EdgarQuery) -> None:
+        query = EdgarQuery(query_db._conn, cache_size=2)
+        query.get_income_statement("AAPL")
+        query.get_balance_sheet("AAPL")
+        query.get_income_statement("AAPL")
+        query.get_cash_flow("AAPL")  # evicts the balance sheet
+        query.get_income_statement("AAPL")
+        query.get_balance_sheet("AAPL")
+        stats = query.cache_stats
+        assert (stats.hits, stats.misses, stats.evictions) == (2, 4, 2)
+
+    def test_disabled(self, query_db: EdgarQuery) -> None:
+        query = EdgarQuery(query_db._conn, cache_size=0)
+        query.get_income_statement("AAPL")
+        query.get_income_statement("AAPL")
+        assert (query.cache_stats.hits, query.cache_stats.misses) == (0, 2)
+
+
 class TestGetBalanceSheet:
     def test_returns_data(self, query_db: EdgarQuery) -> None:
         df = query_db.get_balance_sheet("AAPL")
@@ -117,6 +295,18 @@ class TestGetMetric:
         with pytest.raises(ValueError, match="Unknown ticker"):
             query_db.get_metric("ZZZZ", "revenue")
 
+    def test_date_range(self, query_db: EdgarQuery) -> None:
+        df = query_db.get_metric("AAPL", "revenue", start="2023-01-01")
+        assert list(df["period_end"]) == ["2023-09-30"]
+        df = query_db.get_metric("AAPL", "revenue", start="2022-09-24", end="2023-09-30")
+        assert list(df["period_end"]) == ["2023-09-30", "2022-09-24"]
+        df = query_db.get_metric("AAPL", "revenue", end="2022-12-31")
+        assert list(df["period_end"]) == ["2022-09-24"]
+
+    def test_invalid_date_range(self, query_db: EdgarQuery) -> None:
+        with pytest.raises(ValueError, match="Invalid date range"):
+            query_db.get_metric("AAPL", "revenue", end="2023/09/30")
+
 
 class TestCompare:
     def test_compare_tickers(self, query_db: EdgarQuery) -> None:
@@ -128,3 +318,33 @@ class TestCompare:
     def test_compare_empty(self, query_db: EdgarQuery) -> None:
         df = query_db.compare(["ZZZZ"], "revenue")
         assert df.empty
+
+    def test_matches_per_ticker_series(self, query_db: EdgarQuery) -> None:
+        tickers = ["msft", "ZZZZ", "AAPL", "MSFT"]
+        frames = {}
+        for ticker in tickers:
+            try:
+                series = query_db.get_metric(ticker, "revenue").set_index("period_end")["value"]
+            except ValueError:
+                continue
+            frames[ticker.upper()] = series
+        expected = pd.DataFrame(frames).sort_index(ascending=False)
+        expected.index.name = "period_end"
+
+        pd.testing.assert_frame_equal(query_db.compare(tickers, "revenue"), expected)
+
+    def test_duplicate_periods_pick_fiscal_year(self, tmp_db: sqlite3.Connection) -> None:
+        upsert_ticker_map(tmp_db, {"AAPL": 320193})
+        upsert_company(tmp_db, Company(cik=320193, name="Apple Inc.", ticker="AAPL"))
+        # Q4 is labelled first, so its row precedes FY in key order
+        upsert_facts(tmp_db, [_make_fact(fiscal_period="Q4", value=1.0)])
+        upsert_facts(tmp_db, [_make_fact(value=2.0)])
+        df = EdgarQuery(tmp_db).compare(["AAPL"], "revenue")
+        assert df.loc["2023-09-30", "AAPL"] == 2.0
+
+    def test_single_query(self, query_db: EdgarQuery) -> None:
+        statements: list[str] = []
+        query_db._conn.set_trace_callback(statements.append)
+        query_db.compare(["AAPL", "MSFT", "ZZZZ"], "revenue")
+        query_db._conn.set_trace_callback(None)
+        assert len(statements) == 1
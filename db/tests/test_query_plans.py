@@ -0,0 +1,252 @@
+"""EXPLAIN QUERY PLAN regression tests for the hot query paths.
+
+Each test records the statements a public function actually runs (through
+the connection's trace callback) and checks their query plans. A schema or
+query change that turns an index search into a full scan of a large table,
+or adds a sort to a query designed to read in index order, fails here.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+from typing import Callable
+
+import pytest
+
+from edgar_db.db import (
+    filing_watermarks,
+    get_db_stats,
+    get_sync_state,
+    insert_missing_companies,
+    materialize_statements,
+    merge_facts,
+    merge_frame_facts,
+    query_facts_df,
+    record_submissions,
+    remap_raw_facts,
+    resolve_cik,
+    rewrite_changed_metrics,
+    store_frame_values,
+    store_raw_facts,
+    ticker_freshness,
+    touch_companies,
+    upsert_company,
+    upsert_facts,
+    upsert_ticker_map,
+    write_company_facts,
+)
+from edgar_db.models import Company, FactRow
+from edgar_db.parser import encode_raw_facts
+from edgar_db.query import EdgarQuery
+
+from .conftest import _make_fact
+
+# Tables that grow with the universe; anything else is a small lookup
+LARGE_TABLES = {
+    "fact_data", "raw_facts", "raw_tags", "labels", "canonical_metrics", "companies", "ticker_map",
+    "sync_state", "submission_state", "download_jobs",
+    "income_wide", "balance_wide", "cashflow_wide", "fact_versions", "frame_facts",
+}
+
+_SOURCE_RE = re.compile(
+    r"\b(?:FROM|JOIN|INTO|UPDATE)\s+(?:main\.|temp\.)?(\w+)(?:\s+(?:AS\s+)?(\w+))?",
+    re.IGNORECASE,
+)
+_NOT_ALIASES = {
+    "where", "on", "join", "left", "inner", "cross", "group", "order", "limit",
+    "union", "except", "select", "values", "set", "using", "as", "default",
+}
+
+
+def _aliases(sql: str) -> dict[str, str]:
+    names: dict[str, str] = {}
+    for table, alias in _SOURCE_RE.findall(sql):
+        names[table] = table
+        if alias and alias.lower() not in _NOT_ALIASES:
+            names[alias] = table
+    return names
+
+
+def _plans(conn: sqlite3.Connection, fn: Callable[[], object]) -> list[tuple[str, list[str]]]:
+    """``(sql, plan details)`` for every data statement ``fn`` runs."""
+    statements: list[str] = []
+    conn.set_trace_callback(statements.append)
+    try:
+        fn()
+    finally:
+        conn.set_trace_callback(None)
+    plans = []
+    for sql in dict.fromkeys(statements):
+        verb = sql.lstrip().split(None, 1)[0].upper()
+        if verb not in {"SELECT", "WITH", "INSERT", "UPDATE", "DELETE"}:
+            continue
+        details = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+        plans.append((sql, details))
+    return plans
+
+
+def _scans(conn: sqlite3.Connection, plans: list[tuple[str, list[str]]]) -> set[str]:
+    """Large tables read by a full scan in any of ``plans``."""
+    views = " ".join(row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'view'"
+    ))
+    found = set()
+    for sql, details in plans:
+        names = _aliases(sql + " " + views)
+        for detail in details:
+            m = re.match(r"SCAN (\w+)", detail)
+            if m and names.get(m.group(1), m.group(1)) in LARGE_TABLES:
+                found.add(names.get(m.group(1), m.group(1)))
+    return found
+
+
+def _sorts(plans: list[tuple[str, list[str]]]) -> list[str]:
+    return [sql for sql, details in plans if any("TEMP B-TREE" in d for d in details)]
+
+
+def _facts(cik: int) -> list[FactRow]:
+    rows = []
+    for year in range(2015, 2024):
+        for name, statement in (("revenue", "income"), ("net_income", "income"),
+                                ("total_assets", "balance")):
+            rows.append(_make_fact(cik=cik, canonical_name=name, statement=statement,
+                                   period_end=f"{year}-09-30", fiscal_year=year))
+            rows.append(_make_fact(cik=cik, canonical_name=name, statement=statement,
+                                   period_end=f"{year}-06-30", fiscal_year=year,
+                                   fiscal_period="Q3", form="10-Q"))
+    return rows
+
+
+@pytest.fixture
+def seeded(tmp_db: sqlite3.Connection) -> sqlite3.Connection:
+    upsert_ticker_map(tmp_db, {"AAPL": 320193, "MSFT": 789019, "GOOGL": 1652044})
+    for cik, ticker in ((320193, "AAPL"), (789019, "MSFT"), (1652044, "GOOGL")):
+        upsert_company(tmp_db, Company(cik=cik, name=ticker, ticker=ticker))
+        upsert_facts(tmp_db, _facts(cik))
+    raw = {"facts": {"us-gaap": {"Revenues": {"units": {"USD": [
+        {"end": "2023-09-30", "val": 5, "fy": 2023, "fp": "FY", "form": "10-K",
+         "filed": "2023-11-03", "accn": "0000320193-23-000106"},
+    ]}}}}}
+    store_raw_facts(tmp_db, 320193, encode_raw_facts(raw))
+    tmp_db.commit()
+    return tmp_db
+
+
+@pytest.fixture
+def materialized(seeded: sqlite3.Connection) -> sqlite3.Connection:
+    materialize_statements(seeded)
+    return seeded
+
+
+_QUERIES: dict[str, Callable[[sqlite3.Connection], object]] = {
+    "resolve_cik": lambda c: resolve_cik(c, "aapl"),
+    "ticker_freshness": lambda c: ticker_freshness(c, ["AAPL", "MSFT"]),
+    "query_facts_df": lambda c: query_facts_df(c, 320193, "income", "annual"),
+    "query_facts_df_all": lambda c: query_facts_df(c, 320193, period="all"),
+    "filing_watermarks": lambda c: filing_watermarks(c, [320193, 789019]),
+    "get_sync_state": lambda c: get_sync_state(c, 320193),
+    "income_statement": lambda c: EdgarQuery(c).get_income_statement("AAPL"),
+    "quarterly_balance": lambda c: EdgarQuery(c).get_balance_sheet("AAPL", "quarterly"),
+    "cash_flow": lambda c: EdgarQuery(c).get_cash_flow("AAPL"),
+    "get_metric": lambda c: EdgarQuery(c).get_metric("AAPL", "revenue"),
+    "get_metric_range": lambda c: EdgarQuery(c).get_metric(
+        "AAPL", "revenue", start="2018-01-01", end="2020-12-31"
+    ),
+    "compare": lambda c: EdgarQuery(c).compare(["AAPL", "MSFT"], "revenue"),
+    "screen": lambda c: EdgarQuery(c).screen("revenue", "CY2023", min_value=1.0, limit=10),
+    "compare_frames": lambda c: EdgarQuery(c).compare_frames(["AAPL", "MSFT"], "revenue"),
+}
+
+_WRITES: dict[str, Callable[[sqlite3.Connection], object]] = {
+    "merge_facts": lambda c: merge_facts(c, _facts(320193)[:5] + [_make_fact(value=9.0)]),
+    "merge_frame_facts": lambda c: merge_frame_facts(
+        c, [_make_fact(canonical_name="gross_profit"), _make_fact(cik=789019, period_end="2023-12-31")]
+    ),
+    "store_frame_values": lambda c: store_frame_values(
+        c, [_make_fact(), _make_fact(cik=789019, period_end="2023-06-30")], "CY2023"
+    ),
+    "write_company_facts": lambda c: write_company_facts(
+        c, Company(cik=320193, name="AAPL", ticker="AAPL"), _facts(320193)
+    ),
+    "rewrite_changed_metrics": lambda c: rewrite_changed_metrics(c, 320193, _facts(320193)[1:]),
+    "insert_missing_companies": lambda c: insert_missing_companies(c, {1750: "AAR CORP"}),
+    "touch_companies": lambda c: touch_companies(c, [320193], "2024-01-01"),
+    "record_submissions": lambda c: record_submissions(
+        c, {320193: ("0000320193-24-000001", "2024-02-01")}
+    ),
+    "remap_raw_facts": lambda c: remap_raw_facts(c, [320193]),
+}
+
+
+class TestNoFullScans:
+    @pytest.mark.parametrize("name", sorted(_QUERIES))
+    def test_reads(self, seeded: sqlite3.Connection, name: str) -> None:
+        plans = _plans(seeded, lambda: _QUERIES[name](seeded))
+        assert plans, "nothing was traced"
+        assert _scans(seeded, plans) == set()
+
+    @pytest.mark.parametrize("name", sorted(_WRITES))
+    def test_writes(self, seeded: sqlite3.Connection, name: str) -> None:
+        plans = _plans(seeded, lambda: _WRITES[name](seeded))
+        assert plans, "nothing was traced"
+        assert _scans(seeded, plans) == set()
+
+    @pytest.mark.parametrize("name", sorted(_WRITES))
+    def test_writes_maintaining_statements(
+        self, materialized: sqlite3.Connection, name: str
+    ) -> None:
+        plans = _plans(materialized, lambda: _WRITES[name](materialized))
+        assert _scans(materialized, plans) == set()
+
+    def test_detects_a_dropped_index(self, seeded: sqlite3.Connection) -> None:
+        seeded.execute("DROP INDEX idx_ticker_map_nocase")
+        plans = _plans(seeded, lambda: resolve_cik(seeded, "aapl"))
+        assert _scans(seeded, plans) == {"ticker_map"}
+
+    def test_db_stats_counts_are_the_only_scans(self, seeded: sqlite3.Connection) -> None:
+        plans = _plans(seeded, lambda: get_db_stats(seeded))
+        assert _scans(seeded, plans) <= {"companies", "fact_data", "ticker_map"}
+
+
+class TestIndexOrder:
+    def test_metric_series_reads_the_clustered_key_in_order(
+        self, seeded: sqlite3.Connection
+    ) -> None:
+        plans = _plans(seeded, lambda: EdgarQuery(seeded).get_metric("AAPL", "revenue"))
+        assert _sorts(plans) == []
+        details = [d for _, ds in plans for d in ds]
+        assert any(
+            d.startswith("SEARCH f USING PRIMARY KEY (cik=? AND canonical_id=?)") for d in details
+        )
+
+    def test_metric_date_range_is_a_key_range(self, seeded: sqlite3.Connection) -> None:
+        plans = _plans(seeded, lambda: _QUERIES["get_metric_range"](seeded))
+        assert _sorts(plans) == []
+        details = [d for _, ds in plans for d in ds]
+        assert (
+            "SEARCH f USING PRIMARY KEY"
+            " (cik=? AND canonical_id=? AND period_end>? AND period_end<?)"
+        ) in details
+
+    def test_statement_reads_by_company_key(self, seeded: sqlite3.Connection) -> None:
+        plans = _plans(seeded, lambda: query_facts_df(seeded, 320193, "income", "annual"))
+        details = [d for _, ds in plans for d in ds]
+        assert any(d.startswith("SEARCH f USING PRIMARY KEY (cik=?") for d in details)
+
+    def test_ticker_lookups_use_covering_indexes(self, seeded: sqlite3.Connection) -> None:
+        plans = _plans(seeded, lambda: resolve_cik(seeded, "aapl"))
+        plans += _plans(seeded, lambda: insert_missing_companies(seeded, {1750: "AAR"}))
+        details = [d for _, ds in plans for d in ds]
+        assert "SEARCH ticker_map USING COVERING INDEX idx_ticker_map_nocase (ticker=?)" in details
+        assert "SEARCH ticker_map USING COVERING INDEX idx_ticker_map_cik (cik=?)" in details
+
+    @pytest.mark.parametrize("period", ["annual", "quarterly"])
+    def test_materialized_statement_is_one_key_range(
+        self, materialized: sqlite3.Connection, period: str
+    ) -> None:
+        query = EdgarQuery(materialized)
+        plans = _plans(materialized, lambda: query.get_income_statement("AAPL", period))
+        assert _sorts(plans) == []
+        details = [d for _, ds in plans for d in ds]
+        assert "SEARCH income_wide USING PRIMARY KEY (cik=? AND form=?)" in details
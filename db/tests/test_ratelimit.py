@@ -0,0 +1,178 @@
+"""Tests for the shared adaptive rate limiter."""
+
+from __future__ import annotations
+
+import multiprocessing
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+
+import pytest
+
+from edgar_db.ratelimit import RateLimiter, SharedSlots, is_rate_limited, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def _limiter(clock: FakeClock, **kwargs) -> RateLimiter:
+    return RateLimiter(10.0, jitter=0.0, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+class TestScheduling:
+    def test_spacing(self, clock: FakeClock) -> None:
+        limiter = _limiter(clock)
+        delays = [limiter.wait() for _ in range(4)]
+        assert delays == pytest.approx([0.0, 0.1, 0.1, 0.1])
+
+    def test_no_stall_after_idle(self, clock: FakeClock) -> None:
+        limiter = _limiter(clock)
+        limiter.wait()
+        clock.now += 60
+        assert limiter.wait() == 0.0
+        assert limiter.wait() == pytest.approx(0.1)
+
+    def test_sustained_rate_at_ceiling(self, clock: FakeClock) -> None:
+        limiter = _limiter(clock)
+        start = clock.now
+        for _ in range(101):
+            limiter.wait()
+            limiter.on_success()
+        assert clock.now - start == pytest.approx(10.0)
+
+    def test_threads_share_slots(self) -> None:
+        limiter = RateLimiter(1000.0)
+        delays: list[float] = []
+        lock = threading.Lock()
+
+        def worker() -> None:
+            for _ in range(10):
+                d = limiter.reserve()
+                with lock:
+                    delays.append(d)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # 40 distinct slots 1ms apart: the largest reservation is ~39ms out
+        assert max(delays) == pytest.approx(0.039, abs=0.005)
+
+
+class TestAimd:
+    def test_backoff_and_recovery(self, clock: FakeClock) -> None:
+        limiter = _limiter(clock)
+        limiter.on_throttle()
+        assert limiter.rate == 5.0
+        limiter.on_throttle()
+        assert limiter.rate == 2.5
+        for _ in range(100):
+            limiter.on_success()
+        assert limiter.rate == 10.0
+
+    def test_floor(self, clock: FakeClock) -> None:
+        limiter = _limiter(clock, min_rate=1.0)
+        for _ in range(20):
+            limiter.on_throttle()
+        assert limiter.rate == 1.0
+
+    def test_retry_after_pauses_everyone(self, clock: FakeClock) -> None:
+        limiter = _limiter(clock)
+        limiter.wait()
+        limiter.on_throttle(retry_after=5.0)
+        assert limiter.wait() == pytest.approx(5.0)
+        # Then spaced at the reduced rate
+        assert limiter.wait() == pytest.approx(0.2)
+
+    def test_jitter_lengthens_pause(self, clock: FakeClock) -> None:
+        limiter = RateLimiter(10.0, jitter=0.5, clock=clock, sleep=clock.sleep)
+        pause = limiter.on_throttle(retry_after=2.0)
+        assert 2.0 <= pause <= 3.0
+
+    def test_metrics(self, clock: FakeClock) -> None:
+        limiter = _limiter(clock)
+        limiter.wait()
+        limiter.wait()
+        limiter.on_throttle(retry_after=1.0)
+        m = limiter.metrics
+        assert (m.requests, m.backoff_events, m.allowed_rate) == (2, 1, 5.0)
+        assert m.throttled_seconds == pytest.approx(0.1)
+        assert m.summary().startswith("rate 5.0/s allowed, 2 requests, 1 backoffs")
+
+
+def _reserve_slots(path: str, count: int) -> list[float]:
+    limiter = RateLimiter(100.0, shared=SharedSlots(Path(path), "TestApp test@example.com"))
+    starts = []
+    for _ in range(count):
+        now = time.time()
+        starts.append(now + limiter.reserve())
+    return starts
+
+
+class TestSharedSlots:
+    def test_limiters_share_one_schedule(self, tmp_path: Path, clock: FakeClock) -> None:
+        path = tmp_path / "ratelimit.db"
+        a = _limiter(clock, shared=SharedSlots(path, "ua"))
+        b = _limiter(clock, shared=SharedSlots(path, "ua"))
+        assert [a.reserve(), b.reserve(), a.reserve()] == pytest.approx([0.0, 0.1, 0.2])
+
+    def test_keys_are_independent(self, tmp_path: Path, clock: FakeClock) -> None:
+        path = tmp_path / "ratelimit.db"
+        a = _limiter(clock, shared=SharedSlots(path, "ua-1"))
+        b = _limiter(clock, shared=SharedSlots(path, "ua-2"))
+        assert [a.reserve(), b.reserve()] == [0.0, 0.0]
+
+    def test_throttle_pauses_other_processes(self, tmp_path: Path, clock: FakeClock) -> None:
+        path = tmp_path / "ratelimit.db"
+        a = _limiter(clock, shared=SharedSlots(path, "ua"))
+        b = _limiter(clock, shared=SharedSlots(path, "ua"))
+        a.on_throttle(retry_after=5.0)
+        assert b.reserve() == pytest.approx(5.0)
+        assert b.rate == 10.0  # only the throttled process backs off
+
+    def test_processes_never_exceed_rate(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "ratelimit.db")
+        SharedSlots(Path(path), "TestApp test@example.com").close()
+        with multiprocessing.get_context("spawn").Pool(3) as pool:
+            results = pool.starmap(_reserve_slots, [(path, 10)] * 3)
+        starts = sorted(t for r in results for t in r)
+        gaps = [b - a for a, b in zip(starts, starts[1:])]
+        # 30 slots from three processes, all at least 1/rate apart
+        assert min(gaps) >= 0.009
+
+
+class TestParseRetryAfter:
+    def test_seconds(self) -> None:
+        assert parse_retry_after("7") == 7.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+    def test_http_date(self) -> None:
+        when = datetime.now(timezone.utc) + timedelta(seconds=30)
+        assert 28 <= parse_retry_after(format_datetime(when, usegmt=True)) <= 30
+
+
+class TestIsRateLimited:
+    def test_matches_yahoo_throttling(self) -> None:
+        class YFRateLimitError(Exception):
+            pass
+
+        assert is_rate_limited(YFRateLimitError("slow down"))
+        assert is_rate_limited(RuntimeError("429 Too Many Requests"))
+        assert not is_rate_limited(ValueError("no data for ticker"))
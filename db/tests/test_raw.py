@@ -0,0 +1,160 @@
+"""Tests for the raw fact store and SQL-side canonical mapping."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from edgar_db.archive import PayloadArchive
+from edgar_db.db import materialize_statements, remap_raw_facts, store_raw_facts, upsert_company
+from edgar_db.models import FACT_COLUMNS, Company
+from edgar_db.parser import encode_raw_facts, parse_company_facts
+from edgar_db.reparse import reparse_archive
+from edgar_db.xbrl_tags import STATEMENT_TAGS
+
+CIK = 320193
+
+
+def _entry(end: str, val: float | None, form: str = "10-K", fp: str | None = "FY",
+           fy: int | None = 2023, filed: str = "2023-11-03",
+           accn: str = "0000320193-23-000106") -> dict:
+    entry = {"end": end, "val": val, "fy": fy, "form": form, "filed": filed, "accn": accn}
+    if fp is not None:
+        entry["fp"] = fp
+    return entry
+
+
+# Exercises every rule the parser applies
+TRICKY = {
+    "entityName": "Tricky Inc.",
+    "facts": {"us-gaap": {
+        "Revenues": {"units": {
+            "USD": [
+                _entry("2023-09-30", 100),
+                _entry("2023-09-30", 999, filed="2024-11-01"),  # duplicate key: first wins
+                _entry("2023-06-30", 50, form="8-K"),  # not a periodic form
+                _entry("2023-06-30", None, form="10-Q", fp="Q3"),  # no value
+                _entry("2023-06-30", 40, form="10-Q", fp="Q3", fy=None),  # no fiscal year
+                _entry("2023-06-30", 60, form="10-Q", fp=None, accn="odd-accession"),
+            ],
+            "EUR": [_entry("2022-09-30", 7)],  # unit not in UNIT_PRIORITY
+        }},
+        # Lower priority for revenue: ignored while Revenues has data
+        "RevenueFromContractWithCustomerExcludingAssessedTax": {"units": {
+            "USD": [_entry("2023-09-30", 101), _entry("2022-09-30", 91)],
+        }},
+        # USD outranks shares, but holds no usable entries: fall through to ProfitLoss
+        "NetIncomeLoss": {"units": {
+            "shares": [_entry("2023-09-30", 5)],
+            "USD": [_entry("2023-09-30", 5, form="8-K")],
+        }},
+        "ProfitLoss": {"units": {"USD": [_entry("2023-09-30", 30)]}},
+        "EarningsPerShareBasic": {"units": {"USD/shares": [_entry("2023-09-30", 6.13)]}},
+        "SomethingUnmapped": {"units": {"USD": [_entry("2023-09-30", 1)]}},
+    }},
+}
+
+
+def _stored(conn: sqlite3.Connection) -> list[tuple]:
+    cols = ", ".join(FACT_COLUMNS)
+    return sorted(conn.execute(f"SELECT {cols} FROM facts").fetchall())
+
+
+def _load_raw(conn: sqlite3.Connection, data: dict) -> None:
+    upsert_company(conn, Company(cik=CIK, name="Tricky Inc.", ticker="TRKY"))
+    store_raw_facts(conn, CIK, encode_raw_facts(data))
+    conn.commit()
+
+
+class TestEncoding:
+    def test_compact_columns(self, tmp_db: sqlite3.Connection) -> None:
+        _load_raw(tmp_db, TRICKY)
+        row = tmp_db.execute(
+            """SELECT end_day, accession, filed_day FROM raw_facts r
+               JOIN labels t ON t.id = r.tag_id
+               JOIN labels u ON u.id = r.unit_id
+               WHERE t.label = 'Revenues' AND u.label = 'USD' AND ord = 0"""
+        ).fetchone()
+        assert row == (19630, 32019323000106, 19664)
+        odd = tmp_db.execute(
+            "SELECT accession FROM raw_facts WHERE typeof(accession) = 'text'"
+        ).fetchall()
+        assert odd == [("odd-accession",)]
+
+    def test_keeps_every_entry(self, tmp_db: sqlite3.Connection) -> None:
+        _load_raw(tmp_db, TRICKY)
+        count = tmp_db.execute("SELECT COUNT(*) FROM raw_facts").fetchone()[0]
+        assert count == 14
+
+
+class TestRemap:
+    @pytest.mark.parametrize("fixture", ["tricky", "sample"])
+    def test_matches_parser(
+        self, tmp_db: sqlite3.Connection, sample_facts_json: dict, fixture: str
+    ) -> None:
+        data = TRICKY if fixture == "tricky" else sample_facts_json
+        _load_raw(tmp_db, data)
+        remap_raw_facts(tmp_db)
+        expected = sorted(
+            tuple(getattr(row, col) for col in FACT_COLUMNS)
+            for row in parse_company_facts(CIK, data)
+        )
+        assert _stored(tmp_db) == expected
+
+    def test_remap_after_priority_change(
+        self, tmp_db: sqlite3.Connection, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        _load_raw(tmp_db, TRICKY)
+        remap_raw_facts(tmp_db)
+
+        reordered = list(reversed(STATEMENT_TAGS["income"]["revenue"]))
+        monkeypatch.setitem(STATEMENT_TAGS["income"], "revenue", reordered)
+        counts, deleted = remap_raw_facts(tmp_db)
+
+        revenue = tmp_db.execute(
+            """SELECT period_end, value, tag FROM facts
+               WHERE canonical_name = 'revenue' ORDER BY period_end"""
+        ).fetchall()
+        tag = "RevenueFromContractWithCustomerExcludingAssessedTax"
+        assert revenue == [("2022-09-30", 91.0, tag), ("2023-09-30", 101.0, tag)]
+        # The FY row is rewritten, the 2022 row added, the Q3 row removed
+        assert (counts.inserted, counts.updated, deleted) == (1, 1, 1)
+
+        unchanged, deleted = remap_raw_facts(tmp_db)
+        assert (unchanged.written, deleted) == (0, 0)
+
+    def test_remap_maintains_materialized_statements(
+        self, tmp_db: sqlite3.Connection, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        _load_raw(tmp_db, TRICKY)
+        remap_raw_facts(tmp_db)
+        materialize_statements(tmp_db)
+
+        reordered = list(reversed(STATEMENT_TAGS["income"]["revenue"]))
+        monkeypatch.setitem(STATEMENT_TAGS["income"], "revenue", reordered)
+        remap_raw_facts(tmp_db)
+
+        sql = "SELECT * FROM income_wide ORDER BY 1, 2, 3, 4, 5"
+        remapped = tmp_db.execute(sql).fetchall()
+        materialize_statements(tmp_db)
+        assert tmp_db.execute(sql).fetchall() == remapped
+        # The Q3 revenue row was removed, leaving no quarterly income
+        assert {row[1] for row in remapped} == {"10-K"}
+
+
+class TestReparseRaw:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_loads_archive(
+        self, tmp_db: sqlite3.Connection, tmp_path: Path, workers: int
+    ) -> None:
+        archive = PayloadArchive(tmp_path / "archive")
+        archive.store(CIK, json.dumps(TRICKY).encode())
+        result = reparse_archive(tmp_db, archive, workers=workers, raw=True)
+
+        assert (result.companies, result.raw_rows, result.errors) == (1, 14, 0)
+        assert result.metrics == len(parse_company_facts(CIK, TRICKY))
+        name = tmp_db.execute("SELECT name FROM companies WHERE cik = ?", (CIK,)).fetchone()
+        assert name == ("Tricky Inc.",)
@@ -5,6 +5,7 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from edgar_db.ratelimit import RateLimiter
 from secmaster_db.config import Config
 
 
@@ -61,8 +62,7 @@ def test_yf_get_info_retry(yf_client) -> None:
 
 
 def test_yf_throttle(yf_client) -> None:
-    yf_client._config.rate_limit = 10.0
-    yf_client._min_interval = 0.1
+    yf_client._limiter = RateLimiter(10.0)
 
     start = time.monotonic()
     yf_client._throttle()
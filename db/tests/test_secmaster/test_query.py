@@ -42,6 +42,12 @@ def test_get_security(populated_db: sqlite3.Connection) -> None:
     assert sec.style_box == "large_cap"
 
 
+def test_market_caps(populated_db: sqlite3.Connection) -> None:
+    caps = SecMasterQuery(populated_db).market_caps()
+    assert caps["MSFT"] == 2_800_000_000_000.0
+    assert caps["SMCO"] == 500_000_000.0
+
+
 def test_get_security_case_insensitive(populated_db: sqlite3.Connection) -> None:
     q = SecMasterQuery(populated_db)
     sec = q.get_security("aapl")
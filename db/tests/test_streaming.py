@@ -0,0 +1,92 @@
+"""Tests for incremental companyfacts decoding."""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+import respx
+
+from edgar_db.client import BASE_URL, EdgarClient
+from edgar_db.config import Config
+from edgar_db.parser import parse_company_facts
+from edgar_db.streaming import WANTED_TAGS, CompanyFactsDecoder, decode_company_facts
+
+
+def _chunks(data: bytes, size: int = 64):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+@pytest.fixture
+def noisy_facts(sample_facts_json: dict) -> dict:
+    """Sample document plus namespaces and tags the parser never reads."""
+    doc = json.loads(json.dumps(sample_facts_json))
+    doc["facts"]["dei"] = {"EntityCommonStockSharesOutstanding": {"units": {"shares": []}}}
+    doc["facts"]["us-gaap"]["SomeUnmappedTag"] = {
+        "label": "x", "units": {"USD": [{"end": "2023-09-30", "val": 1, "fy": 2023,
+                                         "fp": "FY", "form": "10-K"}]},
+    }
+    return doc
+
+
+def _ijson_available() -> bool:
+    try:
+        import ijson  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class TestDecodeCompanyFacts:
+    @pytest.mark.skipif(not _ijson_available(), reason="ijson not installed")
+    def test_incremental_keeps_only_mapped_tags(self, noisy_facts: dict) -> None:
+        data = decode_company_facts(_chunks(json.dumps(noisy_facts).encode()))
+        assert data["entityName"] == "Apple Inc."
+        assert data["cik"] == 320193
+        assert set(data["facts"]) == {"us-gaap"}
+        assert "SomeUnmappedTag" not in data["facts"]["us-gaap"]
+        assert "Revenues" in data["facts"]["us-gaap"]
+
+    @pytest.mark.skipif(not _ijson_available(), reason="ijson not installed")
+    def test_unmapped_tags_never_built(self, noisy_facts: dict) -> None:
+        import ijson
+
+        mapped = [t for t in noisy_facts["facts"]["us-gaap"] if t in WANTED_TAGS]
+        with patch.object(ijson, "ObjectBuilder", wraps=ijson.ObjectBuilder) as builder:
+            data = decode_company_facts(_chunks(json.dumps(noisy_facts).encode()))
+        assert builder.call_count == len(mapped)
+        assert list(data["facts"]["us-gaap"]) == mapped
+
+    def test_fallback_without_ijson(self, noisy_facts: dict) -> None:
+        with patch("edgar_db.streaming._import_ijson", side_effect=ImportError):
+            data = decode_company_facts(_chunks(json.dumps(noisy_facts).encode()))
+        assert "SomeUnmappedTag" not in data["facts"]["us-gaap"]
+        assert data["entityName"] == "Apple Inc."
+
+    def test_parse_results_unchanged(self, noisy_facts: dict) -> None:
+        decoded = decode_company_facts(_chunks(json.dumps(noisy_facts).encode()))
+        assert parse_company_facts(320193, decoded) == parse_company_facts(320193, noisy_facts)
+
+    def test_counts_bytes(self, noisy_facts: dict) -> None:
+        body = json.dumps(noisy_facts).encode()
+        decoder = CompanyFactsDecoder()
+        for chunk in _chunks(body):
+            decoder.feed(chunk)
+        decoder.result()
+        assert decoder.bytes_read == len(body)
+
+
+class TestStreamingClient:
+    @respx.mock
+    def test_get_company_facts_streaming(self, noisy_facts: dict) -> None:
+        config = Config(user_agent="TestApp test@example.com", rate_limit=100.0, stream_parse=True)
+        respx.get(f"{BASE_URL}/api/xbrl/companyfacts/CIK0000320193.json").mock(
+            return_value=httpx.Response(200, json=noisy_facts)
+        )
+        with EdgarClient(config) as client:
+            data = client.get_company_facts(320193)
+        assert data["entityName"] == "Apple Inc."
+        assert "SomeUnmappedTag" not in data["facts"]["us-gaap"]
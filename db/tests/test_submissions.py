@@ -0,0 +1,119 @@
+"""Tests for filing-driven change detection (sync mode)."""
+
+from __future__ import annotations
+
+import sqlite3
+
+import httpx
+import pytest
+
+from edgar_db.client import EdgarClient
+from edgar_db.downloader import download_batch
+from edgar_db.submissions import has_new_filing, latest_periodic_filing
+
+SUBMISSIONS_URL = "https://data.sec.gov/submissions/CIK{cik:010d}.json"
+CIKS = {"AAPL": 320193, "MSFT": 789019, "AMZN": 1018724}
+
+
+def _submissions(*filings: tuple[str, str, str]) -> dict:
+    """Submissions feed with (accession, filing date, form) entries, newest first."""
+    return {
+        "cik": "320193",
+        "name": "Apple Inc.",
+        "filings": {
+            "recent": {
+                "accessionNumber": [f[0] for f in filings],
+                "filingDate": [f[1] for f in filings],
+                "form": [f[2] for f in filings],
+            },
+            "files": [],
+        },
+    }
+
+
+def _mock_submissions(mock_sec, feeds: dict[str, dict]) -> dict:
+    return {
+        ticker: mock_sec.get(SUBMISSIONS_URL.format(cik=CIKS[ticker])).mock(
+            return_value=httpx.Response(200, json=feed)
+        )
+        for ticker, feed in feeds.items()
+    }
+
+
+def _facts_route(mock_sec, ticker: str):
+    return mock_sec.get(
+        f"https://data.sec.gov/api/xbrl/companyfacts/CIK{CIKS[ticker]:010d}.json"
+    )
+
+
+OLD_10Q = ("0000320193-23-000077", "2023-08-04", "10-Q")
+NEW_10Q = ("0000320193-24-000006", "2024-02-02", "10-Q")
+
+
+class TestLatestFiling:
+    def test_ignores_other_forms(self) -> None:
+        feed = _submissions(
+            ("0000320193-24-000010", "2024-02-10", "8-K"),
+            NEW_10Q,
+            ("0000320193-23-000106", "2023-11-03", "10-K"),
+        )
+        assert latest_periodic_filing(feed) == NEW_10Q[:2]
+
+    def test_no_periodic_filings(self) -> None:
+        assert latest_periodic_filing(_submissions(("x", "2024-01-01", "S-1"))) is None
+        assert latest_periodic_filing({}) is None
+
+    @pytest.mark.parametrize(
+        "latest, watermark, expected",
+        [
+            (NEW_10Q[:2], None, True),  # never synced
+            (None, ("2023-11-03", "a", ""), False),
+            (NEW_10Q[:2], ("2023-11-03", "a", ""), True),
+            (NEW_10Q[:2], ("2024-02-02", NEW_10Q[0], ""), False),
+            (NEW_10Q[:2], ("2023-11-03", "a", NEW_10Q[0]), False),  # seen last sync
+            (OLD_10Q[:2], ("2023-11-03", "a", ""), False),  # older than stored facts
+        ],
+    )
+    def test_has_new_filing(self, latest, watermark, expected: bool) -> None:
+        assert has_new_filing(latest, watermark) is expected
+
+
+class TestSyncMode:
+    @pytest.mark.parametrize("concurrency", [1, 3])
+    def test_only_new_filers_downloaded(
+        self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec, concurrency: int
+    ) -> None:
+        tickers = list(CIKS)
+        feeds = {t: _submissions(OLD_10Q) for t in tickers}
+        routes = _mock_submissions(mock_sec, feeds)
+
+        # First sync: nothing ingested yet, so everything is downloaded
+        download_batch(tmp_db, client, tickers, sync=True, concurrency=concurrency)
+        assert all(_facts_route(mock_sec, t).call_count == 1 for t in tickers)
+
+        # Nothing filed since: only the submissions feeds are fetched
+        messages: list[str] = []
+        results = download_batch(
+            tmp_db, client, tickers, sync=True, concurrency=concurrency,
+            progress_callback=lambda msg, *_: messages.append(msg),
+        )
+        assert results == {t: 0 for t in tickers}
+        assert all(_facts_route(mock_sec, t).call_count == 1 for t in tickers)
+        assert all(route.call_count == 2 for route in routes.values())
+        assert "STATS: sync checked 3 submissions, 0 with new filings" in messages
+
+        # AAPL files a new 10-Q: only it is downloaded again
+        _mock_submissions(mock_sec, {"AAPL": _submissions(NEW_10Q, OLD_10Q)})
+        download_batch(tmp_db, client, tickers, sync=True, concurrency=concurrency)
+        assert _facts_route(mock_sec, "AAPL").call_count == 2
+        assert _facts_route(mock_sec, "MSFT").call_count == 1
+
+    def test_unreadable_feed_downloads(
+        self, tmp_db: sqlite3.Connection, client: EdgarClient, mock_sec
+    ) -> None:
+        download_batch(tmp_db, client, ["AAPL"], force=True)
+        mock_sec.get(SUBMISSIONS_URL.format(cik=320193)).mock(
+            return_value=httpx.Response(404)
+        )
+        download_batch(tmp_db, client, ["AAPL"], sync=True)
+        assert _facts_route(mock_sec, "AAPL").call_count == 2
@@ -6,6 +6,7 @@ from unittest.mock import MagicMock, patch
 import pandas as pd
 import pytest
 
+from edgar_db.ratelimit import RateLimiter
 from yfinance_db.config import Config
 
 
@@ -21,8 +22,7 @@ def client():
 
 def test_throttle(client) -> None:
     """Rate limiting should space out requests."""
-    client._config.rate_limit = 10.0
-    client._min_interval = 0.1
+    client._limiter = RateLimiter(10.0)
 
     start = time.monotonic()
     client._throttle()
@@ -31,6 +31,16 @@ def test_throttle(client) -> None:
     assert elapsed >= 0.09
 
 
+def test_rate_limited_backs_off(client) -> None:
+    client._limiter = RateLimiter(100.0, sleep=lambda s: None)
+    ok = MagicMock()
+    ok.info = {"regularMarketPrice": 185.0}
+    client._yf.Ticker.side_effect = [Exception("Too Many Requests. Rate limited."), ok]
+
+    assert client.get_info("AAPL")["regularMarketPrice"] == 185.0
+    assert client.limiter.metrics.backoff_events == 1
+
+
 def test_get_info(client) -> None:
     mock_ticker = MagicMock()
     mock_ticker.info = {
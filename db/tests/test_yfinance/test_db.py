@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import sqlite3
+from pathlib import Path
+from unittest.mock import patch
 
 from yfinance_db.db import (
-    get_db_stats, upsert_company, upsert_dividends, upsert_financials,
+    connect_db, get_db_stats, upsert_company, upsert_dividends, upsert_financials,
     upsert_prices, upsert_splits, upsert_stats,
 )
 
@@ -19,17 +21,75 @@ def test_schema_creates_tables(tmp_db: sqlite3.Connection) -> None:
     )
     tables = sorted(row[0] for row in cur.fetchall())
     assert "companies" in tables
-    assert "prices" in tables
+    assert "price_data" in tables
     assert "financials" in tables
     assert "company_stats" in tables
     assert "dividends" in tables
     assert "splits" in tables
     assert "metadata" in tables
+    cur = tmp_db.execute("SELECT name FROM sqlite_master WHERE type='view'")
+    assert [row[0] for row in cur] == ["prices"]
 
 
 def test_schema_version(tmp_db: sqlite3.Connection) -> None:
     cur = tmp_db.execute("SELECT value FROM metadata WHERE key = 'schema_version'")
-    assert cur.fetchone()[0] == "1"
+    assert cur.fetchone()[0] == "2"
+
+
+def test_prices_view_presents_iso_dates(tmp_db: sqlite3.Connection) -> None:
+    upsert_company(tmp_db, _make_company())
+    upsert_prices(tmp_db, [_make_price(date="2024-01-02"), _make_price(date="2024-02-30")])
+
+    cur = tmp_db.execute("SELECT typeof(day) FROM price_data ORDER BY 1")
+    assert [row[0] for row in cur] == ["integer", "text"]
+    cur = tmp_db.execute("SELECT date, day FROM prices WHERE ticker = 'AAPL' ORDER BY day")
+    assert cur.fetchall() == [("2024-01-02", 19724), ("2024-02-30", "2024-02-30")]
+
+
+def test_v1_prices_migrate_in_place(tmp_path: Path) -> None:
+    path = tmp_path / "v1.db"
+    conn = sqlite3.connect(str(path))
+    conn.executescript("""
+        CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT);
+        INSERT INTO metadata VALUES ('schema_version', '1');
+        CREATE TABLE companies (ticker TEXT PRIMARY KEY, name TEXT NOT NULL,
+            sector TEXT DEFAULT '', industry TEXT DEFAULT '', market_cap REAL DEFAULT 0,
+            last_downloaded TEXT DEFAULT '');
+        CREATE TABLE prices (id INTEGER PRIMARY KEY AUTOINCREMENT, ticker TEXT NOT NULL,
+            date TEXT NOT NULL, interval TEXT NOT NULL DEFAULT '1d', open REAL NOT NULL,
+            high REAL NOT NULL, low REAL NOT NULL, close REAL NOT NULL,
+            volume INTEGER NOT NULL);
+        CREATE UNIQUE INDEX idx_prices_dedup ON prices (ticker, date, interval);
+        INSERT INTO companies (ticker, name) VALUES ('AAPL', 'Apple Inc.');
+        INSERT INTO prices (ticker, date, open, high, low, close, volume) VALUES
+            ('AAPL', '2024-01-03', 1, 2, 0.5, 1.5, 10),
+            ('AAPL', '2024-01-02', 1, 2, 0.5, 1.25, 20),
+            ('AAPL', 'bad', 1, 1, 1, 1, 0);
+    """)
+    conn.close()
+
+    conn = connect_db(path)
+    cur = conn.execute("SELECT value FROM metadata WHERE key = 'schema_version'")
+    assert cur.fetchone()[0] == "2"
+    cur = conn.execute("SELECT ticker, date, interval, close, volume FROM prices ORDER BY day")
+    assert cur.fetchall() == [
+        ("AAPL", "2024-01-02", "1d", 1.25, 20),
+        ("AAPL", "2024-01-03", "1d", 1.5, 10),
+        ("AAPL", "bad", "1d", 1.0, 0),
+    ]
+    cur = conn.execute("SELECT name FROM sqlite_master WHERE name LIKE '%prices%' ORDER BY 1")
+    assert [row[0] for row in cur] == ["prices"]
+
+
+def test_later_versions_are_not_migrated(tmp_path: Path) -> None:
+    path = tmp_path / "v10.db"
+    conn = connect_db(path)
+    conn.execute("UPDATE metadata SET value = '10' WHERE key = 'schema_version'")
+    conn.commit()
+    conn.close()
+    with patch("yfinance_db.db._migrate_v2") as migrate:
+        connect_db(path).close()
+    migrate.assert_not_called()
 
 
 def test_upsert_company(tmp_db: sqlite3.Connection) -> None:
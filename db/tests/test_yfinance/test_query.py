@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import sqlite3
 
+import pandas as pd
 import pytest
 
 from yfinance_db.db import (
@@ -59,6 +60,24 @@ def test_get_prices_date_range(populated_db: sqlite3.Connection) -> None:
     df = q.get_prices("AAPL", start="2024-01-03", end="2024-01-03")
     assert len(df) == 1
     assert df.iloc[0]["close"] == 186.0
+    assert list(q.get_prices("AAPL", start="2024-01-03")["date"]) == ["2024-01-03", "2024-01-04"]
+    assert list(q.get_prices("AAPL", end="2024-01-02")["date"]) == ["2024-01-02"]
+
+
+def test_get_prices_range_is_a_key_search(populated_db: sqlite3.Connection) -> None:
+    plan = populated_db.execute(
+        "EXPLAIN QUERY PLAN SELECT date FROM prices"
+        " WHERE ticker = ? AND interval = ? AND day BETWEEN ? AND ? ORDER BY day",
+        ("AAPL", "1d", 0, 1),
+    ).fetchall()
+    assert [row[3] for row in plan] == [
+        "SEARCH price_data USING PRIMARY KEY (ticker=? AND interval=? AND day>? AND day<?)"
+    ]
+
+
+def test_get_prices_invalid_range(populated_db: sqlite3.Connection) -> None:
+    with pytest.raises(ValueError, match="Invalid date range"):
+        YFinanceQuery(populated_db).get_prices("AAPL", start="Jan 2024")
 
 
 def test_get_company_info(populated_db: sqlite3.Connection) -> None:
@@ -115,6 +134,19 @@ def test_compare(populated_db: sqlite3.Connection) -> None:
     assert "MSFT" in df.columns
 
 
+@pytest.mark.parametrize("first", ["income", "cashflow"])
+def test_compare_duplicate_metric_is_stable(tmp_db: sqlite3.Connection, first: str) -> None:
+    upsert_company(tmp_db, _make_company())
+    rows = {
+        "income": _make_financial(value=1.0),
+        "cashflow": _make_financial(statement="cashflow", value=2.0),
+    }
+    upsert_financials(tmp_db, [rows[first]])
+    upsert_financials(tmp_db, [row for name, row in rows.items() if name != first])
+    df = YFinanceQuery(tmp_db).compare(["AAPL"], "Total Revenue")
+    assert df.loc["2023-09-30", "AAPL"] == 2.0
+
+
 def test_compare_prices(populated_db: sqlite3.Connection) -> None:
     q = YFinanceQuery(populated_db)
     df = q.compare_prices(["AAPL", "MSFT"])
@@ -123,6 +155,26 @@ def test_compare_prices(populated_db: sqlite3.Connection) -> None:
     assert len(df) == 3  # AAPL has 3 dates, MSFT 2 (NaN for missing)
 
 
+def test_compare_prices_matches_per_ticker_series(populated_db: sqlite3.Connection) -> None:
+    q = YFinanceQuery(populated_db)
+    expected = pd.DataFrame({
+        "MSFT": q.get_prices("MSFT", start="2024-01-03").set_index("date")["close"],
+        "AAPL": q.get_prices("AAPL", start="2024-01-03").set_index("date")["close"],
+    })
+    expected.index.name = "date"
+    df = q.compare_prices(["msft", "ZZZZ", "aapl"], start="2024-01-03")
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_compare_single_query(populated_db: sqlite3.Connection) -> None:
+    statements: list[str] = []
+    populated_db.set_trace_callback(statements.append)
+    YFinanceQuery(populated_db).compare(["AAPL", "MSFT"], "Total Revenue")
+    YFinanceQuery(populated_db).compare_prices(["AAPL", "MSFT"])
+    populated_db.set_trace_callback(None)
+    assert len(statements) == 2
+
+
 def test_empty_results(tmp_db: sqlite3.Connection) -> None:
     q = YFinanceQuery(tmp_db)
     assert q.get_prices("NONEXIST").empty
@@ -13,6 +13,10 @@ from edgar_db.query import EdgarQuery
 
 _conn: sqlite3.Connection | None = None
 _db_path: Path | None = None
+# Shared across requests so its statement cache is too; tied to the
+# connection it was made for
+_query: EdgarQuery | None = None
+_query_conn: sqlite3.Connection | None = None
 
 
 def get_db_path() -> Path:
@@ -42,14 +46,19 @@ def get_conn() -> sqlite3.Connection:
 
 
 def close_conn() -> None:
-    global _conn
+    global _conn, _query, _query_conn
+    _query = _query_conn = None
     if _conn is not None:
         _conn.close()
         _conn = None
 
 
 def get_query() -> EdgarQuery:
-    return EdgarQuery(get_conn())
+    global _query, _query_conn
+    conn = get_conn()
+    if _query is None or _query_conn is not conn:
+        _query, _query_conn = EdgarQuery(conn), conn
+    return _query
 
 
 def get_config() -> Config:
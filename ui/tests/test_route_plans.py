@@ -0,0 +1,63 @@
+"""Query plans behind the API routes: every lookup must be an index search."""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from edgar_db.db import materialize_statements
+
+# Route -> SQL the request issues, checked with EXPLAIN QUERY PLAN
+_ROUTES = [
+    "/api/statements/AAPL/income",
+    "/api/statements/AAPL/balance?period=quarterly",
+    "/api/statements/AAPL/cashflow",
+    "/api/metrics/AAPL/revenue",
+    "/api/metrics/AAPL/revenue?period=quarterly",
+    "/api/metrics/AAPL/compare?metrics=revenue,net_income",
+]
+
+# Full passes that are not table reads
+_HARMLESS_SCAN = re.compile(r"SCAN (json_each|CONSTANT ROW|\(subquery)")
+
+
+def _route_plans(conn: sqlite3.Connection, client: TestClient, url: str) -> list[str]:
+    statements: list[str] = []
+    conn.set_trace_callback(statements.append)
+    try:
+        assert client.get(url).status_code == 200
+    finally:
+        conn.set_trace_callback(None)
+    details = []
+    for sql in dict.fromkeys(statements):
+        if sql.lstrip().split(None, 1)[0].upper() in {"SELECT", "WITH"}:
+            details += [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    return details
+
+
+class TestRoutePlans:
+    @pytest.mark.parametrize("url", _ROUTES)
+    def test_no_full_scans(
+        self, client: TestClient, seeded_db: sqlite3.Connection, url: str
+    ) -> None:
+        details = _route_plans(seeded_db, client, url)
+        assert details, "route issued no queries"
+        scans = [d for d in details if d.startswith("SCAN") and not _HARMLESS_SCAN.match(d)]
+        assert scans == []
+
+    def test_metric_series_needs_no_sort(
+        self, client: TestClient, seeded_db: sqlite3.Connection
+    ) -> None:
+        details = _route_plans(seeded_db, client, "/api/metrics/AAPL/revenue")
+        assert not any("TEMP B-TREE" in d for d in details)
+
+    def test_materialized_statement_is_one_key_range(
+        self, client: TestClient, seeded_db: sqlite3.Connection
+    ) -> None:
+        materialize_statements(seeded_db)
+        details = _route_plans(seeded_db, client, "/api/statements/AAPL/income")
+        assert "SEARCH income_wide USING PRIMARY KEY (cik=? AND form=?)" in details
+        assert not any("TEMP B-TREE" in d for d in details)
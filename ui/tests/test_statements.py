@@ -4,6 +4,8 @@ from __future__ import annotations
 
 from fastapi.testclient import TestClient
 
+from edgar_ui.backend.dependencies import close_conn, get_query
+
 
 class TestStatements:
     def test_income_statement(self, client: TestClient) -> None:
@@ -64,3 +66,19 @@ class TestStatements:
         data = resp.json()
         assert data["data"] == []
         assert data["columns"] == []
+
+
+class TestSharedQuery:
+    def test_repeat_requests_hit_the_cache(self, client: TestClient) -> None:
+        first = client.get("/api/statements/AAPL/income").json()
+        second = client.get("/api/statements/AAPL/income").json()
+        assert first == second
+        stats = get_query().cache_stats
+        assert (stats.hits, stats.misses) == (1, 1)
+
+    def test_new_connection_gets_a_new_instance(self, client: TestClient) -> None:
+        query = get_query()
+        assert get_query() is query
+        close_conn()
+        assert get_query() is not query
+        close_conn()